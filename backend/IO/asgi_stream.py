@@ -0,0 +1,43 @@
+"""
+ASGI entry point tylko dla strumienia SSE (alarm_alert.views.notification_stream).
+
+API działa na WSGI (runserver / IO.wsgi) - StreamingHttpResponse z synchronicznym iteratorem
+(readings/filter?stream=..., readings/export/columnar) jest tam wysyłany porcjami, a pod ASGI
+Django 4.2 zbiera go w całości do pamięci. Strumień powiadomień jest widokiem asynchronicznym,
+więc obsługuje go osobny proces:
+
+    daphne -b 0.0.0.0 -p 6544 IO.asgi_stream:application
+
+Inne ścieżki dostają tu 404 - cała reszta API zostaje na WSGI.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'IO.settings')
+
+django_application = get_asgi_application()
+
+from django.urls import Resolver404, resolve  # noqa: E402 - po konfiguracji Django
+
+from alarm_alert.views import notification_stream  # noqa: E402
+
+
+def _is_stream(path):
+    try:
+        return resolve(path).func is notification_stream
+    except Resolver404:
+        return False
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and not _is_stream(scope['path']):
+        await send({
+            'type': 'http.response.start',
+            'status': 404,
+            'headers': [(b'content-type', b'application/json')],
+        })
+        await send({'type': 'http.response.body', 'body': b'{"error": "Not found"}'})
+        return
+    await django_application(scope, receive, send)
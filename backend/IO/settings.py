@@ -34,6 +34,39 @@ ALLOWED_HOSTS = []
 
 OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
 
+# True: zapis odczytu tylko kolejkuje ocenę alertów, wykonuje ją worker process_alert_queue
+ALERT_EVALUATION_ASYNC = os.getenv('ALERT_EVALUATION_ASYNC', 'false').lower() == 'true'
+
+# Cache deduplikacji alertów (alarm_alert.dedup) - alias z CACHES i maksymalny czas życia wpisu (s).
+# Domyślny cache jest w pamięci procesu, więc TTL ogranicza nieaktualność między api i alert_worker.
+ALERT_DEDUP_CACHE = 'default'
+ALERT_DEDUP_CACHE_TTL = int(os.getenv('ALERT_DEDUP_CACHE_TTL', '60'))
+
+# Cache liczby nieprzeczytanych powiadomień (alarm_alert.unread) - alias z CACHES i czas życia wpisu (s).
+NOTIFICATION_UNREAD_CACHE = 'default'
+NOTIFICATION_UNREAD_CACHE_TTL = int(os.getenv('NOTIFICATION_UNREAD_CACHE_TTL', '30'))
+
+# Retencja (alarm_alert.retention, komenda apply_alert_retention):
+# alerty {status: {severity: dni}} do ArchivedAlert, przeczytane powiadomienia do agregatów dziennych
+ALERT_RETENTION_POLICIES = {
+    'CLOSED': {'CRITICAL': 180, 'WARNING': 90, 'INFO': 30},
+    'MUTED': {'CRITICAL': 90, 'WARNING': 30, 'INFO': 14},
+}
+NOTIFICATION_RETENTION_DAYS = int(os.getenv('NOTIFICATION_RETENTION_DAYS', '30'))
+
+# Korelacja alertów (alarm_alert.correlation): co najmniej THRESHOLD alertów z tej samej lokalizacji
+# (lub typu urządzenia) w oknie WINDOW_MINUTES tworzy incydent; powiadomienia tylko dla incydentu.
+# NOTIFICATION_CAP - maksymalna liczba alertów powiadamianych w jednym przebiegu
+ALERT_CORRELATION_WINDOW_MINUTES = int(os.getenv('ALERT_CORRELATION_WINDOW_MINUTES', '10'))
+ALERT_CORRELATION_THRESHOLD = int(os.getenv('ALERT_CORRELATION_THRESHOLD', '3'))
+ALERT_NOTIFICATION_CAP = int(os.getenv('ALERT_NOTIFICATION_CAP', '50'))
+
+# Strumieniowe wykrywanie anomalii (alarm_alert.anomaly): próg w odchyleniach standardowych,
+# minimalna liczba odczytów przed oceną i długość okna (odczyty)
+ALERT_ANOMALY_THRESHOLD_STD = float(os.getenv('ALERT_ANOMALY_THRESHOLD_STD', '3.0'))
+ALERT_ANOMALY_MIN_SAMPLES = int(os.getenv('ALERT_ANOMALY_MIN_SAMPLES', '30'))
+ALERT_ANOMALY_WINDOW = int(os.getenv('ALERT_ANOMALY_WINDOW', '500'))
+
 INSTALLED_APPS = [
     'corsheaders',
     'data_acquisition',
@@ -98,6 +131,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'IO.wsgi.application'
+ASGI_APPLICATION = 'IO.asgi.application'
 
 
 # Database
@@ -154,6 +188,12 @@ STATIC_URL = 'static/'
 # Media files (User uploads, charts, etc.)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Odczyty raportów (analysis_reporting.utils.report_storage) - podkatalog MEDIA_ROOT
+REPORT_DATA_DIR = 'report_data'
+# Generowanie raportów w tle (analysis_reporting.report_jobs, komenda process_report_jobs):
+# liczba procesów puli workera i po ilu minutach bez postępu zadanie RUNNING wraca do kolejki
+REPORT_JOB_WORKERS = int(os.getenv('REPORT_JOB_WORKERS', '2'))
+REPORT_JOB_STALE_MINUTES = int(os.getenv('REPORT_JOB_STALE_MINUTES', '30'))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Alert, Notification, NotificationPreferences
+from .models import Alert, Notification, NotificationPreferences, ReadingEvaluationTask
 
 
 @admin.register(Alert)
@@ -33,3 +33,11 @@ class NotificationPreferencesAdmin(admin.ModelAdmin):
     search_fields = ['user__username', 'user__email']
     readonly_fields = ['preference_id']
 
+
+
+@admin.register(ReadingEvaluationTask)
+class ReadingEvaluationTaskAdmin(admin.ModelAdmin):
+    list_display = ['id', 'device', 'metric_ref', 'timestamp', 'value', 'enqueued_at', 'attempts']
+    list_filter = ['attempts']
+    readonly_fields = ['enqueued_at']
+    ordering = ['id']
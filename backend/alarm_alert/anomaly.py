@@ -0,0 +1,185 @@
+"""
+Strumieniowe wykrywanie anomalii w odczytach (uzupełnienie progów z monitoring.THRESHOLDS).
+
+- dla każdej pary (urządzenie, metryka) detektor przechowuje tylko (count, mean, variance)
+  w tabeli AnomalyBaseline
+- aktualizacja O(1) na odczyt: średnia i wariancja ważone wykładniczo z wagą
+  max(1/n, 2/(ALERT_ANOMALY_WINDOW + 1)) - przez pierwsze okno to dokładnie algorytm Welforda,
+  potem statystyki "przesuwają się" za ostatnimi ~ALERT_ANOMALY_WINDOW odczytami
+- odczyt jest anomalią, gdy |value - mean| > ALERT_ANOMALY_THRESHOLD_STD * std,
+  liczone względem statystyk sprzed tego odczytu, po co najmniej ALERT_ANOMALY_MIN_SAMPLES odczytach
+  (to samo kryterium co AnalysisUtils.detect_anomalies, ale bez zapisanego raportu)
+- odczyty ze statusem offline nie są oceniane (osobny alert w batch_evaluator)
+- stan par z partii jest blokowany (SELECT ... FOR UPDATE, w stałej kolejności), aktualizowany
+  i zapisywany jednym upsertem w transakcji oceny - kilka workerów process_alert_queue
+  (i zapisy synchroniczne) aktualizuje te same statystyki po kolei, a nie każdy własną kopię;
+  kolejne partie w jednej transakcji widzą wzajemnie swoje zmiany, a wycofana partia
+  (savepoint przy bisekcji w evaluation_queue) nie zmienia statystyk
+"""
+
+import math
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from data_acquisition.models import Device, Metric
+from alarm_alert.models import AnomalyBaseline
+
+CATEGORY = 'anomaly'
+
+
+def threshold_std():
+    return getattr(settings, 'ALERT_ANOMALY_THRESHOLD_STD', 3.0)
+
+
+def min_samples():
+    return getattr(settings, 'ALERT_ANOMALY_MIN_SAMPLES', 30)
+
+
+def window():
+    return getattr(settings, 'ALERT_ANOMALY_WINDOW', 500)
+
+
+class RunningStats:
+    """Średnia i wariancja (populacyjna) aktualizowane po jednym odczycie."""
+
+    __slots__ = ('count', 'mean', 'variance')
+
+    def __init__(self, count=0, mean=0.0, variance=0.0):
+        self.count = count
+        self.mean = mean
+        self.variance = variance
+
+    def score(self, value):
+        """Odległość od średniej w odchyleniach standardowych (None - za mało danych)."""
+        if self.count < min_samples() or self.variance <= 0:
+            return None
+        return (value - self.mean) / math.sqrt(self.variance)
+
+    def update(self, value, alpha_min):
+        self.count += 1
+        alpha = max(1.0 / self.count, alpha_min)
+        diff = value - self.mean
+        increment = alpha * diff
+        self.mean += increment
+        self.variance = (1.0 - alpha) * (self.variance + diff * increment)
+
+
+class AnomalyDetector:
+    """Statystyki par (device_id, metric_code) w AnomalyBaseline, aktualizowane partiami."""
+
+    def _locked(self, keys):
+        """
+        Statystyki par z keys, z wierszami zablokowanymi do końca transakcji.
+        Brakujące wiersze są najpierw tworzone (ON CONFLICT DO NOTHING).
+        """
+        # Dokładnie pary z partii - nie iloczyn urządzeń i metryk, który blokowałby
+        # wiersze obsługiwane w tym czasie przez inne workery
+        pairs = Q()
+        for device_id, metric_code in sorted(keys):
+            pairs |= Q(device_id=device_id, metric_ref_id=metric_code)
+
+        def select():
+            rows = (
+                AnomalyBaseline.objects
+                .select_for_update()
+                .filter(pairs)
+                # Stała kolejność blokad - równoległe partie nie zakleszczą się
+                .order_by('device_id', 'metric_ref_id')
+                .values_list('device_id', 'metric_ref_id', 'count', 'mean', 'variance')
+            )
+            return {
+                (device_id, metric_code): RunningStats(count, mean, variance)
+                for device_id, metric_code, count, mean, variance in rows
+            }
+
+        stats = select()
+        missing = sorted(keys - stats.keys())
+        if missing:
+            AnomalyBaseline.objects.bulk_create(
+                [AnomalyBaseline(device_id=device_id, metric_ref_id=metric_code) for device_id, metric_code in missing],
+                ignore_conflicts=True,
+            )
+            stats = select()
+        return stats
+
+    def observe(self, block):
+        """
+        Przepuszcza partię odczytów (batch_evaluator.ReadingBlock) przez statystyki.
+
+        Returns:
+            Lista (row_index, score, mean, std) - pierwsza anomalia każdego urządzenia w partii
+        """
+        online = [i for i in range(len(block)) if block.status[i]]
+        if not online:
+            return []
+        device_ids = block.device_ids.tolist()
+        metric_codes = block.metric_codes.tolist()
+        values = block.values.tolist()
+        keys = {(device_ids[i], metric_codes[i]) for i in online}
+
+        alpha_min = 2.0 / (window() + 1)
+        limit = threshold_std()
+        anomalies = {}
+        with transaction.atomic():
+            stats = self._locked(keys)
+            for i in online:
+                current = stats[(device_ids[i], metric_codes[i])]
+                score = current.score(values[i])
+                if score is not None and abs(score) > limit and device_ids[i] not in anomalies:
+                    anomalies[device_ids[i]] = (i, score, current.mean, math.sqrt(current.variance))
+                current.update(values[i], alpha_min)
+
+            AnomalyBaseline.objects.bulk_create(
+                [
+                    AnomalyBaseline(device_id=device_id, metric_ref_id=metric_code,
+                                    count=stats[(device_id, metric_code)].count,
+                                    mean=stats[(device_id, metric_code)].mean,
+                                    variance=stats[(device_id, metric_code)].variance)
+                    for device_id, metric_code in sorted(keys)
+                ],
+                update_conflicts=True,
+                unique_fields=['device', 'metric_ref'],
+                update_fields=['count', 'mean', 'variance', 'updated_at'],
+            )
+        return sorted(anomalies.values())
+
+
+detector = AnomalyDetector()
+
+
+def evaluate_block(block, devices=None):
+    """
+    Kandydaci alertów (argumenty create_alert_if_not_exists) dla anomalii w partii odczytów.
+
+    Args:
+        block: batch_evaluator.ReadingBlock
+        devices: opcjonalna mapa device_id -> Device (brakujące są pobierane jednym zapytaniem)
+    """
+    anomalies = detector.observe(block)
+    if not anomalies:
+        return []
+
+    devices = dict(devices or {})
+    missing = {int(block.device_ids[i]) for i, *_ in anomalies} - devices.keys()
+    if missing:
+        devices.update(Device.objects.in_bulk(missing))
+
+    limit = threshold_std()
+    candidates = []
+    for i, score, mean, std in anomalies:
+        device = devices[int(block.device_ids[i])]
+        metric = Metric.objects.get_cached(int(block.metric_codes[i]))
+        value = float(block.values[i])
+        candidates.append(dict(
+            title=f"Anomaly in {metric.name}: {device.name}",
+            description=(
+                f"{metric.name} = {value:g} {metric.unit} deviates {score:+.1f} std from the recent mean "
+                f"{mean:.2f} {metric.unit} (std {std:.2f}, threshold {limit:g} std)"
+            ),
+            severity='CRITICAL' if abs(score) > 2 * limit else 'WARNING',
+            category=CATEGORY,
+            source=f'device_{device.device_id}',
+        ))
+    return candidates
@@ -0,0 +1,171 @@
+"""
+Wektorowa ocena partii odczytów (progi, siła sygnału, status urządzenia).
+
+Odczyty są zamieniane na blok kolumn numpy (ReadingBlock), wszystkie reguły są
+liczone operacjami na całych tablicach, a wynik to już zdeduplikowana lista
+kandydatów na alerty - po jednym na (category, source), z pierwszego odczytu
+w partii, który łamie regułę (tak jak dotychczasowa ocena wiersz po wierszu).
+
+Tworzenie alertów z kandydatów: monitoring.create_alerts_bulk.
+"""
+
+import numpy as np
+
+from data_acquisition.models import Device, Metric
+
+# Kolumny odczytu potrzebne do oceny - kolejność jak w ReadingBlock.from_rows
+ROW_FIELDS = ('device_id', 'metric_ref_id', 'value', 'signal_dbm', 'status')
+
+
+class ReadingBlock:
+    """
+    Partia odczytów w układzie kolumnowym.
+
+    Kolumny:
+        device_ids (int64), metric_codes (int32 - kody słownika Metric),
+        values (float64), signal_dbm (int64), status (bool)
+    """
+
+    def __init__(self, device_ids, metric_codes, values, signal_dbm, status):
+        self.device_ids = np.asarray(device_ids, dtype=np.int64)
+        self.metric_codes = np.asarray(metric_codes, dtype=np.int32)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.signal_dbm = np.asarray(signal_dbm, dtype=np.int64)
+        self.status = np.asarray(status, dtype=bool)
+
+    def __len__(self):
+        return len(self.device_ids)
+
+    @classmethod
+    def from_readings(cls, readings):
+        """Blok z obiektów DeviceReading (zapisanych lub nie)."""
+        for reading in readings:
+            reading.resolve_metric()
+        return cls(
+            [r.device_id for r in readings],
+            [r.metric_ref_id for r in readings],
+            [r.value for r in readings],
+            [r.signal_dbm for r in readings],
+            [r.status for r in readings],
+        )
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Blok z krotek w kolejności ROW_FIELDS, np. z values_list(*ROW_FIELDS)."""
+        if not rows:
+            return cls([], [], [], [], [])
+        return cls(*zip(*rows))
+
+
+def _threshold_tables(metric_codes, thresholds):
+    """
+    Tablice min/max indeksowane kodem metryki (NaN = brak progu dla metryki).
+    Progi dopasowywane są po nazwie metryki małymi literami, jak dotychczas.
+    """
+    size = int(metric_codes.max()) + 1 if len(metric_codes) else 1
+    mins = np.full(size, np.nan)
+    maxs = np.full(size, np.nan)
+    for code in np.unique(metric_codes).tolist():
+        threshold = thresholds.get(Metric.objects.get_cached(code).name.lower())
+        if threshold:
+            mins[code] = threshold['min']
+            maxs[code] = threshold['max']
+    return mins, maxs
+
+
+def _first_per_device(mask, device_ids):
+    """Indeksy pierwszego wiersza spełniającego mask dla każdego urządzenia (w kolejności partii)."""
+    rows = np.flatnonzero(mask)
+    if not len(rows):
+        return []
+    _, first = np.unique(device_ids[rows], return_index=True)
+    return np.sort(rows[first]).tolist()
+
+
+def find_violations(block, thresholds, min_signal):
+    """
+    Liczy naruszenia reguł dla całego bloku.
+
+    Returns:
+        Lista (kind, row_index) - kind to 'offline', 'weak_signal', 'low' lub 'high';
+        najwyżej jedno naruszenie na (kategoria, urządzenie)
+    """
+    if not len(block):
+        return []
+
+    mins, maxs = _threshold_tables(block.metric_codes, thresholds)
+    low = block.values < mins[block.metric_codes]
+    high = block.values > maxs[block.metric_codes]
+
+    violations = [('offline', i) for i in _first_per_device(~block.status, block.device_ids)]
+    violations += [('weak_signal', i) for i in _first_per_device(block.signal_dbm < min_signal, block.device_ids)]
+    violations += [
+        ('low' if low[i] else 'high', i)
+        for i in _first_per_device(low | high, block.device_ids)
+    ]
+    return violations
+
+
+def evaluate_block(block, thresholds, min_signal, devices=None):
+    """
+    Zamienia naruszenia bloku na kandydatów alertów (argumenty create_alert_if_not_exists).
+
+    Args:
+        block: ReadingBlock
+        thresholds: słownik progów (monitoring.THRESHOLDS)
+        min_signal: minimalna siła sygnału (monitoring.MIN_SIGNAL_STRENGTH)
+        devices: opcjonalna mapa device_id -> Device (brakujące są pobierane jednym zapytaniem)
+    """
+    violations = find_violations(block, thresholds, min_signal)
+    if not violations:
+        return []
+
+    device_ids = {int(block.device_ids[i]) for _, i in violations}
+    devices = dict(devices or {})
+    missing = device_ids - devices.keys()
+    if missing:
+        devices.update(Device.objects.in_bulk(missing))
+
+    candidates = []
+    for kind, i in violations:
+        device = devices[int(block.device_ids[i])]
+        source = f'device_{device.device_id}'
+
+        if kind == 'offline':
+            candidates.append(dict(
+                title=f"Device Offline: {device.name}",
+                description=f"Device {device.name} (ID: {device.device_id}) reported offline status",
+                severity='CRITICAL',
+                category='device',
+                source=source,
+            ))
+        elif kind == 'weak_signal':
+            signal_dbm = int(block.signal_dbm[i])
+            candidates.append(dict(
+                title=f"Weak Signal: {device.name}",
+                description=f"Device {device.name} has weak signal: {signal_dbm} dBm (threshold: {min_signal} dBm)",
+                severity='WARNING',
+                category='communication',
+                source=source,
+            ))
+        else:
+            metric = Metric.objects.get_cached(int(block.metric_codes[i])).name
+            threshold = thresholds[metric.lower()]
+            value = float(block.values[i])
+            if kind == 'low':
+                candidates.append(dict(
+                    title=f"Low {metric}: {device.name}",
+                    description=f"{metric} is below threshold: {value} {threshold['unit']} < {threshold['min']} {threshold['unit']}",
+                    severity='WARNING',
+                    category='sensor',
+                    source=source,
+                ))
+            else:
+                candidates.append(dict(
+                    title=f"High {metric}: {device.name}",
+                    description=f"{metric} is above threshold: {value} {threshold['unit']} > {threshold['max']} {threshold['unit']}",
+                    severity='CRITICAL' if metric.lower() in ['temperature', 'co2'] else 'WARNING',
+                    category='sensor',
+                    source=source,
+                ))
+    return candidates
@@ -0,0 +1,179 @@
+"""
+Korelacja alertów i tłumienie burz (np. padnięta bramka -> "Device Offline" z każdego urządzenia za nią).
+
+- klucz korelacji alertu urządzenia: kategoria + lokalizacja urządzenia
+  (gdy lokalizacja pusta: kategoria + typ urządzenia)
+- jeśli w oknie ALERT_CORRELATION_WINDOW_MINUTES jest co najmniej ALERT_CORRELATION_THRESHOLD
+  alertów z tym samym kluczem, powstaje alert-rodzic kategorii 'incident', a alerty
+  (nowe i te z okna) stają się jego dziećmi
+- kolejne alerty z tym kluczem dołączają do aktywnego incydentu (NEW/CONFIRMED, ostatnia godzina)
+- dzieci nie wysyłają powiadomień - powiadomienie idzie raz, dla incydentu
+- potwierdzenie/wyciszenie/zamknięcie incydentu przenosi status na aktywne dzieci
+- ALERT_NOTIFICATION_CAP ogranicza liczbę alertów powiadamianych w jednym przebiegu
+  (partia odczytów, przebieg send_periodic_notifications); reszta czeka na kolejny przebieg
+"""
+
+import re
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from data_acquisition.models import Device
+from alarm_alert import counters, dedup
+from alarm_alert.models import Alert
+
+INCIDENT_CATEGORY = 'incident'
+SEVERITY_RANK = {'INFO': 0, 'WARNING': 1, 'CRITICAL': 2}
+
+_DEVICE_SOURCE = re.compile(r'^device_(\d+)$')
+
+
+def window():
+    return timedelta(minutes=getattr(settings, 'ALERT_CORRELATION_WINDOW_MINUTES', 10))
+
+
+def threshold():
+    return getattr(settings, 'ALERT_CORRELATION_THRESHOLD', 3)
+
+
+def notification_cap():
+    return getattr(settings, 'ALERT_NOTIFICATION_CAP', 50)
+
+
+def by_priority(alerts):
+    """Alerty od najważniejszych (CRITICAL, potem najstarsze)."""
+    return sorted(alerts, key=lambda a: (-SEVERITY_RANK.get(a.severity, 0), a.created_at or timezone.now()))
+
+
+def assign_keys(alerts):
+    """
+    Ustawia correlation_key alertom urządzeń (jedno zapytanie o urządzenia).
+
+    Returns:
+        Mapa klucz -> czytelny opis grupy (do tytułu incydentu)
+    """
+    matches = {id(alert): _DEVICE_SOURCE.match(alert.source) for alert in alerts}
+    devices = Device.objects.in_bulk({int(m.group(1)) for m in matches.values() if m})
+
+    labels = {}
+    for alert in alerts:
+        match = matches[id(alert)]
+        device = devices.get(int(match.group(1))) if match else None
+        if device is None:
+            continue
+        if device.location:
+            alert.correlation_key = f'{alert.category}:location:{device.location}'
+            labels[alert.correlation_key] = f"location '{device.location}'"
+        else:
+            alert.correlation_key = f'{alert.category}:type:{device.device_type}'
+            labels[alert.correlation_key] = f"device type '{device.device_type}'"
+    return labels
+
+
+def correlate(alerts, now=None):
+    """
+    Przypisuje nowe (jeszcze niezapisane) alerty do incydentów.
+    Alerty należące do incydentu dostają parent; nowe incydenty trzeba zapisać przed nimi.
+
+    Returns:
+        Lista nowych incydentów (niezapisane alerty-rodzice)
+    """
+    now = now or timezone.now()
+    labels = assign_keys(alerts)
+    groups = defaultdict(list)
+    for alert in alerts:
+        if alert.correlation_key:
+            groups[alert.correlation_key].append(alert)
+    if not groups:
+        return []
+
+    active = (
+        Alert.objects.filter(
+            category=INCIDENT_CATEGORY,
+            correlation_key__in=groups,
+            status__in=dedup.ACTIVE_STATUSES,
+            created_at__gte=now - dedup.DEDUP_WINDOW,
+        )
+        .order_by('created_at')
+    )
+    parents = {incident.correlation_key: incident for incident in active}
+
+    recent = dict(
+        Alert.objects.filter(
+            correlation_key__in=set(groups) - set(parents),
+            parent__isnull=True,
+            created_at__gte=now - window(),
+        )
+        .exclude(category=INCIDENT_CATEGORY)
+        .values_list('correlation_key')
+        .annotate(count=Count('pk'))
+        .order_by()
+    )
+
+    incidents = []
+    for key, members in groups.items():
+        parent = parents.get(key)
+        if parent is None:
+            size = recent.get(key, 0) + len(members)
+            if size < threshold():
+                continue
+            category = members[0].category
+            parent = Alert(
+                title=f"Incident: {size} {category} alerts at {labels[key]}",
+                description=(
+                    f"{size} correlated '{category}' alerts at {labels[key]} within {int(window().total_seconds() // 60)} minutes. "
+                    f"Notifications for individual alerts are suppressed."
+                ),
+                severity=max((a.severity for a in members), key=lambda s: SEVERITY_RANK.get(s, 0)),
+                category=INCIDENT_CATEGORY,
+                source=f'incident_{key}'[:100],
+                correlation_key=key,
+            )
+            incidents.append(parent)
+        for alert in members:
+            alert.parent = parent
+    return incidents
+
+
+def adopt_recent(incidents, now=None):
+    """Dołącza do nowych incydentów wcześniejsze alerty z okna korelacji (jedno UPDATE na incydent)."""
+    now = now or timezone.now()
+    for incident in incidents:
+        (
+            Alert.objects.filter(
+                correlation_key=incident.correlation_key,
+                parent__isnull=True,
+                created_at__gte=now - window(),
+            )
+            .exclude(category=INCIDENT_CATEGORY)
+            .update(parent=incident)
+        )
+
+
+def cascade_status(incident):
+    """
+    Przenosi status incydentu (CONFIRMED/MUTED/CLOSED) na jego aktywne dzieci jednym UPDATE.
+    Liczniki statystyk i cache deduplikacji są poprawiane zbiorczo.
+    """
+    children = Alert.objects.filter(parent=incident, status__in=dedup.ACTIVE_STATUSES).exclude(status=incident.status)
+    with transaction.atomic():
+        rows = list(children.select_for_update().values_list('user_id', 'severity', 'status', 'is_muted', 'category', 'source'))
+        if not rows:
+            return 0
+        children.update(status=incident.status, is_muted=incident.is_muted)
+
+        moved = Counter((user_id, severity, status, is_muted) for user_id, severity, status, is_muted, _, _ in rows)
+        changes = []
+        for (user_id, severity, status, is_muted), count in moved.items():
+            changes.append(((user_id, severity, status, is_muted), -count))
+            changes.append(((user_id, severity, incident.status, incident.is_muted), count))
+        counters.apply(changes)
+
+    if incident.status not in dedup.ACTIVE_STATUSES:
+        for *_, category, source in rows:
+            dedup.forget(category, source)
+    return len(rows)
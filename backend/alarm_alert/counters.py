@@ -0,0 +1,144 @@
+"""
+Zmaterializowane liczniki alertów (AlertCounter) dla AlertViewSet.statistics.
+
+- Klucz licznika: (user_id, severity, status, is_muted); każdy alert liczy się w zakresie
+  globalnym (user=NULL) i - jeśli ma właściciela - w zakresie użytkownika
+- signals.py zmienia liczniki przyrostowo (UPDATE count = count + delta) przy utworzeniu,
+  zmianie severity/status/is_muted/właściciela i usunięciu alertu
+- reconcile() przelicza wszystko jednym GROUP BY i poprawia rozbieżności
+  (zmiany bez sygnałów: QuerySet.update, SET_NULL po usunięciu użytkownika)
+- Zakres globalny po reconcile ma komplet wierszy (również zerowych). Brak wierszy
+  globalnych oznacza zimny start - statistics() liczy wtedy jednym GROUP BY na Alert
+"""
+
+from collections import Counter
+from itertools import product
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+
+from alarm_alert.models import Alert, AlertCounter
+
+SEVERITIES = [severity for severity, _ in Alert.SEVERITY_CHOICES]
+STATUSES = [status for status, _ in Alert.STATUS_CHOICES]
+KEY_FIELDS = ('severity', 'status', 'is_muted')
+
+
+def counter_key(alert):
+    return (alert.user_id, alert.severity, alert.status, alert.is_muted)
+
+
+def _scoped(key):
+    """Klucz alertu w zakresie globalnym i użytkownika."""
+    user_id, *rest = key
+    yield (None, *rest)
+    if user_id is not None:
+        yield (user_id, *rest)
+
+
+def _increment(user_id, severity, status, is_muted, delta):
+    rows = AlertCounter.objects.filter(user_id=user_id, severity=severity, status=status, is_muted=is_muted)
+    if rows.update(count=F('count') + delta):
+        return
+    # Wiersze globalne tworzy tylko reconcile - dopóki ich nie ma, statistics() liczy z Alert
+    if user_id is None or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            AlertCounter.objects.create(user_id=user_id, severity=severity, status=status, is_muted=is_muted, count=delta)
+    except IntegrityError:
+        rows.update(count=F('count') + delta)
+
+
+def apply(changes):
+    """
+    Zmienia liczniki.
+
+    Args:
+        changes: pary (counter_key(alert), delta), np. [(stary_klucz, -1), (nowy_klucz, +1)]
+    """
+    deltas = Counter()
+    for key, delta in changes:
+        for scoped in _scoped(key):
+            deltas[scoped] += delta
+    for key, delta in deltas.items():
+        if delta:
+            _increment(*key, delta)
+
+
+def _summary(rows):
+    """Odpowiedź statistics z wierszy (severity, status, is_muted, count)."""
+    by_severity = dict.fromkeys(SEVERITIES, 0)
+    by_status = dict.fromkeys(STATUSES, 0)
+    total = muted = 0
+    for severity, status, is_muted, count in rows:
+        total += count
+        if severity in by_severity:
+            by_severity[severity] += count
+        if status in by_status:
+            by_status[status] += count
+        if is_muted:
+            muted += count
+    return {
+        'total': total,
+        'by_severity': by_severity,
+        'by_status': by_status,
+        'muted_count': muted,
+    }
+
+
+def statistics(user=None):
+    """
+    Statystyki alertów: globalne (user=None) albo alertów użytkownika.
+    Jedno zapytanie o liczniki; przy zimnym starcie jedno GROUP BY na Alert.
+    """
+    user_id = user.pk if user is not None else None
+    scope = Q(user__isnull=True) if user_id is None else Q(user__isnull=True) | Q(user_id=user_id)
+    rows = list(AlertCounter.objects.filter(scope).values_list('user_id', *KEY_FIELDS, 'count'))
+
+    if not any(row[0] is None for row in rows):
+        alerts = Alert.objects.all() if user_id is None else Alert.objects.filter(user_id=user_id)
+        return _summary(alerts.values_list(*KEY_FIELDS).annotate(count=Count('pk')).order_by())
+
+    return _summary(row[1:] for row in rows if row[0] == user_id)
+
+
+def reconcile():
+    """
+    Przelicza liczniki z tabeli Alert i poprawia rozbieżności.
+
+    Returns:
+        Liczba poprawionych wierszy (z błędną wartością lub brakujących)
+    """
+    actual = Counter()
+    grouped = Alert.objects.values_list('user_id', *KEY_FIELDS).annotate(count=Count('pk')).order_by()
+    for *key, count in grouped:
+        for scoped in _scoped(tuple(key)):
+            actual[scoped] += count
+    for severity, status, is_muted in product(SEVERITIES, STATUSES, (False, True)):
+        actual.setdefault((None, severity, status, is_muted), 0)
+
+    with transaction.atomic():
+        stored = {
+            (counter.user_id, counter.severity, counter.status, counter.is_muted): counter
+            for counter in AlertCounter.objects.select_for_update()
+        }
+
+        to_update = []
+        for key, counter in stored.items():
+            if key in actual and counter.count != actual[key]:
+                counter.count = actual[key]
+                to_update.append(counter)
+        stale = [counter for key, counter in stored.items() if key not in actual]
+        to_create = [
+            AlertCounter(user_id=user_id, severity=severity, status=status, is_muted=is_muted, count=count)
+            for (user_id, severity, status, is_muted), count in actual.items()
+            if (user_id, severity, status, is_muted) not in stored
+        ]
+
+        AlertCounter.objects.bulk_update(to_update, ['count'])
+        AlertCounter.objects.filter(pk__in=[counter.pk for counter in stale]).delete()
+        AlertCounter.objects.bulk_create(to_create)
+
+    # Wyzerowane wiersze użytkowników są usuwane, ale nie są rozbieżnością
+    return len(to_update) + len(to_create) + sum(1 for counter in stale if counter.count)
@@ -0,0 +1,80 @@
+"""
+Cache deduplikacji alertów: czy dla (category, source) istnieje aktywny alert
+(NEW/CONFIRMED) utworzony w ostatniej godzinie.
+
+- trafienie w cache = brak zapytania do tabeli alertów
+- wpis żyje do końca okna deduplikacji (created_at + 1h), ale nie dłużej niż
+  ALERT_DEDUP_CACHE_TTL - to ogranicza nieaktualność między procesami (api / alert_worker)
+  przy domyślnym cache w pamięci procesu
+- zmiana statusu na MUTED/CLOSED i usunięcie alertu usuwają wpis (alarm_alert.signals)
+- wpis trafia do cache dopiero po zatwierdzeniu transakcji - wycofany savepoint
+  (alarm_alert.evaluation_queue) nie zostawia w cache alertu, którego nie ma w bazie;
+  do tego czasu chybienie sprawdza tabela, która widzi alerty bieżącej transakcji
+- przy chybieniu zapytanie idzie po indeksie alert_dedup_idx (category, source, status, created_at)
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Alert
+
+DEDUP_WINDOW = timedelta(hours=1)
+ACTIVE_STATUSES = ('NEW', 'CONFIRMED')
+
+
+def _cache():
+    return caches[getattr(settings, 'ALERT_DEDUP_CACHE', 'default')]
+
+
+def _max_ttl():
+    return getattr(settings, 'ALERT_DEDUP_CACHE_TTL', 60)
+
+
+def cache_key(category, source):
+    return f'alert_dedup:{category}:{source}'
+
+
+def remember(category, source, created_at):
+    """Zapamiętuje aktywny alert do końca okna deduplikacji (po zatwierdzeniu transakcji)."""
+    def store():
+        remaining = (created_at + DEDUP_WINDOW - timezone.now()).total_seconds()
+        if remaining > 0:
+            _cache().set(cache_key(category, source), True, min(remaining, _max_ttl()))
+    transaction.on_commit(store)
+
+
+def forget(category, source):
+    _cache().delete(cache_key(category, source))
+
+
+def active_keys(keys):
+    """
+    Zwraca podzbiór kluczy (category, source), dla których istnieje aktywny alert w oknie.
+    Najpierw cache (jedno get_many), potem jedno zapytanie dla chybień.
+    """
+    keys = set(keys)
+    if not keys:
+        return set()
+
+    by_cache_key = {cache_key(*key): key for key in keys}
+    active = {by_cache_key[k] for k in _cache().get_many(list(by_cache_key))}
+    missing = keys - active
+    if not missing:
+        return active
+
+    found = Alert.objects.filter(
+        category__in={category for category, _ in missing},
+        source__in={source for _, source in missing},
+        status__in=ACTIVE_STATUSES,
+        created_at__gte=timezone.now() - DEDUP_WINDOW,
+    ).order_by().values_list('category', 'source', 'created_at')
+
+    for category, source, created_at in found:
+        if (category, source) in missing:
+            active.add((category, source))
+            remember(category, source, created_at)
+    return active
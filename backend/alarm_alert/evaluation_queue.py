@@ -0,0 +1,116 @@
+"""
+Kolejka oceny odczytów w bazie (tabela ReadingEvaluationTask).
+
+Przy ALERT_EVALUATION_ASYNC = True zapis odczytu tylko dopisuje zadanie do kolejki,
+a progi i alerty ocenia w partiach worker (management command process_alert_queue).
+Kilka workerów może działać równolegle - partie są pobierane przez
+SELECT ... FOR UPDATE SKIP LOCKED, więc żadne zadanie nie trafi do dwóch workerów.
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from data_acquisition.models import Device, DeviceReading
+from .models import ReadingEvaluationTask
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_ATTEMPTS = 5
+
+
+def is_async():
+    return getattr(settings, 'ALERT_EVALUATION_ASYNC', False)
+
+
+def enqueue_readings(readings):
+    """Dopisuje odczyty do kolejki oceny (jedno INSERT na partię)."""
+    tasks = []
+    for reading in readings:
+        reading.resolve_metric()
+        tasks.append(ReadingEvaluationTask(
+            device_id=reading.device_id,
+            metric_ref_id=reading.metric_ref_id,
+            timestamp=reading.timestamp,
+            value=reading.value,
+            signal_dbm=reading.signal_dbm,
+            status=reading.status,
+        ))
+    ReadingEvaluationTask.objects.bulk_create(tasks)
+    return len(tasks)
+
+
+def _readings_from_tasks(tasks):
+    devices = Device.objects.in_bulk({task.device_id for task in tasks})
+    return [
+        DeviceReading(
+            device=devices[task.device_id],
+            metric_ref_id=task.metric_ref_id,
+            timestamp=task.timestamp,
+            value=task.value,
+            signal_dbm=task.signal_dbm,
+            status=task.status,
+        )
+        for task in tasks
+    ]
+
+
+def _evaluate(tasks, failed):
+    """
+    Ocenia zadania w savepoincie. Przy błędzie dzieli je na połowy (bisekcja) aż do pojedynczego
+    zadania - jedno złe zadanie nie blokuje pozostałych z partii.
+
+    Args:
+        failed: słownik uzupełniany o {task_id: wyjątek} zadań, których nie udało się ocenić
+
+    Returns:
+        Liczba utworzonych alertów
+    """
+    from .monitoring import evaluate_readings
+
+    try:
+        # Wycofany savepoint odrzuca też zmiany bazowych statystyk anomalii (AnomalyBaseline)
+        with transaction.atomic():
+            return evaluate_readings(_readings_from_tasks(tasks))
+    except Exception as e:
+        if len(tasks) == 1:
+            logger.exception(f"Alert evaluation failed for task {tasks[0].pk}")
+            failed[tasks[0].pk] = e
+            return 0
+        middle = len(tasks) // 2
+        return _evaluate(tasks[:middle], failed) + _evaluate(tasks[middle:], failed)
+
+
+def process_batch(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Pobiera partię zadań, ocenia odczyty i usuwa zadania - wszystko w jednej transakcji.
+    Zadanie, którego ocena kończy się błędem, jest wyszukiwane bisekcją (_evaluate) i tylko ono
+    wraca do kolejki z licznikiem prób; po MAX_ATTEMPTS jest pomijane (zostaje w tabeli do wglądu).
+    Błąd poza oceną (np. utracone połączenie z bazą) nie zwiększa licznika - partia wraca
+    do kolejki bez zmian.
+
+    Returns:
+        (liczba przetworzonych zadań, liczba utworzonych alertów)
+    """
+    with transaction.atomic():
+        tasks = list(
+            ReadingEvaluationTask.objects
+            .select_for_update(skip_locked=True)
+            .filter(attempts__lt=MAX_ATTEMPTS)
+            .order_by('id')[:batch_size]
+        )
+        if not tasks:
+            return 0, 0
+
+        failed = {}
+        created = _evaluate(tasks, failed)
+
+        ReadingEvaluationTask.objects.filter(pk__in=[task.pk for task in tasks if task.pk not in failed]).delete()
+        for task_id, error in failed.items():
+            ReadingEvaluationTask.objects.filter(pk=task_id).update(
+                attempts=F('attempts') + 1, last_error=str(error)[:1000]
+            )
+        return len(tasks) - len(failed), created
@@ -0,0 +1,58 @@
+"""
+Management command: apply_alert_retention
+
+Retencja alertów i powiadomień (alarm_alert.retention).
+
+LOGIKA:
+- Przeczytane powiadomienia starsze niż NOTIFICATION_RETENTION_DAYS są zwijane do
+  NotificationDailyAggregate (liczba na dzień/użytkownika/alert) i usuwane
+- Alerty CLOSED/MUTED starsze niż liczba dni z ALERT_RETENTION_POLICIES (per status i severity)
+  są przenoszone do ArchivedAlert
+- Alerty NEW/CONFIRMED i nieprzeczytane powiadomienia nie są ruszane
+- Praca partiami (--batch-size), każda partia w osobnej transakcji
+
+URUCHOMIENIE:
+- Manualnie: python manage.py apply_alert_retention
+- Podgląd: python manage.py apply_alert_retention --dry-run
+- Docker: serwis alert_maintenance (co godzinę)
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from alarm_alert import retention
+
+
+class Command(BaseCommand):
+    help = 'Archiwizuje stare alerty CLOSED/MUTED i zwija przeczytane powiadomienia do agregatów dziennych'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Tylko pokaż ile wierszy obejmują polityki, bez zmian',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=retention.DEFAULT_BATCH_SIZE,
+            help='Liczba wierszy w jednej partii (transakcji)',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size musi być większe od 0')
+
+        started = time.monotonic()
+        if options['dry_run']:
+            results = retention.preview()
+        else:
+            results = retention.apply_policies(batch_size=options['batch_size'])
+        elapsed = time.monotonic() - started
+
+        for policy, count in results.items():
+            if count:
+                self.stdout.write(f'{policy}: {count}')
+
+        prefix = 'DRY RUN: do przeniesienia' if options['dry_run'] else 'Przeniesiono'
+        self.stdout.write(self.style.SUCCESS(f'{prefix} wierszy: {sum(results.values())} ({elapsed:.1f} s)'))
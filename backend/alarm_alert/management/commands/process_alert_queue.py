@@ -0,0 +1,81 @@
+"""
+Management command: process_alert_queue
+
+Worker oceniający odczyty z kolejki ReadingEvaluationTask (tryb ALERT_EVALUATION_ASYNC).
+
+LOGIKA:
+- Pobiera partię zadań przez SELECT ... FOR UPDATE SKIP LOCKED (--batch-size)
+- Ocenia progi/sygnał/status całej partii (monitoring.evaluate_readings) i usuwa zadania
+- Błąd oceny jest zawężany bisekcją do pojedynczych zadań - tylko one wracają do kolejki
+  (maks. MAX_ATTEMPTS prób), reszta partii jest oceniana normalnie
+- Wykrywa anomalie strumieniowo (alarm_alert.anomaly) - statystyki par (urządzenie, metryka)
+  są aktualizowane w AnomalyBaseline w transakcji partii (blokada wierszy między workerami)
+- Alerty i powiadomienia powstają tutaj, a nie w żądaniu zapisującym odczyt
+- Gdy kolejka jest pusta, czeka --poll-interval sekund
+- Można uruchomić kilka workerów równolegle
+
+URUCHOMIENIE:
+- python manage.py process_alert_queue
+- python manage.py process_alert_queue --once   (opróżnia kolejkę i kończy)
+- Docker: serwis alert_worker
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from alarm_alert import evaluation_queue
+
+
+class Command(BaseCommand):
+    help = 'Przetwarza kolejkę oceny odczytów (alerty) partiami w tle'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=evaluation_queue.DEFAULT_BATCH_SIZE,
+            help='Liczba zadań w jednej partii',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Czas oczekiwania (s), gdy kolejka jest pusta',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Przetwórz kolejkę do końca i zakończ',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size musi być większe od 0')
+
+        total = 0
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    processed, created = evaluation_queue.process_batch(options['batch_size'])
+                except Exception as e:
+                    self.stderr.write(f'Błąd partii: {e}')
+                    processed, created = 0, 0
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                if processed:
+                    total += processed
+                    self.stdout.write(f'Przetworzono {processed} odczytów, utworzono {created} alertów')
+                    continue
+
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f'Zakończono. Przetworzono łącznie: {total}'))
@@ -0,0 +1,32 @@
+"""
+Management command: reconcile_alert_counters
+
+Uzgadnia zmaterializowane liczniki statystyk alertów (AlertCounter) z tabelą Alert.
+
+LOGIKA:
+- Liczniki są aktualizowane przyrostowo z sygnałów Alert (alarm_alert.counters)
+- Zmiany bez sygnałów (QuerySet.update, SET_NULL po usunięciu użytkownika) powodują rozbieżności
+- Command przelicza wszystko jednym GROUP BY i poprawia tylko różniące się wiersze
+- Pierwsze uruchomienie kończy zimny start (do tego czasu statistics liczy z tabeli Alert)
+
+URUCHOMIENIE:
+- Manualnie: python manage.py reconcile_alert_counters
+- Docker: serwis alert_maintenance (co godzinę)
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from alarm_alert import counters
+
+
+class Command(BaseCommand):
+    help = 'Uzgadnia liczniki statystyk alertów z tabelą Alert'
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        corrected = counters.reconcile()
+        elapsed_ms = (time.monotonic() - started) * 1000
+        self.stdout.write(
+            self.style.SUCCESS(f'Poprawiono wierszy liczników: {corrected} ({elapsed_ms:.1f} ms)')
+        )
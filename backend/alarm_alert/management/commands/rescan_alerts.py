@@ -0,0 +1,91 @@
+"""
+Management command: rescan_alerts
+
+Ponowna ocena historycznych odczytów (np. po zmianie THRESHOLDS / MIN_SIGNAL_STRENGTH).
+
+LOGIKA:
+- Odczyty z zakresu (--start/--end, opcjonalnie --device-id) są pobierane kursorem
+  serwerowym jako krotki i oceniane blokami po --chunk-size wierszy (batch_evaluator)
+- Wszystkie reguły liczone wektorowo na całym bloku (numpy)
+- Alerty deduplikowane jak przy bieżącej ocenie: jeden aktywny alert na (category, source)
+  w ostatniej godzinie, tworzone przez bulk_create
+- --dry-run: tylko liczy naruszenia, bez tworzenia alertów
+
+URUCHOMIENIE:
+- python manage.py rescan_alerts --start 2025-10-01T00:00:00Z --end 2025-10-31T23:59:59Z
+- python manage.py rescan_alerts --device-id 3 --dry-run
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+from data_acquisition.models import DeviceReading
+from alarm_alert import batch_evaluator
+from alarm_alert.monitoring import THRESHOLDS, MIN_SIGNAL_STRENGTH, create_alerts_bulk
+
+DEFAULT_CHUNK_SIZE = 50000
+
+
+class Command(BaseCommand):
+    help = 'Ponownie ocenia historyczne odczyty regułami alertów (wektorowo, blokami)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='Początek zakresu (ISO 8601)')
+        parser.add_argument('--end', help='Koniec zakresu (ISO 8601)')
+        parser.add_argument('--device-id', type=int, help='Tylko odczyty jednego urządzenia')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Liczba odczytów w jednym bloku oceny',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Tylko policz naruszenia, bez tworzenia alertów',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] <= 0:
+            raise CommandError('--chunk-size musi być większe od 0')
+
+        readings = DeviceReading.objects.all()
+        for option, lookup in (('start', 'timestamp__gte'), ('end', 'timestamp__lte')):
+            if options[option]:
+                dt = parse_datetime(options[option])
+                if dt is None:
+                    raise CommandError(f'Niepoprawna data --{option}: {options[option]}')
+                readings = readings.filter(**{lookup: dt})
+        if options['device_id']:
+            readings = readings.filter(device_id=options['device_id'])
+
+        rows = readings.order_by('timestamp').values_list(*batch_evaluator.ROW_FIELDS)
+        started = time.perf_counter()
+        scanned = 0
+        violations = 0
+        created = 0
+
+        chunk = []
+        for row in rows.iterator(chunk_size=min(options['chunk_size'], 10000)):
+            chunk.append(row)
+            if len(chunk) >= options['chunk_size']:
+                v, c = self._evaluate(chunk, options['dry_run'])
+                violations, created, scanned = violations + v, created + c, scanned + len(chunk)
+                chunk = []
+        if chunk:
+            v, c = self._evaluate(chunk, options['dry_run'])
+            violations, created, scanned = violations + v, created + c, scanned + len(chunk)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Przeskanowano {scanned} odczytów w {elapsed:.2f}s. '
+            f'Naruszenia (po deduplikacji w blokach): {violations}. Utworzone alerty: {created}.'
+        ))
+
+    def _evaluate(self, rows, dry_run):
+        block = batch_evaluator.ReadingBlock.from_rows(rows)
+        candidates = batch_evaluator.evaluate_block(block, THRESHOLDS, MIN_SIGNAL_STRENGTH)
+        if dry_run:
+            return len(candidates), 0
+        return len(candidates), len(create_alerts_bulk(candidates))
@@ -4,25 +4,43 @@ Management command: send_periodic_notifications
 Wysyła powtarzające się powiadomienia dla alertów ze statusem NEW.
 
 LOGIKA:
-- Docker uruchamia command co 60 sekund (wymóg: wykrycie <60s)
-- Sprawdza wszystkie alerty ze statusem NEW
-- Dla każdego alertu sprawdza kiedy ostatnio wysłano powiadomienie
-- Jeśli minął odpowiedni czas (severity-dependent) → wysyła nowe powiadomienie
+- Jedno zapytanie wybiera alerty NEW, dla których minął interwał od ostatniego powiadomienia
+  (ostatnie sent_at z podzapytania, interwał z NOTIFICATION_INTERVALS przez CASE na severity)
+- Alert bez żadnego powiadomienia jest zawsze do wysłania
+- Wybrane alerty są wysyłane razem (send_notifications_for_alerts - jeden bulk_create)
+- Alerty należące do incydentu (alarm_alert.correlation) są pomijane - powiadamia incydent
+- Jeden przebieg wysyła najwyżej ALERT_NOTIFICATION_CAP alertów (najpierw CRITICAL),
+  reszta czeka na kolejny przebieg (w trybie --daemon: za minutę)
 - CRITICAL: Co 15 minut (wykrycie <60s, ale powiadomienie co 15min)
 - WARNING: Co 60 minut (1h)
 - INFO: Co 1440 minut (24h)
+- Na koniec wypisuje podsumowanie przebiegu z czasem trwania (ms)
+
+TRYB --daemon (alarm_alert.notification_scheduler):
+- Proces działa stale z jednym połączeniem do bazy (bez startu Django co przebieg)
+- Terminy kolejnych powiadomień trzyma w kopcu i śpi do najbliższego z nich
+- Nowe alerty NEW przychodzą przez PostgreSQL LISTEN/NOTIFY (wyłączane --no-listen);
+  alerty odłożone przez limit przy tworzeniu są planowane za minutę, nie od razu
+- Alert bez aktywnych odbiorców jest sprawdzany ponownie co minutę
+- Co --resync-interval sekund harmonogram jest wczytywany od nowa
+  (zmiany statusu bez NOTIFY, np. potwierdzenie alertu, masowe UPDATE)
 
 URUCHOMIENIE:
 - Manualnie: python manage.py send_periodic_notifications
-- Docker periodic container (zalecane, co 60s)
+- Demon: python manage.py send_periodic_notifications --daemon
+- Docker: serwis periodic_notifier (tryb --daemon)
 """
 
-from django.core.management.base import BaseCommand
-from django.utils import timezone
-from datetime import timedelta
-from alarm_alert.models import Alert, Notification
-from alarm_alert.signals import send_notifications_for_alert, NOTIFICATION_INTERVALS
 import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.utils import timezone
+from alarm_alert.models import Alert
+from alarm_alert import correlation, pg_notify
+from alarm_alert.notification_scheduler import NOTIFY_CHANNEL, NotificationScheduler, due_alerts, parse_notifications
+from alarm_alert.signals import send_notifications_for_alerts
 
 logger = logging.getLogger(__name__)
 
@@ -36,46 +54,121 @@ class Command(BaseCommand):
             action='store_true',
             help='Tylko pokaż co zostałoby zrobione, bez wysyłania',
         )
+        parser.add_argument(
+            '--daemon',
+            action='store_true',
+            help='Działaj stale i budź się na najbliższy termin powiadomienia',
+        )
+        parser.add_argument(
+            '--no-listen',
+            action='store_true',
+            help='(--daemon) Nie nasłuchuj nowych alertów przez PostgreSQL LISTEN/NOTIFY',
+        )
+        parser.add_argument(
+            '--resync-interval',
+            type=float,
+            default=300.0,
+            help='(--daemon) Co ile sekund wczytać harmonogram z bazy od nowa',
+        )
 
     def handle(self, *args, **options):
+        if options['daemon']:
+            if options['dry_run']:
+                raise CommandError('--dry-run nie działa z --daemon')
+            if options['resync_interval'] <= 0:
+                raise CommandError('--resync-interval musi być większe od 0')
+            return self.run_daemon(options['resync_interval'], listen_enabled=not options['no_listen'])
+
         dry_run = options['dry_run']
-        
-        # Znajdź wszystkie alerty ze statusem NEW
-        new_alerts = Alert.objects.filter(status='NEW').select_related('user')
-        
-        if new_alerts.count() == 0:
-            return
-        
-        sent_count = 0
-        skipped_count = 0
-        
-        for alert in new_alerts:
-            interval = NOTIFICATION_INTERVALS.get(alert.severity, 60)
-            
-            # Sprawdź kiedy ostatnio wysłano powiadomienie DLA TEGO ALERTU
-            last_notification = Notification.objects.filter(
-                alert=alert
-            ).order_by('-sent_at').first()
-            
-            # Jeśli nigdy nie wysłano - wyślij teraz
-            if not last_notification:
-                if not dry_run:
-                    send_notifications_for_alert(alert)
-                sent_count += 1
-                continue
-            
-            # Sprawdź czy minął wymagany czas od ostatniego powiadomienia
-            time_since_last = timezone.now() - last_notification.sent_at
-            minutes_since_last = time_since_last.total_seconds() / 60
-            
-            if minutes_since_last >= interval:
-                if not dry_run:
-                    send_notifications_for_alert(alert)
-                sent_count += 1
-            else:
-                skipped_count += 1
-        
+        started = time.monotonic()
+
+        alerts = list(due_alerts()[:correlation.notification_cap()])
+
+        notifications = 0
+        if alerts and not dry_run:
+            notifications = send_notifications_for_alerts(alerts, reason="periodic")
+
+        elapsed_ms = self._report(len(alerts), notifications, started)
+
         if dry_run:
+            skipped_count = Alert.objects.filter(status='NEW', parent__isnull=True).count() - len(alerts)
+            self.stdout.write(
+                self.style.WARNING(f'DRY RUN: Wysłano: {len(alerts)}, Pominięto: {skipped_count} ({elapsed_ms:.1f} ms)')
+            )
+        else:
+            self.stdout.write(
+                f'Alerty do powiadomienia: {len(alerts)}, wysłano powiadomień: {notifications}, czas: {elapsed_ms:.1f} ms'
+            )
+
+    def _report(self, alerts, notifications, started):
+        elapsed_ms = (time.monotonic() - started) * 1000
+        logger.info(
+            "send_periodic_notifications: alerts=%d notifications=%d elapsed=%.1fms",
+            alerts, notifications, elapsed_ms,
+        )
+        return elapsed_ms
+
+    def run_daemon(self, resync_interval, listen_enabled):
+        listen_enabled = listen_enabled and pg_notify.is_available()
+        scheduler = NotificationScheduler()
+        resync_at = 0.0
+        listening = False
+
+        self.stdout.write(f'Demon powiadomień uruchomiony (LISTEN: {"tak" if listen_enabled else "nie"})')
+        try:
+            while True:
+                try:
+                    if listen_enabled and not listening:
+                        pg_notify.listen(NOTIFY_CHANNEL)
+                        listening = True
+
+                    if time.monotonic() >= resync_at:
+                        scheduler.clear()
+                        scheduler.load(Alert.objects.all())
+                        resync_at = time.monotonic() + resync_interval
+
+                    now = timezone.now()
+                    alert_ids = scheduler.pop_due(now)
+                    if alert_ids:
+                        self._dispatch(scheduler, alert_ids, now)
+
+                    timeout = resync_at - time.monotonic()
+                    next_due = scheduler.next_due()
+                    if next_due is not None:
+                        timeout = min(timeout, (next_due - timezone.now()).total_seconds())
+
+                    if listening:
+                        new_ids, deferred_ids = parse_notifications(pg_notify.wait(timeout))
+                        if new_ids:
+                            scheduler.load(Alert.objects.filter(pk__in=new_ids))
+                        if deferred_ids:
+                            scheduler.defer(deferred_ids)
+                    elif timeout > 0:
+                        time.sleep(timeout)
+                except DatabaseError as e:
+                    # Zerwane połączenie - nowe połączenie, ponowny LISTEN i pełny resync
+                    self.stderr.write(f'Błąd bazy danych: {e}')
+                    connection.close()
+                    listening = False
+                    resync_at = 0.0
+                    time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS('Demon powiadomień zatrzymany'))
+
+    def _dispatch(self, scheduler, alert_ids, now):
+        started = time.monotonic()
+        # Ponowna weryfikacja w bazie - alert mógł zostać potwierdzony lub powiadomiony w międzyczasie
+        due = list(due_alerts(now).filter(pk__in=alert_ids))
+        alerts, deferred = due[:correlation.notification_cap()], due[correlation.notification_cap():]
+        notifications = send_notifications_for_alerts(alerts, reason="periodic") if alerts else 0
+        deferred_ids = {alert.pk for alert in deferred}
+        scheduler.reschedule([pk for pk in alert_ids if pk not in deferred_ids])
+        scheduler.defer(deferred_ids, now)
+
+        elapsed_ms = self._report(len(alerts), notifications, started)
+        if alerts:
             self.stdout.write(
-                self.style.WARNING(f'DRY RUN: Wysłano: {sent_count}, Pominięto: {skipped_count}')
+                f'Alerty do powiadomienia: {len(alerts)}, wysłano powiadomień: {notifications}, czas: {elapsed_ms:.1f} ms'
             )
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.25 on 2026-10-17 06:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_acquisition', '0007_normalize_reading_metric'),
+        ('alarm_alert', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadingEvaluationTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField()),
+                ('value', models.FloatField()),
+                ('signal_dbm', models.IntegerField(default=0)),
+                ('status', models.BooleanField(default=True)),
+                ('enqueued_at', models.DateTimeField(auto_now_add=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('device', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='data_acquisition.device')),
+                ('metric_ref', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='data_acquisition.metric')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.25 on 2026-10-17 06:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alarm_alert', '0002_reading_evaluation_queue'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(fields=['category', 'source', 'status', 'created_at'], name='alert_dedup_idx'),
+        ),
+    ]
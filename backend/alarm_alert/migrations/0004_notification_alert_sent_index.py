@@ -0,0 +1,17 @@
+# Generated by Django 4.2.25 on 2026-10-17 06:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alarm_alert', '0003_alert_dedup_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['alert', '-sent_at'], name='notification_alert_sent_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.25 on 2026-10-17 06:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('alarm_alert', '0004_notification_alert_sent_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('severity', models.CharField(choices=[('CRITICAL', 'Critical'), ('WARNING', 'Warning'), ('INFO', 'Info')], max_length=20)),
+                ('status', models.CharField(choices=[('NEW', 'New'), ('CONFIRMED', 'Confirmed'), ('MUTED', 'Muted'), ('CLOSED', 'Closed')], max_length=20)),
+                ('is_muted', models.BooleanField(default=False)),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='alert_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='alertcounter',
+            constraint=models.UniqueConstraint(condition=models.Q(('user__isnull', True)), fields=('severity', 'status', 'is_muted'), name='alert_counter_global_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='alertcounter',
+            constraint=models.UniqueConstraint(condition=models.Q(('user__isnull', False)), fields=('user', 'severity', 'status', 'is_muted'), name='alert_counter_user_uniq'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.25 on 2026-10-17 06:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('alarm_alert', '0005_alert_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationDailyAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('alert_id', models.UUIDField(blank=True, null=True)),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_aggregates', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['user', 'day'], name='alarm_alert_user_id_0e071a_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedAlert',
+            fields=[
+                ('alert_id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField()),
+                ('severity', models.CharField(choices=[('CRITICAL', 'Critical'), ('WARNING', 'Warning'), ('INFO', 'Info')], max_length=20)),
+                ('status', models.CharField(choices=[('NEW', 'New'), ('CONFIRMED', 'Confirmed'), ('MUTED', 'Muted'), ('CLOSED', 'Closed')], max_length=20)),
+                ('category', models.CharField(max_length=100)),
+                ('source', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_alerts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at'], name='alarm_alert_created_e79e10_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.25 on 2026-10-17 06:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alarm_alert', '0006_alert_retention'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alert',
+            name='correlation_key',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='alert',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children', to='alarm_alert.alert'),
+        ),
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(fields=['correlation_key', 'created_at'], name='alert_correlation_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.25 on 2026-10-17 06:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_acquisition', '0007_normalize_reading_metric'),
+        ('alarm_alert', '0007_alert_correlation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnomalyBaseline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('mean', models.FloatField(default=0.0)),
+                ('variance', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('device', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='data_acquisition.device')),
+                ('metric_ref', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='data_acquisition.metric')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='anomalybaseline',
+            constraint=models.UniqueConstraint(fields=('device', 'metric_ref'), name='anomaly_baseline_uniq'),
+        ),
+    ]
@@ -1,9 +1,10 @@
 from django.db import models
 from security.models import User
+from data_acquisition.utils.tracking import TrackedFieldsMixin
 import uuid
 
 
-class Alert(models.Model):
+class Alert(TrackedFieldsMixin, models.Model):
     SEVERITY_CHOICES = [
         ('CRITICAL', 'Critical'),
         ('WARNING', 'Warning'),
@@ -28,12 +29,22 @@ class Alert(models.Model):
     source = models.CharField(max_length=100)
     created_at = models.DateTimeField(auto_now_add=True)
     is_muted = models.BooleanField(default=False)
+    # Korelacja (alarm_alert.correlation): alert-rodzic kategorii 'incident' grupuje alerty
+    # z tej samej lokalizacji/typu urządzenia; dzieci nie wysyłają własnych powiadomień
+    parent = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='children')
+    correlation_key = models.CharField(max_length=255, blank=True, default='')
+
+    # Stan sprzed zapisu dla signals.py (zmiana statusu, klucz liczników) bez dodatkowego SELECT
+    tracked_fields = ('status', 'user_id', 'severity', 'is_muted')
 
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', 'status']),
             models.Index(fields=['severity', 'created_at']),
+            # Deduplikacja alertów (monitoring.create_alert_if_not_exists, alarm_alert.dedup)
+            models.Index(fields=['category', 'source', 'status', 'created_at'], name='alert_dedup_idx'),
+            models.Index(fields=['correlation_key', 'created_at'], name='alert_correlation_idx'),
         ]
 
     def __str__(self):
@@ -72,6 +83,8 @@ class Notification(models.Model):
         indexes = [
             models.Index(fields=['user', 'is_read']),
             models.Index(fields=['sent_at']),
+            # Ostatnie powiadomienie alertu (send_periodic_notifications)
+            models.Index(fields=['alert', '-sent_at'], name='notification_alert_sent_idx'),
         ]
 
     def __str__(self):
@@ -82,8 +95,11 @@ class Notification(models.Model):
         return self
 
     def markAsRead(self):
+        from alarm_alert import unread
+        # UPDATE tylko gdy jeszcze nieprzeczytane - licznik zmniejszany dokładnie raz
+        if Notification.objects.filter(pk=self.pk, is_read=False).update(is_read=True):
+            unread.notification_read(self.user_id)
         self.is_read = True
-        self.save()
         return self
 
 
@@ -106,3 +122,126 @@ class NotificationPreferences(models.Model):
         self.quiet_hours_end = end_time
         self.save()
         return self
+
+
+class AlertCounter(models.Model):
+    """
+    Zmaterializowane liczniki alertów dla AlertViewSet.statistics (alarm_alert.counters).
+    Wiersz z user=NULL to zakres globalny (wszystkie alerty), wiersz z user to alerty użytkownika.
+    Aktualizowane przyrostowo z sygnałów Alert, uzgadniane komendą reconcile_alert_counters.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='alert_counters')
+    severity = models.CharField(max_length=20, choices=Alert.SEVERITY_CHOICES)
+    status = models.CharField(max_length=20, choices=Alert.STATUS_CHOICES)
+    is_muted = models.BooleanField(default=False)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['severity', 'status', 'is_muted'],
+                condition=models.Q(user__isnull=True),
+                name='alert_counter_global_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'severity', 'status', 'is_muted'],
+                condition=models.Q(user__isnull=False),
+                name='alert_counter_user_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        scope = self.user_id or 'global'
+        return f"{scope} [{self.severity}/{self.status}{'/muted' if self.is_muted else ''}]: {self.count}"
+
+
+class ArchivedAlert(models.Model):
+    """
+    Archiwum zamkniętych/wyciszonych alertów usuniętych z tabeli Alert przez politykę retencji
+    (alarm_alert.retention). Zachowuje id i treść alertu, bez powiązań z powiadomieniami.
+    """
+    alert_id = models.UUIDField(primary_key=True, editable=False)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_alerts')
+    title = models.CharField(max_length=255)
+    description = models.TextField()
+    severity = models.CharField(max_length=20, choices=Alert.SEVERITY_CHOICES)
+    status = models.CharField(max_length=20, choices=Alert.STATUS_CHOICES)
+    category = models.CharField(max_length=100)
+    source = models.CharField(max_length=100)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"[archived {self.severity}] {self.title}"
+
+
+class NotificationDailyAggregate(models.Model):
+    """
+    Przeczytane powiadomienia starsze niż okres retencji, zwinięte do liczby
+    na (dzień, użytkownik, alert). Alert może być już zarchiwizowany, więc alert_id to zwykły UUID.
+    """
+    day = models.DateField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notification_aggregates')
+    alert_id = models.UUIDField(null=True, blank=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['-day']
+        indexes = [
+            models.Index(fields=['user', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.user_id}: {self.count}"
+
+
+class ReadingEvaluationTask(models.Model):
+    """
+    Kolejka odczytów czekających na ocenę progów i alertów (tryb ALERT_EVALUATION_ASYNC).
+    Przechowuje kopię pól potrzebnych do oceny - odczyty z bulk_create(ignore_conflicts)
+    nie mają id, a tabela odczytów jest partycjonowana.
+    Przetwarza ją worker: python manage.py process_alert_queue
+    """
+    device = models.ForeignKey('data_acquisition.Device', on_delete=models.CASCADE, db_index=False)
+    metric_ref = models.ForeignKey('data_acquisition.Metric', on_delete=models.CASCADE, db_index=False)
+    timestamp = models.DateTimeField()
+    value = models.FloatField()
+    signal_dbm = models.IntegerField(default=0)
+    status = models.BooleanField(default=True)
+    enqueued_at = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"Task {self.pk}: device {self.device_id} @ {self.timestamp}"
+
+
+class AnomalyBaseline(models.Model):
+    """
+    Statystyki strumieniowego detektora anomalii (alarm_alert.anomaly) dla pary
+    (urządzenie, metryka) - aktualizowane pod blokadą wiersza w transakcji oceny partii,
+    więc wspólne dla wszystkich procesów oceniających odczyty.
+    """
+    device = models.ForeignKey('data_acquisition.Device', on_delete=models.CASCADE, db_index=False)
+    metric_ref = models.ForeignKey('data_acquisition.Metric', on_delete=models.CASCADE, db_index=False)
+    count = models.PositiveIntegerField(default=0)
+    mean = models.FloatField(default=0.0)
+    variance = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['device', 'metric_ref'], name='anomaly_baseline_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Baseline {self.device_id}/{self.metric_ref_id}: n={self.count} mean={self.mean:.3f}"
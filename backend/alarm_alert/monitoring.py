@@ -7,12 +7,16 @@ Monitorowane moduły:
 - analysis_reporting: wykrywanie anomalii, gotowość raportów
 """
 
+from django.db import transaction
 from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
-from datetime import timedelta
 from data_acquisition.models import Device, DeviceReading
+from data_acquisition.signals import readings_bulk_created
 from .models import Alert
+from . import anomaly, batch_evaluator, correlation, dedup, evaluation_queue
+from .notification_scheduler import notify_new_alert
+from .signals import send_notifications_for_alerts
 import logging
 import json
 
@@ -57,54 +61,43 @@ def monitor_device_reading(sender, instance, created, **kwargs):
     if not created:
         return  
     
-    reading = instance
+    # Tryb asynchroniczny: tylko kolejka, ocenę wykona worker process_alert_queue
+    if evaluation_queue.is_async():
+        evaluation_queue.enqueue_readings([instance])
+        return
     
-    # 1. Sprawdź status urządzenia
-    if not reading.status:
-        create_alert_if_not_exists(
-            title=f"Device Offline: {reading.device.name}",
-            description=f"Device {reading.device.name} (ID: {reading.device.device_id}) reported offline status",
-            severity='CRITICAL',
-            category='device',
-            source=f'device_{reading.device.device_id}'
-        )
-        logger.warning(f"Device {reading.device.device_id} is offline")
-    
-    # 2. Sprawdź siłę sygnału
-    if reading.signal_dbm < MIN_SIGNAL_STRENGTH:
-        create_alert_if_not_exists(
-            title=f"Weak Signal: {reading.device.name}",
-            description=f"Device {reading.device.name} has weak signal: {reading.signal_dbm} dBm (threshold: {MIN_SIGNAL_STRENGTH} dBm)",
-            severity='WARNING',
-            category='communication',
-            source=f'device_{reading.device.device_id}'
-        )
-        logger.warning(f"Weak signal from device {reading.device.device_id}: {reading.signal_dbm} dBm")
+    evaluate_readings([instance])
+
+
+@receiver(readings_bulk_created, sender=DeviceReading)
+def monitor_device_readings_batch(sender, readings, **kwargs):
+    """
+    Ocena alertów dla całej partii odczytów zapisanych przez bulk_create.
+    """
+    if evaluation_queue.is_async():
+        evaluation_queue.enqueue_readings(readings)
+        return
+    evaluate_readings(readings)
+
+
+def evaluate_readings(readings, devices=None):
+    """
+    Sprawdza partię odczytów (status, sygnał, progi THRESHOLDS) wektorowo - batch_evaluator,
+    oraz odchylenia od bieżących statystyk pary (urządzenie, metryka) - anomaly.
+    Kandydaci są deduplikowani po (category, source) w obrębie partii,
+    a alerty tworzone jednym bulk_create (create_alerts_bulk).
     
-    # 3. Sprawdź wartości metryk
-    metric_lower = reading.metric.lower()
-    if metric_lower in THRESHOLDS:
-        threshold = THRESHOLDS[metric_lower]
-        
-        if reading.value < threshold['min']:
-            create_alert_if_not_exists(
-                title=f"Low {reading.metric}: {reading.device.name}",
-                description=f"{reading.metric} is below threshold: {reading.value} {threshold['unit']} < {threshold['min']} {threshold['unit']}",
-                severity='WARNING',
-                category='sensor',
-                source=f'device_{reading.device.device_id}'
-            )
-            logger.warning(f"Low {reading.metric} from device {reading.device.device_id}: {reading.value}")
-        
-        elif reading.value > threshold['max']:
-            create_alert_if_not_exists(
-                title=f"High {reading.metric}: {reading.device.name}",
-                description=f"{reading.metric} is above threshold: {reading.value} {threshold['unit']} > {threshold['max']} {threshold['unit']}",
-                severity='CRITICAL' if metric_lower in ['temperature', 'co2'] else 'WARNING',
-                category='sensor',
-                source=f'device_{reading.device.device_id}'
-            )
-            logger.warning(f"High {reading.metric} from device {reading.device.device_id}: {reading.value}")
+    Returns:
+        Liczba utworzonych alertów
+    """
+    if devices is None:
+        # Urządzenia już załadowane w odczytach (import, kolejka) - bez dodatkowego zapytania
+        device_field = DeviceReading._meta.get_field('device')
+        devices = {r.device_id: r.device for r in readings if device_field.is_cached(r)}
+    block = batch_evaluator.ReadingBlock.from_readings(readings)
+    candidates = batch_evaluator.evaluate_block(block, THRESHOLDS, MIN_SIGNAL_STRENGTH, devices)
+    candidates += anomaly.evaluate_block(block, devices)
+    return len(create_alerts_bulk(candidates))
 
 
 @receiver(pre_save, sender=Device)
@@ -117,30 +110,27 @@ def monitor_device_status_change(sender, instance, **kwargs):
     - priority 1 (średni) → WARNING
     - priority 2 (wysoki) → CRITICAL
     """
-    if instance.pk:  # Tylko dla istniejących urządzeń
-        try:
-            old_device = Device.objects.get(pk=instance.pk)
-            
-            # Sprawdź czy status się zmienił z aktywnego na nieaktywny
-            if old_device.is_active and not instance.is_active:
-                # Określ severity na podstawie priorytetu urządzenia
-                severity_map = {
-                    0: 'INFO',      # Niski priorytet
-                    1: 'WARNING',   # Średni priorytet
-                    2: 'CRITICAL'   # Wysoki priorytet
-                }
-                severity = severity_map.get(instance.priority, 'WARNING')
-                
-                create_alert_if_not_exists(
-                    title=f"Device Deactivated: {instance.name}",
-                    description=f"Device {instance.name} (ID: {instance.device_id}) has been deactivated (priority: {instance.priority})",
-                    severity=severity,
-                    category='device',
-                    source=f'device_{instance.device_id}'
-                )
-                logger.info(f"Device {instance.device_id} deactivated (priority: {instance.priority}, severity: {severity})")
-        except Device.DoesNotExist:
-            pass
+    # Stan sprzed zapisu z migawki przy wczytaniu (TrackedFieldsMixin) - bez SELECT
+    previous = instance.previous_values()  # None dla nowych urządzeń
+    
+    # Sprawdź czy status się zmienił z aktywnego na nieaktywny
+    if previous is not None and previous['is_active'] and not instance.is_active:
+        # Określ severity na podstawie priorytetu urządzenia
+        severity_map = {
+            0: 'INFO',      # Niski priorytet
+            1: 'WARNING',   # Średni priorytet
+            2: 'CRITICAL'   # Wysoki priorytet
+        }
+        severity = severity_map.get(instance.priority, 'WARNING')
+        
+        create_alert_if_not_exists(
+            title=f"Device Deactivated: {instance.name}",
+            description=f"Device {instance.name} (ID: {instance.device_id}) has been deactivated (priority: {instance.priority})",
+            severity=severity,
+            category='device',
+            source=f'device_{instance.device_id}'
+        )
+        logger.info(f"Device {instance.device_id} deactivated (priority: {instance.priority}, severity: {severity})")
 
 
 # ==================== MONITOROWANIE ANALYSIS & REPORTING ====================
@@ -272,17 +262,8 @@ def create_alert_if_not_exists(title, description, severity, category, source, u
     Tworzy alert tylko jeśli podobny alert nie istnieje już dla tego źródła.
     Zapobiega duplikatom alertów.
     """
-    # Sprawdź czy istnieje już aktywny alert dla tego źródła i kategorii
-    recent_time = timezone.now() - timedelta(hours=1)
-    
-    existing_alert = Alert.objects.filter(
-        category=category,
-        source=source,
-        status__in=['NEW', 'CONFIRMED'],
-        created_at__gte=recent_time
-    ).first()
-    
-    if existing_alert:
+    # Sprawdź czy istnieje już aktywny alert dla tego źródła i kategorii (cache, potem baza)
+    if dedup.active_keys([(category, source)]):
         logger.debug(f"Alert already exists for {source}, skipping creation")
         return None
     
@@ -295,6 +276,65 @@ def create_alert_if_not_exists(title, description, severity, category, source, u
         source=source,
         user=user  # Może być None dla alertów systemowych
     )
+    dedup.remember(category, source, alert.created_at)
     
     logger.info(f"Created alert: {title} (severity: {severity}, user: {user.username if user else 'system'})")
     return alert
+
+
+def create_alerts_bulk(candidates):
+    """
+    Wersja create_alert_if_not_exists dla wielu kandydatów naraz:
+    jedno zapytanie o istniejące alerty, jeden bulk_create dla nowych.
+    bulk_create nie wysyła post_save, więc sygnał jest wysyłany ręcznie
+    dla każdego utworzonego alertu.
+    
+    Burze alertów są grupowane w incydenty (alarm_alert.correlation) - powiadomienia
+    wysyłane są jednym przebiegiem dla alertów bez rodzica, najwyżej ALERT_NOTIFICATION_CAP;
+    pozostałe wyśle send_periodic_notifications w kolejnych przebiegach.
+    
+    Returns:
+        Lista utworzonych alertów (razem z nowymi incydentami)
+    """
+    if not candidates:
+        return []
+    
+    existing = dedup.active_keys((c['category'], c['source']) for c in candidates)
+    
+    alerts = []
+    for candidate in candidates:
+        key = (candidate['category'], candidate['source'])
+        if key in existing:
+            continue
+        existing.add(key)
+        alerts.append(Alert(**candidate))
+    
+    if not alerts:
+        return []
+    
+    now = timezone.now()
+    with transaction.atomic():
+        incidents = correlation.correlate(alerts, now)
+        # Rodzice przed dziećmi (klucz obcy parent)
+        incidents = Alert.objects.bulk_create(incidents)
+        correlation.adopt_recent(incidents, now)
+        alerts = incidents + Alert.objects.bulk_create(alerts)
+    
+    for alert in alerts:
+        dedup.remember(alert.category, alert.source, alert.created_at)
+        logger.info(f"Created alert: {alert.title} (severity: {alert.severity}, user: {alert.user.username if alert.user else 'system'})")
+        alert._notifications_batched = True
+        post_save.send(sender=Alert, instance=alert, created=True, update_fields=None, raw=False, using=alert._state.db)
+    
+    notifiable = correlation.by_priority(a for a in alerts if a.parent_id is None)
+    if notifiable:
+        cap = correlation.notification_cap()
+        send_notifications_for_alerts(notifiable[:cap], reason="new_alert")
+        # Demon planuje kolejne powiadomienia; alerty ponad limit wyśle dopiero w następnym
+        # przebiegu (za DEFERRED_RETRY), a nie od razu po ogłoszeniu
+        for alert in notifiable[:cap]:
+            notify_new_alert(alert)
+        for alert in notifiable[cap:]:
+            notify_new_alert(alert, deferred=True)
+    
+    return alerts
@@ -0,0 +1,177 @@
+"""
+Harmonogram powtarzanych powiadomień dla alertów NEW (send_periodic_notifications).
+
+- with_notification_schedule / due_alerts: termin kolejnego powiadomienia liczony w SQL
+  (ostatnie sent_at + interwał severity z NOTIFICATION_INTERVALS)
+- NotificationScheduler: kopiec (heapq) terminów dla trybu --daemon - proces śpi
+  dokładnie do najbliższego terminu zamiast odpytywać bazę co 60 s
+- NOTIFY_CHANNEL: nowe alerty NEW są ogłaszane przez PostgreSQL NOTIFY (signals.py),
+  demon nasłuchuje LISTEN (alarm_alert.pg_notify) i od razu dopisuje je do kopca;
+  alerty odłożone przez ALERT_NOTIFICATION_CAP przychodzą jako "<id>:deferred" i czekają DEFERRED_RETRY
+- alerty należące do incydentu (parent, alarm_alert.correlation) nie są powiadamiane;
+  jeden przebieg wysyła najwyżej ALERT_NOTIFICATION_CAP alertów, od najważniejszych
+"""
+
+import heapq
+from datetime import timedelta
+
+from django.db.models import (
+    Case, DateTimeField, DurationField, ExpressionWrapper, F, IntegerField, OuterRef, Q, Subquery, Value, When,
+)
+from django.utils import timezone
+
+from alarm_alert import correlation, pg_notify
+from alarm_alert.models import Alert, Notification
+
+NOTIFY_CHANNEL = 'alarm_alert_new'
+
+# Częstotliwość wysyłania powiadomień (w minutach)
+# - CRITICAL: Wysyła powiadomienie co 15 minut
+# - WARNING: Wysyła powiadomienie co 60 minut
+# - INFO: Wysyła powiadomienie co 24h
+NOTIFICATION_INTERVALS = {
+    'CRITICAL': 15,     # Co 15 minut
+    'WARNING': 60,      # Co godzinę
+    'INFO': 1440,       # Co 24h
+}
+DEFAULT_INTERVAL = 60
+# Alerty ponad limit przebiegu czekają na kolejny przebieg
+DEFERRED_RETRY = timedelta(minutes=1)
+# Alert bez żadnego wysłanego powiadomienia (brak aktywnych odbiorców) - ponowna próba
+# co minutę, jak przy uruchamianiu komendy z crona
+IDLE_RETRY = timedelta(minutes=1)
+# Payload NOTIFY dla alertu odłożonego przez limit przebiegu: "<id>:deferred"
+DEFERRED_SUFFIX = ':deferred'
+
+
+def with_notification_schedule(alerts):
+    """
+    Adnotuje alerty polami:
+    - last_sent_at: czas ostatniego powiadomienia (NULL gdy nie było żadnego)
+    - next_due_at: last_sent_at + interwał severity
+    """
+    last_sent = Notification.objects.filter(alert=OuterRef('pk')).order_by('-sent_at').values('sent_at')[:1]
+    interval = Case(
+        *[When(severity=severity, then=Value(timedelta(minutes=minutes)))
+          for severity, minutes in NOTIFICATION_INTERVALS.items()],
+        default=Value(timedelta(minutes=DEFAULT_INTERVAL)),
+        output_field=DurationField(),
+    )
+    return alerts.annotate(
+        last_sent_at=Subquery(last_sent),
+        next_due_at=ExpressionWrapper(F('last_sent_at') + interval, output_field=DateTimeField()),
+    )
+
+
+def schedulable(alerts):
+    """Alerty NEW poza incydentami - tylko one mają własne powiadomienia."""
+    return alerts.filter(status='NEW', parent__isnull=True)
+
+
+def due_alerts(now=None):
+    """
+    Alerty NEW, dla których należy teraz wysłać powiadomienie (jedno zapytanie),
+    od najważniejszych - przy limicie ALERT_NOTIFICATION_CAP najpierw idą CRITICAL.
+    """
+    now = now or timezone.now()
+    priority = Case(
+        *[When(severity=severity, then=Value(rank)) for severity, rank in correlation.SEVERITY_RANK.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    return (
+        with_notification_schedule(schedulable(Alert.objects.all()))
+        .filter(Q(last_sent_at__isnull=True) | Q(next_due_at__lte=now))
+        .order_by(priority.desc(), 'created_at')
+    )
+
+
+def notify_new_alert(alert, deferred=False):
+    """
+    Ogłasza alert NEW demonowi (po zatwierdzeniu transakcji, tylko PostgreSQL).
+    deferred=True - alert pominięty przez ALERT_NOTIFICATION_CAP: demon planuje go
+    za DEFERRED_RETRY zamiast wysyłać od razu (inaczej burza dostałaby dwa limity).
+    """
+    pg_notify.notify(NOTIFY_CHANNEL, f"{alert.pk}{DEFERRED_SUFFIX if deferred else ''}")
+
+
+def parse_notifications(payloads):
+    """
+    Rozdziela payloady NOTIFY_CHANNEL na alerty do zaplanowania od razu i odłożone.
+
+    Returns:
+        (lista id nowych alertów, lista id odłożonych alertów)
+    """
+    to_pk = Alert._meta.pk.to_python
+    new_ids, deferred_ids = [], []
+    for payload in payloads:
+        if payload.endswith(DEFERRED_SUFFIX):
+            deferred_ids.append(to_pk(payload[:-len(DEFERRED_SUFFIX)]))
+        else:
+            new_ids.append(to_pk(payload))
+    return new_ids, deferred_ids
+
+
+class NotificationScheduler:
+    """
+    Kopiec terminów (next_due_at, alert_id). Przestarzałe wpisy (alert przeplanowany
+    albo usunięty z harmonogramu) są pomijane leniwie przy zdejmowaniu.
+    """
+
+    def __init__(self, idle_interval=IDLE_RETRY):
+        # Termin dla alertu, któremu nie udało się wysłać żadnego powiadomienia
+        # (brak aktywnych odbiorców) - żeby nie sprawdzać go w kółko
+        self.idle_interval = idle_interval
+        self.heap = []
+        self.scheduled = {}
+
+    def __len__(self):
+        return len(self.scheduled)
+
+    def clear(self):
+        self.heap = []
+        self.scheduled = {}
+
+    def push(self, alert_id, due_at):
+        self.scheduled[alert_id] = due_at
+        heapq.heappush(self.heap, (due_at, alert_id))
+
+    def load(self, alerts, now=None):
+        """Planuje podane alerty NEW według harmonogramu z bazy (jedno zapytanie)."""
+        now = now or timezone.now()
+        schedule = with_notification_schedule(schedulable(alerts)).order_by()
+        for alert_id, last_sent_at, next_due_at in schedule.values_list('pk', 'last_sent_at', 'next_due_at'):
+            self.push(alert_id, next_due_at if last_sent_at else now)
+
+    def reschedule(self, alert_ids, now=None):
+        """Przelicza terminy po wysyłce; alerty, które przestały być NEW, wypadają z kopca."""
+        now = now or timezone.now()
+        for alert_id in alert_ids:
+            self.scheduled.pop(alert_id, None)
+        schedule = with_notification_schedule(schedulable(Alert.objects.filter(pk__in=alert_ids))).order_by()
+        for alert_id, next_due_at in schedule.values_list('pk', 'next_due_at'):
+            if next_due_at is None or next_due_at <= now:
+                next_due_at = now + self.idle_interval
+            self.push(alert_id, next_due_at)
+
+    def defer(self, alert_ids, now=None):
+        """Alerty pominięte przez limit przebiegu - ponowna próba za DEFERRED_RETRY."""
+        due_at = (now or timezone.now()) + DEFERRED_RETRY
+        for alert_id in alert_ids:
+            self.push(alert_id, due_at)
+
+    def pop_due(self, now):
+        """Zdejmuje z kopca alerty z terminem <= now."""
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            due_at, alert_id = heapq.heappop(self.heap)
+            if self.scheduled.get(alert_id) == due_at:
+                del self.scheduled[alert_id]
+                due.append(alert_id)
+        return due
+
+    def next_due(self):
+        """Najbliższy aktualny termin albo None."""
+        while self.heap and self.scheduled.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+        return self.heap[0][0] if self.heap else None
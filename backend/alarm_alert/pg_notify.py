@@ -0,0 +1,51 @@
+"""
+Kanały PostgreSQL LISTEN/NOTIFY między procesami (api, alert_worker, periodic_notifier).
+
+- notify: wysyła NOTIFY po zatwierdzeniu bieżącej transakcji
+- listen / wait: odbiór na połączeniu Django bieżącego wątku (tryb autocommit)
+
+Na innych bazach niż PostgreSQL is_available() zwraca False, a notify nic nie robi.
+"""
+
+import select
+
+from django.db import connection, transaction
+
+
+def is_available():
+    return connection.vendor == 'postgresql'
+
+
+def notify(channel, payload):
+    """NOTIFY channel, payload - po zatwierdzeniu transakcji (od razu poza transakcją)."""
+    if not is_available():
+        return
+
+    def send():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [channel, payload])
+
+    transaction.on_commit(send)
+
+
+def listen(channel):
+    """LISTEN na kanale dla połączenia bieżącego wątku."""
+    connection.ensure_connection()
+    with connection.cursor() as cursor:
+        cursor.execute(f'LISTEN "{channel}"')
+
+
+def wait(timeout):
+    """
+    Czeka do timeout sekund na NOTIFY na kanałach z listen().
+
+    Returns:
+        Lista payloadów otrzymanych powiadomień (pusta po upływie czasu)
+    """
+    raw = connection.connection
+    if not raw.notifies:
+        select.select([raw], [], [], max(timeout, 0))
+        raw.poll()
+    payloads = [notify.payload for notify in raw.notifies]
+    raw.notifies.clear()
+    return payloads
@@ -0,0 +1,201 @@
+"""
+Powiadomienia push (Server-Sent Events) - zamiast odpytywania unread_count / listy alertów.
+
+Przepływ:
+- signals.py publikuje nowe powiadomienia (publish_notifications) i zmiany alertów (publish_alert)
+- na PostgreSQL zdarzenia idą przez NOTIFY na PUSH_CHANNEL (tylko id), bo powiadomienia
+  powstają też w innych procesach (alert_worker, periodic_notifier); w procesie ASGI
+  wątek nasłuchujący doczytuje wiersze i przekazuje je do brokera
+- na innych bazach zdarzenia trafiają do brokera bezpośrednio - tylko te, które powstały
+  w procesie strumienia (IO.asgi_stream), bo API działa w osobnym procesie WSGI
+- broker to pub/sub w pamięci: kolejka asyncio na każde otwarte połączenie SSE
+  (views.notification_stream)
+
+Zdarzenia:
+- notification: nowe powiadomienie użytkownika (NotificationSerializer)
+- alert: nowy alert lub zmiana statusu (AlertSerializer) - dla adminów oraz
+  użytkowników, którzy widzą alert (własny lub bez właściciela)
+- resync: klient nie nadążał, kolejka się przepełniła - trzeba pobrać stan przez REST
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+
+from django.db import DatabaseError, connection, transaction
+
+from alarm_alert import pg_notify
+from alarm_alert.models import Alert, Notification
+from alarm_alert.serializers import AlertSerializer, NotificationSerializer
+
+logger = logging.getLogger(__name__)
+
+PUSH_CHANNEL = 'alarm_alert_push'
+# Limit payloadu NOTIFY to 8000 B - id powiadomień wysyłane są porcjami
+NOTIFY_IDS_PER_PAYLOAD = 150
+QUEUE_SIZE = 100
+
+
+class Subscription:
+    """Jedno połączenie SSE: kolejka zdarzeń w pętli asyncio połączenia."""
+
+    def __init__(self, user_id, is_admin):
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def can_see(self, alert_data):
+        return self.is_admin or alert_data.get('user') in (None, self.user_id)
+
+    def put(self, event, data):
+        # Wywoływane z dowolnego wątku (sygnały, wątek LISTEN)
+        self.loop.call_soon_threadsafe(self._put, event, data)
+
+    def _put(self, event, data):
+        try:
+            self.queue.put_nowait((event, data))
+        except asyncio.QueueFull:
+            # Wolny klient - porzuć zaległe zdarzenia i każ mu pobrać stan od nowa
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(('resync', {}))
+
+
+class Broker:
+    """Pub/sub w pamięci procesu: user_id -> otwarte subskrypcje."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+        self._listener = None
+
+    def subscribe(self, user_id, is_admin):
+        subscription = Subscription(user_id, is_admin)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        if pg_notify.is_available():
+            self._ensure_listener()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.user_id, None)
+
+    def user_ids(self):
+        with self._lock:
+            return set(self._subscriptions)
+
+    def _all(self):
+        with self._lock:
+            return [s for subscriptions in self._subscriptions.values() for s in subscriptions]
+
+    def deliver_notifications(self, notifications):
+        """notifications: słowniki z NotificationSerializer."""
+        with self._lock:
+            targets = [
+                (subscription, data)
+                for data in notifications
+                for subscription in self._subscriptions.get(data['user'], ())
+            ]
+        for subscription, data in targets:
+            subscription.put('notification', data)
+
+    def deliver_alerts(self, alerts):
+        """alerts: słowniki z AlertSerializer."""
+        subscriptions = self._all()
+        for data in alerts:
+            for subscription in subscriptions:
+                if subscription.can_see(data):
+                    subscription.put('alert', data)
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=_listen_forever, args=(self,), name='alarm-alert-push', daemon=True)
+                self._listener.start()
+
+
+broker = Broker()
+
+
+def _serialize_notifications(notification_ids, user_ids):
+    notifications = (
+        Notification.objects.filter(pk__in=notification_ids, user_id__in=user_ids)
+        .select_related('user', 'alert')
+        .order_by('sent_at')
+    )
+    return NotificationSerializer(notifications, many=True).data
+
+
+def _serialize_alerts(alert_ids):
+    alerts = Alert.objects.filter(pk__in=alert_ids).select_related('user')
+    return AlertSerializer(alerts, many=True).data
+
+
+def _dispatch(notification_ids, alert_ids):
+    """Doczytuje wiersze i przekazuje je do brokera (tylko gdy ktoś słucha)."""
+    user_ids = broker.user_ids()
+    if not user_ids:
+        return
+    if notification_ids:
+        broker.deliver_notifications(_serialize_notifications(notification_ids, user_ids))
+    if alert_ids:
+        broker.deliver_alerts(_serialize_alerts(alert_ids))
+
+
+def _listen_forever(broker):
+    """Wątek procesu ASGI: LISTEN na PUSH_CHANNEL i przekazywanie zdarzeń do brokera."""
+    listening = False
+    while True:
+        try:
+            if not listening:
+                pg_notify.listen(PUSH_CHANNEL)
+                listening = True
+
+            notification_ids, alert_ids = [], []
+            for payload in pg_notify.wait(30):
+                message = json.loads(payload)
+                if message['type'] == 'notification':
+                    notification_ids.extend(message['ids'])
+                elif message['type'] == 'alert':
+                    alert_ids.extend(message['ids'])
+            if notification_ids or alert_ids:
+                _dispatch(notification_ids, alert_ids)
+        except DatabaseError as e:
+            logger.warning("Push listener: błąd bazy danych: %s", e)
+            connection.close()
+            listening = False
+            time.sleep(1)
+        except Exception:
+            logger.exception("Push listener: nieobsłużony błąd")
+            time.sleep(1)
+
+
+def _publish(kind, ids):
+    ids = [str(pk) for pk in ids]
+    if not ids:
+        return
+    if pg_notify.is_available():
+        for start in range(0, len(ids), NOTIFY_IDS_PER_PAYLOAD):
+            chunk = ids[start:start + NOTIFY_IDS_PER_PAYLOAD]
+            pg_notify.notify(PUSH_CHANNEL, json.dumps({'type': kind, 'ids': chunk}))
+    elif kind == 'notification':
+        transaction.on_commit(lambda: _dispatch(ids, []))
+    else:
+        transaction.on_commit(lambda: _dispatch([], ids))
+
+
+def publish_notifications(notifications):
+    """Nowe powiadomienia (np. po bulk_create) do otwartych połączeń SSE."""
+    _publish('notification', [n.pk for n in notifications])
+
+
+def publish_alert(alert):
+    """Nowy alert lub zmiana statusu do otwartych połączeń SSE."""
+    _publish('alert', [alert.pk])
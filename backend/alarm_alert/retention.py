@@ -0,0 +1,176 @@
+"""
+Retencja alertów i powiadomień - utrzymuje małe tabele Alert i Notification (i ich indeksy).
+
+Polityki (nadpisywane w settings):
+- ALERT_RETENTION_POLICIES: {status: {severity: dni}} - alerty CLOSED/MUTED starsze niż
+  podana liczba dni (od created_at) są przenoszone do ArchivedAlert; statusy NEW/CONFIRMED
+  nigdy nie są archiwizowane
+- NOTIFICATION_RETENTION_DAYS: przeczytane powiadomienia starsze niż tyle dni są zwijane
+  do NotificationDailyAggregate (liczba na dzień/użytkownika/alert) i usuwane
+
+Wszystko działa partiami po batch_size wierszy, każda partia w osobnej transakcji,
+więc blokady są krótkie, a przerwane zadanie można po prostu uruchomić ponownie.
+Jednocześnie powinna działać jedna instancja (komenda apply_alert_retention).
+"""
+
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from alarm_alert import counters
+from alarm_alert.models import Alert, ArchivedAlert, Notification, NotificationDailyAggregate
+
+DEFAULT_ALERT_POLICIES = {
+    'CLOSED': {'CRITICAL': 180, 'WARNING': 90, 'INFO': 30},
+    'MUTED': {'CRITICAL': 90, 'WARNING': 30, 'INFO': 14},
+}
+DEFAULT_NOTIFICATION_DAYS = 30
+DEFAULT_BATCH_SIZE = 1000
+
+ARCHIVED_FIELDS = ['alert_id', 'user_id', 'title', 'description', 'severity', 'status', 'category', 'source', 'created_at']
+# Alerty aktywne nie podlegają retencji niezależnie od ustawień
+PROTECTED_STATUSES = ('NEW', 'CONFIRMED')
+
+
+def alert_policies():
+    policies = getattr(settings, 'ALERT_RETENTION_POLICIES', DEFAULT_ALERT_POLICIES)
+    return {
+        status: severities
+        for status, severities in policies.items()
+        if status not in PROTECTED_STATUSES
+    }
+
+
+def notification_days():
+    return getattr(settings, 'NOTIFICATION_RETENTION_DAYS', DEFAULT_NOTIFICATION_DAYS)
+
+
+def expired_alerts(status, severity, days, now=None):
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    return Alert.objects.filter(status=status, severity=severity, created_at__lt=cutoff).order_by()
+
+
+def expired_notifications(days, now=None):
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    return Notification.objects.filter(is_read=True, sent_at__lt=cutoff).order_by()
+
+
+def archive_alert_batch(alerts, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Przenosi jedną partię alertów do ArchivedAlert.
+    Powiadomienia i alerty podrzędne tracą powiązanie (alert/parent=NULL, jak przy usunięciu alertu),
+    liczniki statystyk są zmniejszane zbiorczo.
+
+    Returns:
+        Liczba zarchiwizowanych alertów
+    """
+    with transaction.atomic():
+        rows = list(alerts.select_for_update(skip_locked=True).values(*ARCHIVED_FIELDS, 'is_muted')[:batch_size])
+        if not rows:
+            return 0
+        ids = [row['alert_id'] for row in rows]
+
+        ArchivedAlert.objects.bulk_create(
+            [ArchivedAlert(**{field: row[field] for field in ARCHIVED_FIELDS}) for row in rows],
+            ignore_conflicts=True,
+        )
+        Notification.objects.filter(alert_id__in=ids).update(alert=None)
+        # Alerty zarchiwizowanego incydentu zostają bez rodzica (jak on_delete=SET_NULL)
+        Alert.objects.filter(parent_id__in=ids).update(parent=None)
+        counters.apply(
+            ((row['user_id'], row['severity'], row['status'], row['is_muted']), -1)
+            for row in rows
+        )
+        # Bezpośredni DELETE - bez pobierania obiektów i sygnałów post_delete dla każdego alertu
+        # (liczniki zmienione wyżej jednym przebiegiem, alerty CLOSED/MUTED nie są w cache deduplikacji)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM "{Alert._meta.db_table}" WHERE "{Alert._meta.pk.column}" IN ({", ".join(["%s"] * len(ids))})',
+                ids,
+            )
+    return len(rows)
+
+
+def compact_notification_batch(notifications, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Zwija jedną partię powiadomień do NotificationDailyAggregate i usuwa je.
+
+    Returns:
+        Liczba usuniętych powiadomień
+    """
+    with transaction.atomic():
+        ids = list(notifications.select_for_update(skip_locked=True).values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return 0
+
+        grouped = (
+            Notification.objects.filter(pk__in=ids)
+            .annotate(day=TruncDate('sent_at'))
+            .values_list('day', 'user_id', 'alert_id')
+            .annotate(count=Count('pk'))
+            .order_by()
+        )
+        totals = Counter({(day, user_id, alert_id): count for day, user_id, alert_id, count in grouped})
+
+        existing = NotificationDailyAggregate.objects.select_for_update().filter(
+            day__in={day for day, _, _ in totals},
+            user_id__in={user_id for _, user_id, _ in totals},
+        )
+        to_update = []
+        for aggregate in existing:
+            key = (aggregate.day, aggregate.user_id, aggregate.alert_id)
+            if key in totals:
+                aggregate.count += totals.pop(key)
+                to_update.append(aggregate)
+
+        NotificationDailyAggregate.objects.bulk_update(to_update, ['count'])
+        NotificationDailyAggregate.objects.bulk_create([
+            NotificationDailyAggregate(day=day, user_id=user_id, alert_id=alert_id, count=count)
+            for (day, user_id, alert_id), count in totals.items()
+        ])
+        Notification.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def _drain(process, queryset, batch_size):
+    total = 0
+    while True:
+        done = process(queryset, batch_size)
+        if not done:
+            return total
+        total += done
+
+
+def apply_policies(batch_size=DEFAULT_BATCH_SIZE, now=None):
+    """
+    Wykonuje wszystkie polityki retencji do końca.
+    Powiadomienia są zwijane przed archiwizacją alertów, żeby agregaty zachowały alert_id.
+
+    Returns:
+        Słownik {nazwa polityki: liczba przeniesionych wierszy}
+    """
+    now = now or timezone.now()
+    results = {
+        'notifications': _drain(compact_notification_batch, expired_notifications(notification_days(), now), batch_size),
+    }
+    for status, severities in alert_policies().items():
+        for severity, days in severities.items():
+            results[f'alerts {status}/{severity}'] = _drain(
+                archive_alert_batch, expired_alerts(status, severity, days, now), batch_size,
+            )
+    return results
+
+
+def preview(now=None):
+    """Liczba wierszy, których dotyczyłyby polityki (bez zmian w bazie)."""
+    now = now or timezone.now()
+    results = {'notifications': expired_notifications(notification_days(), now).count()}
+    for status, severities in alert_policies().items():
+        for severity, days in severities.items():
+            results[f'alerts {status}/{severity}'] = expired_alerts(status, severity, days, now).count()
+    return results
@@ -12,9 +12,10 @@ class AlertSerializer(serializers.ModelSerializer):
         fields = [
             'alert_id', 'user', 'user_email', 'user_username',
             'title', 'description', 'severity', 'status',
-            'category', 'source', 'created_at', 'is_muted'
+            'category', 'source', 'created_at', 'is_muted',
+            'parent', 'correlation_key'
         ]
-        read_only_fields = ['alert_id', 'created_at']
+        read_only_fields = ['alert_id', 'created_at', 'parent', 'correlation_key']
 
     def create(self, validated_data):
         alert = Alert.objects.create(**validated_data)
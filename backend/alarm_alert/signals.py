@@ -3,11 +3,13 @@ Django Signals dla modułu alarm_alert.
 Automatyczne tworzenie powiadomień w odpowiedzi na zmiany w alertach.
 """
 
-from django.db.models.signals import pre_save, post_save
+from django.db.models import Q
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
-from datetime import timedelta
-from alarm_alert.models import Alert, Notification, NotificationPreferences
+from alarm_alert.models import Alert, Notification
+from alarm_alert import correlation, counters, dedup, push, unread
+from alarm_alert.notification_scheduler import NOTIFICATION_INTERVALS, notify_new_alert
 from security.models import User
 import pytz
 import logging
@@ -15,32 +17,46 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-# Częstotliwość wysyłania powiadomień (w minutach)
-# Docker sprawdza co 60 sekund, ale:
-# - CRITICAL: Wysyła powiadomienie co 15 minut
-# - WARNING: Wysyła powiadomienie co 60 minut
-# - INFO: Wysyła powiadomienie co 24h
-NOTIFICATION_INTERVALS = {
-    'CRITICAL': 15,     # Co 15 minut
-    'WARNING': 60,      # Co godzinę
-    'INFO': 1440,       # Co 24h
-}
-
-
 @receiver(pre_save, sender=Alert)
 def detect_alert_status_change(sender, instance, **kwargs):
     """
     Zapisuje stary status alertu PRZED zapisem.
     Dzięki temu w post_save możemy porównać starą i nową wartość.
+    Stare wartości pochodzą z migawki przy wczytaniu obiektu (TrackedFieldsMixin).
     """
-    if instance.pk:  
-        try:
-            old_alert = Alert.objects.get(pk=instance.pk)
-            instance._old_status = old_alert.status
-        except Alert.DoesNotExist:
-            instance._old_status = None
+    previous = instance.previous_values()
+    if previous is not None:
+        instance._old_status = previous['status']
+        instance._old_counter_key = (previous['user_id'], previous['severity'], previous['status'], previous['is_muted'])
     else:
-        instance._old_status = None 
+        instance._old_status = None
+        instance._old_counter_key = None
+    
+    # Alert przestał być aktywny (MUTED/CLOSED) - usuń go z cache deduplikacji
+    if instance._old_status in dedup.ACTIVE_STATUSES and instance.status not in dedup.ACTIVE_STATUSES:
+        dedup.forget(instance.category, instance.source)
+
+
+@receiver(post_delete, sender=Alert)
+def forget_deleted_alert(sender, instance, **kwargs):
+    """Usunięty alert nie blokuje już nowych alertów z tego źródła."""
+    dedup.forget(instance.category, instance.source)
+
+
+@receiver(post_save, sender=Alert)
+def update_alert_counters(sender, instance, created, **kwargs):
+    """Przyrostowa aktualizacja liczników statystyk (alarm_alert.counters)."""
+    new_key = counters.counter_key(instance)
+    old_key = getattr(instance, '_old_counter_key', None)
+    if created:
+        counters.apply([(new_key, 1)])
+    elif old_key is not None and old_key != new_key:
+        counters.apply([(old_key, -1), (new_key, 1)])
+
+
+@receiver(post_delete, sender=Alert)
+def decrement_alert_counters(sender, instance, **kwargs):
+    counters.apply([(counters.counter_key(instance), -1)])
 
 
 @receiver(post_save, sender=Alert)
@@ -53,84 +69,134 @@ def handle_alert_notifications(sender, instance, created, **kwargs):
     2. Alert zmienił status NA NEW → wysyłaj powiadomienia
     3. Alert ma status CONFIRMED/CLOSED/MUTED → NIE wysyłaj
     4. Częstotliwość zależna od severity (zapobiega spamowi)
+    5. Alert należący do incydentu (parent) → NIE wysyłaj, powiadamia incydent
+    6. Alert z partii create_alerts_bulk → powiadomienia wysyła partia (z limitem)
     """
     
     # Tylko dla statusu NEW
     if instance.status != 'NEW':
         return
+    if instance.parent_id or getattr(instance, '_notifications_batched', False):
+        return
     
     # Sprawdź czy to nowy alert lub zmiana statusu na NEW
     if created:
         send_notifications_for_alert(instance, reason="new_alert")
     elif hasattr(instance, '_old_status') and instance._old_status != 'NEW':
         send_notifications_for_alert(instance, reason="status_changed_to_new")
+    else:
+        return
+    
+    # Demon send_periodic_notifications --daemon planuje kolejne powiadomienia od razu
+    notify_new_alert(instance)
 
 
-def send_notifications_for_alert(alert, reason="new_alert"):
+@receiver(post_save, sender=Alert)
+def cascade_incident_status(sender, instance, created, **kwargs):
+    """Potwierdzenie/wyciszenie/zamknięcie incydentu obejmuje jego alerty (alarm_alert.correlation)."""
+    if created or instance.category != correlation.INCIDENT_CATEGORY:
+        return
+    if getattr(instance, '_old_status', None) != instance.status and instance.status != 'NEW':
+        correlation.cascade_status(instance)
+
+
+@receiver(post_save, sender=Alert)
+def push_alert_changes(sender, instance, created, **kwargs):
+    """Nowy alert lub zmiana statusu trafia do otwartych połączeń SSE (alarm_alert.push)."""
+    if created or getattr(instance, '_old_status', None) != instance.status:
+        push.publish_alert(instance)
+
+
+def _current_local_time():
+    local_tz = pytz.timezone('Europe/Warsaw')
+    return timezone.now().astimezone(local_tz).time()
+
+
+def _eligible_recipients(user_filter):
     """
-    Wysyła powiadomienia o alercie do odpowiednich użytkowników.
+    Użytkownicy spełniający user_filter, którzy mogą teraz dostać powiadomienie:
+    preferencje aktywne (lub brak preferencji) i poza quiet hours.
+    Jedno zapytanie (LEFT JOIN z NotificationPreferences) zamiast zapytania na użytkownika.
     
-    Uwzględnia:
-    - Preferencje użytkownika (is_active, quiet_hours)
-    - Role (admini dostają wszystko, user tylko swoje)
+    Returns:
+        Lista krotek (user_id, role)
+    """
+    current_time = _current_local_time()
+    return list(
+        User.objects.filter(user_filter)
+        .exclude(notification_preferences__is_active=False)
+        .exclude(
+            notification_preferences__quiet_hours_start__lte=current_time,
+            notification_preferences__quiet_hours_end__gte=current_time,
+        )
+        .values_list('id', 'role')
+    )
+
+
+def _alert_recipient_ids(alert, users):
+    """
+    Odbiorcy alertu według reguł:
+    - właściciel alertu (jeśli jest)
+    - CRITICAL: dodatkowo wszyscy admini
+    - WARNING/INFO bez właściciela: wszyscy użytkownicy
+    - INFO/WARNING z właścicielem: tylko właściciel
     """
-    
-    # Zbierz odbiorców
     recipients = set()
-    
-    # 1. Jeśli alert przypisany do użytkownika - dodaj go
-    if alert.user:
-        recipients.add(alert.user)
-    
-    # 2. CRITICAL - admini zawsze dostają
+    if alert.user_id:
+        recipients.update(user_id for user_id, _ in users if user_id == alert.user_id)
     if alert.severity == 'CRITICAL':
-        admins = User.objects.filter(role='admin')
-        for admin in admins:
-            recipients.add(admin)
-        # Jeśli nie ma właściciela - tylko admini (nie spamuj userów)
-    
-    # 3. WARNING bez właściciela - admini + wszyscy userzy
-    elif alert.severity == 'WARNING' and not alert.user:
-        all_users = User.objects.all()  # Wszyscy (admini + userzy)
-        for user in all_users:
-            recipients.add(user)
-    
-    # 4. INFO bez właściciela - admini + wszyscy userzy (np. raporty systemowe)
-    elif alert.severity == 'INFO' and not alert.user:
-        all_users = User.objects.all()  # Wszyscy (admini + userzy)
-        for user in all_users:
-            recipients.add(user)
+        recipients.update(user_id for user_id, role in users if role == 'admin')
+    elif alert.severity in ('WARNING', 'INFO') and not alert.user_id:
+        recipients.update(user_id for user_id, _ in users)
+    return recipients
+
+
+def send_notifications_for_alerts(alerts, reason="new_alert"):
+    """
+    Wysyła powiadomienia dla wielu alertów naraz:
+    jedno zapytanie o odbiorców (z preferencjami), jeden bulk_create powiadomień.
     
-    # 5. INFO/WARNING z właścicielem - tylko właściciel
+    Returns:
+        Liczba utworzonych powiadomień
+    """
+    alerts = list(alerts)
+    if not alerts:
+        return 0
     
-    if not recipients:
-        return
+    # Zawęź zapytanie do użytkowników, którzy mogą być odbiorcami którejkolwiek partii alertów
+    if any(a.severity in ('WARNING', 'INFO') and not a.user_id for a in alerts):
+        user_filter = Q()
+    else:
+        user_filter = Q(pk__in={a.user_id for a in alerts if a.user_id})
+        if any(a.severity == 'CRITICAL' for a in alerts):
+            user_filter |= Q(role='admin')
     
-    # Wysyłaj powiadomienia z uwzględnieniem preferencji
-    local_tz = pytz.timezone('Europe/Warsaw')
-    current_time = timezone.now().astimezone(local_tz).time()
+    users = _eligible_recipients(user_filter)
     
-    notifications_sent = 0
-    for user in recipients:
-        # Sprawdź preferencje użytkownika
-        preferences = NotificationPreferences.objects.filter(user=user).first()
-        
-        # Czy powiadomienia są włączone?
-        if preferences and not preferences.is_active:
-            continue
-        
-        # Czy nie jesteśmy w quiet hours?
-        if preferences and preferences.quiet_hours_start and preferences.quiet_hours_end:
-            if preferences.quiet_hours_start <= current_time <= preferences.quiet_hours_end:
-                continue
-        
-        # Utwórz powiadomienie
-        Notification.objects.create(
-            user=user,
+    notifications = [
+        Notification(
+            user_id=user_id,
             alert=alert,
             message=f"[{alert.severity}] {alert.title}: {alert.description}"
         )
-        notifications_sent += 1
+        for alert in alerts
+        for user_id in _alert_recipient_ids(alert, users)
+    ]
+    Notification.objects.bulk_create(notifications)
+    unread.notifications_created(notifications)
+    push.publish_notifications(notifications)
+    return len(notifications)
+
+
+def send_notifications_for_alert(alert, reason="new_alert"):
+    """
+    Wysyła powiadomienia o alercie do odpowiednich użytkowników.
+    
+    Uwzględnia:
+    - Preferencje użytkownika (is_active, quiet_hours)
+    - Role (admini dostają wszystko, user tylko swoje)
+    """
+    return send_notifications_for_alerts([alert], reason=reason)
 
 
 @receiver(post_save, sender=Alert)  
@@ -155,40 +221,18 @@ def send_confirmation_notifications(alert):
     Powiadamia administratorów i właściciela o potwierdzeniu alertu.
     Uwzględnia preferencje użytkownika (is_active, quiet_hours).
     """
-    recipients = set()
-    
-    # Dodaj adminów
-    admins = User.objects.filter(role='admin')
-    for admin in admins:
-        recipients.add(admin)
-    
-    # Dodaj właściciela alertu (jeśli istnieje)
-    if alert.user:
-        recipients.add(alert.user)
-    
-    # Wyślij powiadomienia z uwzględnieniem preferencji
-    local_tz = pytz.timezone('Europe/Warsaw')
-    current_time = timezone.now().astimezone(local_tz).time()
-    
-    notifications_sent = 0
-    for user in recipients:
-        # Sprawdź preferencje użytkownika
-        preferences = NotificationPreferences.objects.filter(user=user).first()
-        
-        # Czy powiadomienia są włączone?
-        if preferences and not preferences.is_active:
-            continue
-        
-        # Czy nie jesteśmy w quiet hours?
-        if preferences and preferences.quiet_hours_start and preferences.quiet_hours_end:
-            if preferences.quiet_hours_start <= current_time <= preferences.quiet_hours_end:
-                continue
-        
-        Notification.objects.create(
-            user=user,
-            alert=alert,
-            message=f"Alert potwierdzony przez {alert.confirmed_by.username if alert.confirmed_by else 'system'}: {alert.title}"
-        )
-        notifications_sent += 1
-    
-    logger.info(f"Wysłano {notifications_sent}/{len(recipients)} powiadomień o potwierdzeniu alertu: {alert.title}")  
+    user_filter = Q(role='admin')
+    if alert.user_id:
+        user_filter |= Q(pk=alert.user_id)
+    recipients = _eligible_recipients(user_filter)
+    
+    confirmed_by = getattr(alert, 'confirmed_by', None)
+    message = f"Alert potwierdzony przez {confirmed_by.username if confirmed_by else 'system'}: {alert.title}"
+    notifications = Notification.objects.bulk_create([
+        Notification(user_id=user_id, alert=alert, message=message)
+        for user_id, _ in recipients
+    ])
+    unread.notifications_created(notifications)
+    push.publish_notifications(notifications)
+    
+    logger.info(f"Wysłano {len(recipients)} powiadomień o potwierdzeniu alertu: {alert.title}")
@@ -0,0 +1,64 @@
+"""
+Cache liczby nieprzeczytanych powiadomień użytkownika (NotificationViewSet.unread_count).
+
+- trafienie w cache = brak zapytania do bazy (badge w interfejsie odpytuje to często)
+- przy chybieniu jedno COUNT po indeksie (user, is_read) i zapis do cache
+- bulk insert powiadomień zwiększa liczniki (incr), przeczytanie zmniejsza (decr);
+  klucz nieobecny w cache nie jest tworzony - następny odczyt policzy go z bazy
+- mark_all_as_read i zmiany przez REST usuwają klucz (jedna inwalidacja)
+- wpis żyje NOTIFICATION_UNREAD_CACHE_TTL sekund - przy domyślnym cache w pamięci
+  procesu to ogranicza nieaktualność względem powiadomień z alert_worker / periodic_notifier
+"""
+
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Notification
+
+
+def _cache():
+    return caches[getattr(settings, 'NOTIFICATION_UNREAD_CACHE', 'default')]
+
+
+def _ttl():
+    return getattr(settings, 'NOTIFICATION_UNREAD_CACHE_TTL', 30)
+
+
+def cache_key(user_id):
+    return f'notification_unread:{user_id}'
+
+
+def count(user_id):
+    """Liczba nieprzeczytanych powiadomień użytkownika."""
+    cached = _cache().get(cache_key(user_id))
+    if cached is not None:
+        return cached
+    value = Notification.objects.filter(user_id=user_id, is_read=False).count()
+    _cache().set(cache_key(user_id), value, _ttl())
+    return value
+
+
+def _add(user_id, delta):
+    try:
+        if _cache().incr(cache_key(user_id), delta) < 0:
+            invalidate(user_id)
+    except ValueError:
+        # Brak klucza - wartość zostanie policzona przy następnym odczycie
+        pass
+
+
+def notifications_created(notifications):
+    """Zwiększa liczniki po utworzeniu (nieprzeczytanych) powiadomień."""
+    per_user = Counter(n.user_id for n in notifications if not n.is_read)
+    for user_id, created in per_user.items():
+        _add(user_id, created)
+
+
+def notification_read(user_id):
+    _add(user_id, -1)
+
+
+def invalidate(user_id):
+    _cache().delete(cache_key(user_id))
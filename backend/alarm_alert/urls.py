@@ -8,5 +8,7 @@ router.register(r'notifications', views.NotificationViewSet, basename='notificat
 router.register(r'preferences', views.NotificationPreferencesViewSet, basename='notification-preferences')
 
 urlpatterns = [
+    # Przed routerem - inaczej 'stream' zostałby potraktowany jak pk powiadomienia
+    path('notifications/stream/', views.notification_stream, name='notification-stream'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,3 +1,9 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -7,6 +13,16 @@ from django.db.models import Q
 from security.permissions import IsAdmin
 from .models import Alert, Notification, NotificationPreferences
 from .serializers import AlertSerializer, NotificationSerializer, NotificationPreferencesSerializer
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from . import counters, push, unread
+
+# Komentarz SSE co HEARTBEAT_SECONDS utrzymuje połączenie przy życiu (proxy, load balancery).
+# Po STREAM_MAX_SECONDS serwer zamyka strumień, a EventSource łączy się ponownie
+# (ponowna weryfikacja tokenu, sprzątanie porzuconych połączeń).
+HEARTBEAT_SECONDS = 20
+STREAM_MAX_SECONDS = 600
 
 
 class AlertViewSet(viewsets.ModelViewSet):
@@ -89,23 +105,9 @@ class AlertViewSet(viewsets.ModelViewSet):
         if not user.is_authenticated:
             return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
         
-        queryset = Alert.objects.all() if (hasattr(user, 'role') and user.role == 'admin') else Alert.objects.filter(user=user)
-        
-        stats = {
-            'total': queryset.count(),
-            'by_severity': {
-                'CRITICAL': queryset.filter(severity='CRITICAL').count(),
-                'WARNING': queryset.filter(severity='WARNING').count(),
-                'INFO': queryset.filter(severity='INFO').count(),
-            },
-            'by_status': {
-                'NEW': queryset.filter(status='NEW').count(),
-                'CONFIRMED': queryset.filter(status='CONFIRMED').count(),
-                'MUTED': queryset.filter(status='MUTED').count(),
-                'CLOSED': queryset.filter(status='CLOSED').count(),
-            },
-            'muted_count': queryset.filter(is_muted=True).count(),
-        }
+        # Zmaterializowane liczniki (alarm_alert.counters) zamiast COUNT na każde żądanie
+        is_admin = hasattr(user, 'role') and user.role == 'admin'
+        stats = counters.statistics(None if is_admin else user)
         return Response(stats)
 
     def _send_confirmation_notifications(self, alert, confirmed_by):
@@ -156,18 +158,30 @@ class NotificationViewSet(viewsets.ModelViewSet):
         if not request.user.is_authenticated:
             return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
         
-        notifications = Notification.objects.filter(user=request.user, is_read=False)
-        count = notifications.count()
-        notifications.update(is_read=True)
+        # Jeden UPDATE (liczba zmienionych wierszy z bazy) i jedna inwalidacja licznika
+        count = Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        unread.invalidate(request.user.pk)
         return Response({'marked_as_read': count})
 
-    @action(detail=False, methods=['get'])
+    # Bezstanowy JWT (bez pobierania użytkownika z bazy) + cache - trafienie nie dotyka bazy
+    @action(detail=False, methods=['get'], authentication_classes=[JWTStatelessUserAuthentication])
     def unread_count(self, request):
         if not request.user.is_authenticated:
             return Response({'unread_count': 0})
         
-        count = Notification.objects.filter(user=request.user, is_read=False).count()
-        return Response({'unread_count': count})
+        return Response({'unread_count': unread.count(request.user.pk)})
+
+    def perform_create(self, serializer):
+        serializer.save()
+        unread.invalidate(serializer.instance.user_id)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        unread.invalidate(serializer.instance.user_id)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        unread.invalidate(instance.user_id)
 
 
 class NotificationPreferencesViewSet(viewsets.ModelViewSet):
@@ -214,3 +228,59 @@ class NotificationPreferencesViewSet(viewsets.ModelViewSet):
         preferences.setQuietHours(start_time, end_time)
         serializer = self.get_serializer(preferences)
         return Response(serializer.data)
+
+
+def _stream_user(request):
+    """Użytkownik z tokenu JWT: ?token=... (EventSource nie wysyła nagłówków) lub Authorization: Bearer."""
+    authentication = JWTAuthentication()
+    raw_token = request.GET.get('token')
+    if not raw_token:
+        header = authentication.get_header(request)
+        raw_token = authentication.get_raw_token(header) if header else None
+    if not raw_token:
+        return None
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=JSONEncoder)}\n\n"
+
+
+async def notification_stream(request):
+    """
+    GET /alarm-alert/notifications/stream/?token=<access token>
+
+    Strumień Server-Sent Events z nowymi powiadomieniami użytkownika (event: notification)
+    i zmianami alertów (event: alert); event: resync oznacza, że trzeba pobrać stan przez REST.
+    Wymaga serwera ASGI - osobny proces daphne z IO.asgi_stream (API zostaje na WSGI).
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'Notification stream requires the ASGI server'}, status=501)
+
+    user = await sync_to_async(_stream_user)(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+
+    subscription = push.broker.subscribe(user.pk, getattr(user, 'role', None) == 'admin')
+
+    async def events():
+        try:
+            yield "retry: 5000\n\n"
+            deadline = asyncio.get_running_loop().time() + STREAM_MAX_SECONDS
+            while asyncio.get_running_loop().time() < deadline:
+                try:
+                    event, data = await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield _sse(event, data)
+        finally:
+            push.broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
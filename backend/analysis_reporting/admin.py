@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Report, ReportCriteria, Analysis, Visualization, ReportCompare
+from .models import Report, ReportCriteria, Analysis, Visualization, ReportCompare, ReportJob
 
 
 @admin.register(ReportCriteria)
@@ -36,4 +36,11 @@ class VisualizationAdmin(admin.ModelAdmin):
 class ReportCompareAdmin(admin.ModelAdmin):
     list_display = ['report_compare_id', 'created_by_id', 'created_timestamp', 'report_one', 'report_two']
     readonly_fields = ['report_compare_id', 'created_timestamp']
-    search_fields = ['compare_description']
\ No newline at end of file
+    search_fields = ['compare_description']
+
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ['job_id', 'status', 'progress', 'stage', 'attempts', 'created_timestamp', 'finished_timestamp', 'report']
+    list_filter = ['status', 'created_timestamp']
+    readonly_fields = ['job_id', 'created_timestamp', 'updated_timestamp', 'timings']
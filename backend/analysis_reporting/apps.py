@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class AnalysisReportingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'analysis_reporting'
+
+    def ready(self):
+        import analysis_reporting.signals
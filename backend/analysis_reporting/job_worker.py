@@ -0,0 +1,17 @@
+"""
+Punkt wejścia procesów puli process_report_jobs.
+
+Pula startuje procesy metodą 'spawn' (bez dziedziczenia połączeń z bazą procesu głównego),
+więc ten moduł nie może importować modeli przed django.setup() - robi to init().
+"""
+
+import django
+
+
+def init():
+    django.setup()
+
+
+def run(job_id):
+    from .report_jobs import run_job
+    return run_job(job_id)
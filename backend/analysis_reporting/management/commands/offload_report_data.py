@@ -0,0 +1,54 @@
+"""
+Management command: offload_report_data
+
+Przenosi odczyty starych raportów z Report.data_for_analysis (JSON w wierszu)
+do plików kolumnowych w MEDIA_ROOT (analysis_reporting.utils.report_storage).
+
+LOGIKA:
+- Wybiera raporty bez data_file, których data_for_analysis ma klucz 'readings'
+- Każdy raport osobno: zapis pliku, potem w jednej aktualizacji data_file, readings_count
+  i data_for_analysis bez odczytów (zostają metadane: count, criteria, fetched_at)
+- Przerwane zadanie można uruchomić ponownie - przeniesione raporty są pomijane
+- Do czasu przeniesienia raporty działają bez zmian (Report.get_readings czyta JSON)
+
+URUCHOMIENIE:
+- python manage.py offload_report_data
+- python manage.py offload_report_data --dry-run
+"""
+
+from django.core.management.base import BaseCommand
+from analysis_reporting.models import Report
+from analysis_reporting.utils import report_storage
+
+
+class Command(BaseCommand):
+    help = 'Przenosi odczyty starych raportów z JSON w bazie do plików kolumnowych'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Tylko pokaż liczbę raportów do przeniesienia',
+        )
+
+    def handle(self, *args, **options):
+        pending = Report.objects.filter(data_file__isnull=True, data_for_analysis__has_key='readings')
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'DRY RUN: Raportów do przeniesienia: {pending.count()}'))
+            return
+
+        moved = 0
+        for report_id in list(pending.values_list('report_id', flat=True)):
+            report = Report.objects.get(report_id=report_id)
+            metadata = dict(report.data_for_analysis)
+            records = metadata.pop('readings', [])
+
+            path, count = report_storage.write_records(report.report_id, records)
+            metadata['count'] = count
+            Report.objects.filter(report_id=report.report_id).update(
+                data_file=path, readings_count=count, data_for_analysis=metadata,
+            )
+            moved += 1
+            self.stdout.write(f'{report.report_id}: {count} odczytów -> {path}')
+
+        self.stdout.write(self.style.SUCCESS(f'Przeniesiono raportów: {moved}'))
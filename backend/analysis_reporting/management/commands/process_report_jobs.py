@@ -0,0 +1,118 @@
+"""
+Management command: process_report_jobs
+
+Worker generujący raporty z kolejki ReportJob w puli procesów.
+
+LOGIKA:
+- Pobiera tyle zadań, ile jest wolnych procesów (--workers), przez SELECT ... FOR UPDATE SKIP LOCKED
+- Każde zadanie generuje osobny proces puli (ProcessPoolExecutor, start 'spawn'):
+  dane, analizy, wykresy matplotlib i opisy AI nie blokują żądań HTTP ani siebie nawzajem
+- Postęp i czasy etapów zapisuje proces wykonujący zadanie (report_jobs.run_job)
+- Zadanie, którego proces zginął, kończy się FAILED; pula jest wtedy tworzona od nowa
+- Zadania porzucone przez zatrzymany worker wracają do kolejki po REPORT_JOB_STALE_MINUTES
+- Gdy kolejka jest pusta, czeka --poll-interval sekund
+- Można uruchomić kilka workerów równolegle
+
+URUCHOMIENIE:
+- python manage.py process_report_jobs
+- python manage.py process_report_jobs --workers 4
+- python manage.py process_report_jobs --once   (wykonuje zakolejkowane zadania i kończy)
+- Docker: serwis report_worker
+"""
+
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from analysis_reporting import job_worker, report_jobs
+
+
+class Command(BaseCommand):
+    help = 'Generuje raporty z kolejki zadań w puli procesów w tle'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=report_jobs.workers(),
+            help='Liczba procesów generujących raporty',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Czas oczekiwania (s), gdy kolejka jest pusta',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Wykonaj zakolejkowane zadania i zakończ',
+        )
+
+    def _pool(self, workers):
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=job_worker.init,
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        if workers <= 0:
+            raise CommandError('--workers musi być większe od 0')
+
+        pool = self._pool(workers)
+        running = {}
+        done_count = failed_count = 0
+        try:
+            while True:
+                close_old_connections()
+                broken = False
+                for future in [future for future in running if future.done()]:
+                    job_id = running.pop(future)
+                    try:
+                        succeeded = future.result()
+                    except Exception as e:
+                        broken = broken or isinstance(e, BrokenProcessPool)
+                        report_jobs.fail_job(job_id, f'Worker process failed: {e}')
+                        succeeded = False
+                    if succeeded:
+                        done_count += 1
+                        self.stdout.write(f'Zadanie {job_id}: raport wygenerowany')
+                    else:
+                        failed_count += 1
+                        self.stderr.write(f'Zadanie {job_id}: błąd')
+
+                if broken:
+                    # Pozostałe zadania zepsutej puli też kończą się BrokenProcessPool
+                    for job_id in running.values():
+                        report_jobs.fail_job(job_id, 'Worker process failed')
+                    running.clear()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self._pool(workers)
+
+                try:
+                    job_ids = report_jobs.claim(workers - len(running))
+                except Exception as e:
+                    self.stderr.write(f'Błąd pobierania zadań: {e}')
+                    job_ids = []
+                for job_id in job_ids:
+                    running[pool.submit(job_worker.run, str(job_id))] = job_id
+
+                if not running and not job_ids:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                elif not job_ids:
+                    wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Zakończono. Raporty: {done_count}, błędy: {failed_count}'
+        ))
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.25 on 2026-10-17 06:35
+
+from django.db import migrations, models
+
+
+def fill_readings_count(apps, schema_editor):
+    # Liczba odczytów starych raportów z metadanych (bez wczytywania samych odczytów do Pythona)
+    from django.db.models import IntegerField
+    from django.db.models.fields.json import KeyTextTransform
+    from django.db.models.functions import Cast, Coalesce
+
+    Report = apps.get_model('analysis_reporting', 'Report')
+    Report.objects.update(
+        readings_count=Coalesce(Cast(KeyTextTransform('count', 'data_for_analysis'), IntegerField()), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis_reporting', '0007_analysis_has_anomaly'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='data_file',
+            field=models.CharField(blank=True, max_length=500, null=True, verbose_name='Data File Path'),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='readings_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Readings Count'),
+        ),
+        migrations.RunPython(fill_readings_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.25 on 2026-10-17 06:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis_reporting', '0008_report_data_file'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('job_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_by_id', models.UUIDField(blank=True, null=True, verbose_name='Created by')),
+                ('generate_charts', models.BooleanField(default=False)),
+                ('use_ai', models.BooleanField(default=False)),
+                ('status', models.CharField(choices=[('QUEUED', 'Queued'), ('RUNNING', 'Running'), ('SUCCEEDED', 'Succeeded'), ('FAILED', 'Failed')], default='QUEUED', max_length=20, verbose_name='Status')),
+                ('progress', models.PositiveSmallIntegerField(default=0)),
+                ('stage', models.CharField(blank=True, max_length=50)),
+                ('timings', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('created_timestamp', models.DateTimeField(auto_now_add=True)),
+                ('started_timestamp', models.DateTimeField(blank=True, null=True)),
+                ('finished_timestamp', models.DateTimeField(blank=True, null=True)),
+                ('updated_timestamp', models.DateTimeField(auto_now=True)),
+                ('report', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='analysis_reporting.report', verbose_name='Report')),
+                ('report_criteria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='analysis_reporting.reportcriteria', verbose_name='Report Criteria')),
+            ],
+            options={
+                'verbose_name': 'Report Job',
+                'verbose_name_plural': 'Report Jobs',
+                'ordering': ['-created_timestamp'],
+                'indexes': [models.Index(fields=['status', 'created_timestamp'], name='report_job_queue_idx')],
+            },
+        ),
+    ]
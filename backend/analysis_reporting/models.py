@@ -117,18 +117,36 @@ class Report(models.Model):
         verbose_name=_("Report Criteria")
     )
     
+    # Metadane zbioru danych (count, criteria, fetched_at). Odczyty są w pliku data_file;
+    # w raportach sprzed przeniesienia - jeszcze pod kluczem 'readings'
     data_for_analysis = models.JSONField(
         default=dict,
         blank=True,
         verbose_name=_("Data for Analysis")
     )
     
+    data_file = models.CharField(
+        max_length=500,
+        blank=True,
+        null=True,
+        verbose_name=_("Data File Path")
+    )
+    
+    readings_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Readings Count")
+    )
+    
     report_description = models.TextField(
         blank=True,
         null=True,
         verbose_name=_("Report Description")
     )
 
+    # Cache odczytów wczytanych przez get_readings() / get_frame()
+    _readings = None
+    _frame = None
+
     class Meta:
         verbose_name = _("Report")
         verbose_name_plural = _("Reports")
@@ -152,9 +170,36 @@ class Report(models.Model):
         """Ładuje dane z sensorów"""
         return True
 
+    def get_readings(self):
+        """
+        Odczyty raportu - z pliku kolumnowego (utils.report_storage), a dla starych
+        raportów z data_for_analysis['readings']. Wczytywane leniwie, raz na obiekt.
+        """
+        if self._readings is None:
+            from .utils import report_storage
+            if self.data_file:
+                self._readings = report_storage.read_readings(self.data_file)
+            else:
+                self._readings = self.data_for_analysis.get('readings', [])
+        return self._readings
+
+    def get_frame(self):
+        """
+        Odczyty raportu jako kolumny NumPy (utils.analysis_kernel.ReadingFrame) do analiz -
+        z pliku kolumnowego bez budowania listy słowników. Wczytywane leniwie, raz na obiekt.
+        """
+        if self._frame is None:
+            from .utils import report_storage
+            from .utils.analysis_kernel import ReadingFrame
+            if self.data_file:
+                self._frame = report_storage.read_frame(self.data_file)
+            else:
+                self._frame = ReadingFrame.from_records(self.get_readings())
+        return self._frame
+
     def export_analysis_data(self):
-        """Eksportuje dane analityczne do JSON"""
-        return self.data_for_analysis
+        """Eksportuje dane analityczne do JSON (metadane i odczyty)"""
+        return {**self.data_for_analysis, 'readings': self.get_readings()}
 
     def create_visualization(self, analysis):
         """Tworzy wizualizację dla analizy"""
@@ -329,4 +374,83 @@ class ReportCompare(models.Model):
 
     def compare(self):
         """Porównuje dwa raporty"""
-        return True
\ No newline at end of file
+        return True
+
+class ReportJob(models.Model):
+    """
+    Zadanie generowania raportu w tle.
+    Endpoint generate tylko tworzy zadanie (202), raport generuje worker:
+    python manage.py process_report_jobs (analysis_reporting.report_jobs)
+    """
+    class Status(models.TextChoices):
+        QUEUED = 'QUEUED', _('Queued')
+        RUNNING = 'RUNNING', _('Running')
+        SUCCEEDED = 'SUCCEEDED', _('Succeeded')
+        FAILED = 'FAILED', _('Failed')
+
+    job_id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+
+    # Id użytkownika (security.User - klucz UUID) zlecającego raport
+    created_by_id = models.UUIDField(
+        null=True,
+        blank=True,
+        verbose_name=_("Created by")
+    )
+
+    report_criteria = models.ForeignKey(
+        ReportCriteria,
+        on_delete=models.CASCADE,
+        related_name='jobs',
+        verbose_name=_("Report Criteria")
+    )
+
+    generate_charts = models.BooleanField(default=False)
+    use_ai = models.BooleanField(default=False)
+
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.QUEUED,
+        verbose_name=_("Status")
+    )
+
+    # Postęp 0-100 i nazwa bieżącego etapu (np. 'trends_chart')
+    progress = models.PositiveSmallIntegerField(default=0)
+    stage = models.CharField(max_length=50, blank=True)
+
+    # Czas poszczególnych etapów w sekundach, np. {"data": 0.41, "trends": 0.02, ...}
+    timings = models.JSONField(default=dict, blank=True)
+
+    report = models.ForeignKey(
+        Report,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs',
+        verbose_name=_("Report")
+    )
+
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    created_timestamp = models.DateTimeField(auto_now_add=True)
+    started_timestamp = models.DateTimeField(null=True, blank=True)
+    finished_timestamp = models.DateTimeField(null=True, blank=True)
+    # Odświeżane przy każdej zmianie postępu - zadanie RUNNING bez zmian przez
+    # REPORT_JOB_STALE_MINUTES uznajemy za porzucone przez worker i kolejkujemy ponownie
+    updated_timestamp = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Report Job")
+        verbose_name_plural = _("Report Jobs")
+        ordering = ['-created_timestamp']
+        indexes = [
+            models.Index(fields=['status', 'created_timestamp'], name='report_job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"Job {self.job_id} ({self.status}, {self.progress}%)"
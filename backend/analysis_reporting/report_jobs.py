@@ -0,0 +1,165 @@
+"""
+Kolejka zadań generowania raportów w bazie (tabela ReportJob).
+
+- POST /reports/generate/ tylko tworzy zadanie QUEUED i odpowiada 202 z job_id;
+  pobieranie danych, analizy, wykresy (matplotlib) i opisy AI wykonuje worker
+  process_report_jobs w puli procesów, poza żądaniem HTTP
+- zadania są pobierane przez SELECT ... FOR UPDATE SKIP LOCKED - kilka workerów
+  może działać równolegle, żadne zadanie nie trafi do dwóch procesów
+- postęp (stage, progress) i czasy etapów (timings) są zapisywane w trakcie generowania
+  (StageTimer), klient odpytuje GET /report-jobs/{id}/
+- zadanie RUNNING bez zmian przez REPORT_JOB_STALE_MINUTES (worker przerwany) wraca do
+  kolejki, po MAX_ATTEMPTS próbach kończy się FAILED
+- błąd generowania (np. brak danych dla kryteriów) kończy zadanie FAILED bez ponawiania
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import ReportJob
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+
+
+def workers():
+    return getattr(settings, 'REPORT_JOB_WORKERS', 2)
+
+
+def stale_after():
+    return timedelta(minutes=getattr(settings, 'REPORT_JOB_STALE_MINUTES', 30))
+
+
+class StageTimer:
+    """
+    Czas etapów generowania raportu (sekundy). start() kończy poprzedni etap.
+    on_stage(name, progress, timings) jest wywoływane na początku każdego etapu.
+    """
+
+    def __init__(self, on_stage=None):
+        self.timings = {}
+        self._on_stage = on_stage
+        self._current = None
+        self._started = None
+
+    def start(self, name, progress):
+        self.finish()
+        if self._on_stage:
+            self._on_stage(name, progress, dict(self.timings))
+        self._current = name
+        self._started = time.perf_counter()
+
+    def finish(self):
+        if self._current is not None:
+            elapsed = time.perf_counter() - self._started
+            self.timings[self._current] = round(self.timings.get(self._current, 0.0) + elapsed, 3)
+            self._current = None
+        return self.timings
+
+
+def enqueue(criteria, generate_charts=False, use_ai=False, user_id=None):
+    return ReportJob.objects.create(
+        report_criteria=criteria,
+        generate_charts=bool(generate_charts),
+        use_ai=bool(use_ai),
+        created_by_id=user_id,
+    )
+
+
+def claim(limit):
+    """
+    Pobiera do `limit` zadań do wykonania i oznacza je RUNNING.
+
+    Returns:
+        Lista job_id
+    """
+    if limit <= 0:
+        return []
+
+    stale = Q(status=ReportJob.Status.RUNNING, updated_timestamp__lt=timezone.now() - stale_after())
+    with transaction.atomic():
+        # Porzucone zadania, które wyczerpały próby, nie wracają do kolejki
+        ReportJob.objects.filter(stale, attempts__gte=MAX_ATTEMPTS).update(
+            status=ReportJob.Status.FAILED,
+            error='Worker stopped responding',
+            finished_timestamp=timezone.now(),
+        )
+        job_ids = list(
+            ReportJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(Q(status=ReportJob.Status.QUEUED) | stale)
+            .order_by('created_timestamp')
+            .values_list('job_id', flat=True)[:limit]
+        )
+        if job_ids:
+            ReportJob.objects.filter(job_id__in=job_ids).update(
+                status=ReportJob.Status.RUNNING,
+                attempts=F('attempts') + 1,
+                progress=0,
+                stage='',
+                error='',
+                started_timestamp=timezone.now(),
+                updated_timestamp=timezone.now(),
+            )
+    return job_ids
+
+
+def run_job(job_id):
+    """
+    Generuje raport zadania (w procesie puli workera).
+
+    Returns:
+        True, jeśli raport został wygenerowany
+    """
+    from .views import ReportManager
+
+    job = ReportJob.objects.select_related('report_criteria').get(pk=job_id)
+    jobs = ReportJob.objects.filter(pk=job_id)
+
+    def on_stage(name, progress, timings):
+        jobs.update(stage=name, progress=progress, timings=timings, updated_timestamp=timezone.now())
+
+    timer = StageTimer(on_stage)
+    started = time.perf_counter()
+    try:
+        report = ReportManager.generate_report(job.report_criteria, job.generate_charts, job.use_ai, timer=timer)
+    except Exception as e:
+        if not isinstance(e, ValueError):
+            logger.exception(f"Report job {job_id} failed")
+        timings = timer.finish()
+        timings['total'] = round(time.perf_counter() - started, 3)
+        jobs.update(
+            status=ReportJob.Status.FAILED,
+            error=str(e)[:2000],
+            timings=timings,
+            finished_timestamp=timezone.now(),
+        )
+        return False
+
+    timings = timer.finish()
+    timings['total'] = round(time.perf_counter() - started, 3)
+    jobs.update(
+        status=ReportJob.Status.SUCCEEDED,
+        report=report,
+        progress=100,
+        stage='',
+        timings=timings,
+        finished_timestamp=timezone.now(),
+    )
+    return True
+
+
+def fail_job(job_id, message):
+    """Oznacza zadanie FAILED, gdy proces puli zakończył się bez wyniku (np. został zabity)."""
+    ReportJob.objects.filter(pk=job_id, status=ReportJob.Status.RUNNING).update(
+        status=ReportJob.Status.FAILED,
+        error=message[:2000],
+        finished_timestamp=timezone.now(),
+    )
@@ -4,7 +4,8 @@ from analysis_reporting.models import (
     ReportCriteria, 
     Analysis, 
     Visualization, 
-    ReportCompare
+    ReportCompare,
+    ReportJob
 )
 
 
@@ -91,11 +92,11 @@ class ReportSerializer(serializers.ModelSerializer):
             'created_timestamp',
             'report_criteria',
             'report_criteria_id',
-            'data_for_analysis',
+            'readings_count',
             'report_description',
             'analyses'
         ]
-        read_only_fields = ['report_id', 'created_timestamp']
+        read_only_fields = ['report_id', 'created_timestamp', 'readings_count']
 
 
 class ReportCompareSerializer(serializers.ModelSerializer):
@@ -125,4 +126,29 @@ class ReportCompareSerializer(serializers.ModelSerializer):
             'report_one_id',
             'report_two_id'
         ]
-        read_only_fields = ['report_compare_id', 'created_timestamp']
\ No newline at end of file
+        read_only_fields = ['report_compare_id', 'created_timestamp']
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    """Serializer dla zadania generowania raportu (stan i postęp)"""
+    
+    class Meta:
+        model = ReportJob
+        fields = [
+            'job_id',
+            'status',
+            'progress',
+            'stage',
+            'timings',
+            'report',
+            'report_criteria',
+            'error',
+            'generate_charts',
+            'use_ai',
+            'attempts',
+            'created_by_id',
+            'created_timestamp',
+            'started_timestamp',
+            'finished_timestamp'
+        ]
+        read_only_fields = fields
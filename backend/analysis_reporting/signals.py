@@ -0,0 +1,21 @@
+"""
+Django Signals dla modułu analysis_reporting.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from analysis_reporting.models import Report
+from analysis_reporting.utils import report_storage
+
+
+@receiver(post_delete, sender=Report)
+def delete_report_data_file(sender, instance, **kwargs):
+    """
+    Usuwa plik odczytów raportu (utils.report_storage) - także przy QuerySet.delete()
+    i masowym usuwaniu w panelu admina. Plik znika dopiero po zatwierdzeniu transakcji,
+    więc wycofane usunięcie nie zostawia raportu bez danych.
+    """
+    if instance.data_file:
+        transaction.on_commit(lambda: report_storage.delete(instance.data_file))
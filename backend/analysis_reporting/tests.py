@@ -1,3 +1,353 @@
-from django.test import TestCase
+"""
+Testy równoważności jądra NumPy (utils.analysis_kernel) z dawną implementacją listową AnalysisUtils.
 
-# Create your tests here.
+ListAnalysis to pętle po liście słowników sprzed jądra kolumnowego - wyniki jądra muszą być
+identyczne (także float, bez tolerancji) dla danych losowych i przypadków brzegowych.
+"""
+
+import math
+import random
+import statistics
+import struct
+import tempfile
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+from django.utils.dateparse import parse_datetime
+
+from analysis_reporting.utils import analysis_kernel, report_storage, sql_aggregation
+from analysis_reporting.utils.analysis_kernel import ReadingFrame
+from analysis_reporting.utils.analysis_utils import AnalysisUtils, PERIOD_FORMATS
+
+# Jądro liczy sumy poprawnie zaokrąglone (jak sum() od Pythona 3.12) - referencja używa
+# math.fsum, żeby test dawał ten sam wynik na każdej wersji Pythona
+_sum = math.fsum
+
+PERIODS = ['hourly', 'daily', 'weekly', 'monthly', 'yearly']
+
+
+class ListAnalysis:
+    """Dawna implementacja listowa AnalysisUtils (referencja dla testów)."""
+
+    @staticmethod
+    def calculate_cost_analysis(readings):
+        energy_readings = [r for r in readings if r.get('metric') == 'power_kw']
+        if not energy_readings:
+            return {
+                "total_consumption_kwh": 0,
+                "average_power_kw": 0,
+                "peak_power_kw": 0,
+                "estimated_cost": 0,
+                "cost_per_location": {}
+            }
+
+        values = [r['value'] for r in energy_readings]
+        locations = {}
+        for reading in energy_readings:
+            locations.setdefault(reading.get('location', 'Unknown'), []).append(reading['value'])
+
+        return AnalysisUtils._cost_result(
+            total_kwh=_sum(values),
+            avg_power=statistics.mean(values),
+            peak_power=max(values),
+            count=len(energy_readings),
+            per_location={loc: (_sum(vals), statistics.mean(vals)) for loc, vals in locations.items()},
+        )
+
+    @staticmethod
+    def calculate_peak_load(readings):
+        if not readings:
+            return {
+                "peak_value": 0,
+                "peak_timestamp": None,
+                "peak_location": None,
+                "peak_device": None,
+                "average_value": 0
+            }
+
+        peak_reading = max(readings, key=lambda x: x.get('value', 0))
+        values = [r['value'] for r in readings]
+        threshold = AnalysisUtils.peak_threshold(peak_reading['value'])
+        peak_events = [r for r in readings if r['value'] >= threshold]
+        return AnalysisUtils._peak_result(peak_reading, statistics.mean(values), len(peak_events))
+
+    @staticmethod
+    def detect_anomalies(readings, threshold_std=3.0):
+        if len(readings) < 3:
+            return {
+                "anomalies_detected": False,
+                "anomalies": [],
+                "anomaly_count": 0
+            }
+
+        values = [r['value'] for r in readings]
+        mean_value = statistics.mean(values)
+        try:
+            std_dev = statistics.stdev(values)
+        except statistics.StatisticsError:
+            std_dev = 0
+
+        if std_dev == 0:
+            return {
+                "anomalies_detected": False,
+                "anomalies": [],
+                "anomaly_count": 0,
+                "reason": "No variation in data"
+            }
+
+        anomalies = []
+        lower_bound = mean_value - (threshold_std * std_dev)
+        upper_bound = mean_value + (threshold_std * std_dev)
+        for idx, reading in enumerate(readings):
+            value = reading['value']
+            if value < lower_bound or value > upper_bound:
+                anomalies.append({
+                    "index": idx,
+                    "reading_id": reading.get('id'),
+                    "timestamp": reading.get('timestamp'),
+                    "location": reading.get('location'),
+                    "device_id": reading.get('device_id'),
+                    "metric": reading.get('metric'),
+                    "value": value,
+                    "deviation": abs(value - mean_value) / std_dev,
+                    "type": "high" if value > upper_bound else "low"
+                })
+
+        return {
+            "anomalies_detected": len(anomalies) > 0,
+            "anomalies": anomalies,
+            "anomaly_count": len(anomalies),
+            "statistics": {
+                "mean": round(mean_value, 2),
+                "std_dev": round(std_dev, 2),
+                "lower_bound": round(lower_bound, 2),
+                "upper_bound": round(upper_bound, 2)
+            }
+        }
+
+    @staticmethod
+    def calculate_trends(readings):
+        if len(readings) < 2:
+            return AnalysisUtils._trend_result(None, None)
+
+        sorted_readings = sorted(readings, key=lambda x: x.get('timestamp', ''))
+        values = [r['value'] for r in sorted_readings]
+        first_half = values[:len(values)//2]
+        second_half = values[len(values)//2:]
+        return AnalysisUtils._trend_result(statistics.mean(first_half), statistics.mean(second_half))
+
+    @staticmethod
+    def aggregate_by_time_period(readings, period='daily'):
+        aggregated = defaultdict(list)
+        for reading in readings:
+            timestamp = reading.get('timestamp')
+            if not timestamp:
+                continue
+            if isinstance(timestamp, str):
+                timestamp = parse_datetime(timestamp)
+            key = timestamp.strftime(PERIOD_FORMATS.get(period, PERIOD_FORMATS['daily']))
+            aggregated[key].append(reading['value'])
+
+        return {
+            period_key: AnalysisUtils._bucket_result(len(values), _sum(values), statistics.mean(values), min(values), max(values))
+            for period_key, values in aggregated.items()
+        }
+
+    @staticmethod
+    def compare_periods(period_one_readings, period_two_readings):
+        def summary(readings):
+            values = [r['value'] for r in readings if 'value' in r and r['value'] is not None]
+            if not values:
+                return {"count": 0}
+            return {
+                "count": len(values),
+                "avg": statistics.mean(values),
+                "median": statistics.median(values),
+                "max": max(values),
+                "min": min(values),
+            }
+
+        return AnalysisUtils._comparison_result(summary(period_one_readings), summary(period_two_readings))
+
+
+def _reading(index, value, timestamp, location='Hala A', metric='power_kw', device_id=1):
+    return {
+        'id': index,
+        'timestamp': timestamp,
+        'device_id': device_id,
+        'device_type': 'sensor',
+        'location': location,
+        'metric': metric,
+        'value': value,
+        'unit': 'kW',
+        'signal_dbm': -60,
+        'status': True,
+    }
+
+
+def _random_readings(rng, count):
+    """Odczyty w losowej kolejności: powtórzone znaczniki czasu i wartości, kilka lokalizacji i metryk."""
+    start = datetime(2024, 12, 20, tzinfo=dt_timezone.utc)
+    timestamps = [
+        (start + timedelta(seconds=rng.randrange(60 * 86400), microseconds=rng.choice([0, rng.randrange(10**6)]))).isoformat()
+        for _ in range(max(1, count // 2))
+    ]
+    values = [round(rng.gauss(100, 30), rng.choice([0, 2, 6])) for _ in range(max(1, count // 3))]
+    return [
+        _reading(
+            index, rng.choice(values) if rng.random() < 0.3 else rng.gauss(100, 30) + rng.choice([0, 0, 0, 500]),
+            rng.choice(timestamps),
+            location=rng.choice(['Hala A', 'Hala B', 'Biuro', '']),
+            metric=rng.choice(['power_kw', 'power_kw', 'temperature']),
+            device_id=rng.randrange(1, 6),
+        )
+        for index in range(count)
+    ]
+
+
+def _comparable(result):
+    """Wynik z NaN zamienionym na znacznik (NaN != NaN) - do assertEqual."""
+    if isinstance(result, dict):
+        return {key: _comparable(value) for key, value in result.items()}
+    if isinstance(result, list):
+        return [_comparable(value) for value in result]
+    if isinstance(result, float) and math.isnan(result):
+        return 'NaN'
+    return result
+
+
+def _outcome(function, *args):
+    """Wynik wywołania albo typ zgłoszonego wyjątku."""
+    try:
+        return _comparable(function(*args))
+    except Exception as e:
+        return type(e)
+
+
+class AnalysisKernelEquivalenceTest(SimpleTestCase):
+    """Jądro NumPy (AnalysisUtils na ReadingFrame) daje te same wyniki co pętle po liście."""
+
+    def assertEquivalent(self, readings, frame=None):
+        frame = frame if frame is not None else ReadingFrame.from_records(readings)
+        for name in ('calculate_cost_analysis', 'calculate_peak_load', 'calculate_trends'):
+            with self.subTest(analysis=name):
+                self.assertEqual(_outcome(getattr(AnalysisUtils, name), frame), _outcome(getattr(ListAnalysis, name), readings))
+        for threshold in (3.0, 1.0):
+            with self.subTest(analysis='detect_anomalies', threshold=threshold):
+                self.assertEqual(
+                    _outcome(AnalysisUtils.detect_anomalies, frame, threshold),
+                    _outcome(ListAnalysis.detect_anomalies, readings, threshold),
+                )
+        for period in PERIODS:
+            with self.subTest(analysis='aggregate_by_time_period', period=period):
+                self.assertEqual(
+                    _outcome(AnalysisUtils.aggregate_by_time_period, frame, period),
+                    _outcome(ListAnalysis.aggregate_by_time_period, readings, period),
+                )
+
+    def assertComparisonEquivalent(self, one, two):
+        self.assertEqual(
+            _outcome(AnalysisUtils.compare_periods, ReadingFrame.from_records(one), ReadingFrame.from_records(two)),
+            _outcome(ListAnalysis.compare_periods, one, two),
+        )
+
+    def test_random_readings(self):
+        rng = random.Random(2024)
+        for count in (2, 3, 10, 257, 2000):
+            readings = _random_readings(rng, count)
+            with self.subTest(count=count):
+                self.assertEquivalent(readings)
+                self.assertComparisonEquivalent(readings, _random_readings(rng, count + 1))
+
+    def test_empty(self):
+        self.assertEquivalent([])
+        self.assertComparisonEquivalent([], _random_readings(random.Random(1), 5))
+        self.assertComparisonEquivalent([], [])
+
+    def test_single_reading(self):
+        for metric in ('power_kw', 'temperature'):
+            readings = [_reading(1, 42.5, '2025-01-15T12:30:00+00:00', metric=metric)]
+            with self.subTest(metric=metric):
+                self.assertEquivalent(readings)
+                self.assertComparisonEquivalent(readings, readings)
+
+    def test_constant_values(self):
+        readings = [_reading(i, 7.25, f'2025-01-0{i}T00:00:00+00:00') for i in range(1, 6)]
+        self.assertEquivalent(readings)
+
+    def test_nan_values(self):
+        rng = random.Random(7)
+        for position in (0, 1, 'last', 'all'):
+            readings = _random_readings(rng, 40)
+            if position == 'all':
+                targets = range(len(readings))
+            else:
+                targets = [len(readings) - 1 if position == 'last' else position]
+            for index in targets:
+                readings[index]['value'] = math.nan
+            with self.subTest(position=position):
+                self.assertEquivalent(readings)
+
+    def test_nan_values_in_comparison(self):
+        # Ramka nie odróżnia NaN od brakującej wartości (None) - compare_periods pomija oba
+        rng = random.Random(8)
+        readings = _random_readings(rng, 30)
+        other = _random_readings(rng, 30)
+        for index in (0, 5, 29):
+            readings[index]['value'] = math.nan
+        missing = [{**r, 'value': None} if math.isnan(r['value']) else r for r in readings]
+        self.assertEqual(
+            _outcome(AnalysisUtils.compare_periods, ReadingFrame.from_records(readings), ReadingFrame.from_records(other)),
+            _outcome(ListAnalysis.compare_periods, missing, other),
+        )
+
+    def test_missing_timestamps(self):
+        rng = random.Random(9)
+        readings = _random_readings(rng, 60)
+        for index in (0, 17, 59):
+            del readings[index]['timestamp']
+        for index in (3, 30):
+            readings[index]['timestamp'] = ''
+        self.assertEquivalent(readings)
+
+    def test_all_timestamps_missing(self):
+        readings = [{k: v for k, v in r.items() if k != 'timestamp'} for r in _random_readings(random.Random(10), 12)]
+        self.assertEquivalent(readings)
+
+    def test_columnar_file_frame(self):
+        # Ramka wczytana z pliku IOCOL raportu (Report.get_frame) - te same wyniki co lista z pliku
+        readings = _random_readings(random.Random(11), 500)
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            path, _ = report_storage.write_records('equivalence', readings)
+            records = report_storage.read_readings(path)
+            self.assertEquivalent(records, frame=report_storage.read_frame(path))
+
+    def test_exact_sums_match_fsum(self):
+        rng = random.Random(12)
+        values = [rng.uniform(-1, 1) * 10 ** rng.randrange(-20, 20) for _ in range(5000)]
+        groups = [rng.randrange(4) for _ in values]
+        sums = analysis_kernel.exact_sums(np.array(values), np.array(groups), 4)
+        for group in range(4):
+            expected = math.fsum(v for v, g in zip(values, groups) if g == group)
+            self.assertEqual(float(sums[group]), expected)
+
+    def test_sql_decomposition_matches_fsum(self):
+        # Rozkład z sql_aggregation._DECOMPOSED (bity float8send jako bigint) odtworzony w Pythonie
+        rng = random.Random(13)
+        values = [rng.uniform(-1, 1) * 10 ** rng.randrange(-20, 20) for _ in range(5000)] + [5e-324, -0.0, 0.1, 0.2]
+        per_exponent = defaultdict(lambda: [0, 0])
+        for value in values:
+            bits = struct.unpack('<q', struct.pack('<d', value))[0]
+            biased = (bits >> 52) & 2047
+            mantissa = bits & 4503599627370495 if biased == 0 else (bits & 4503599627370495) | 4503599627370496
+            exponent = max(biased, 1) - 1075
+            per_exponent[exponent][0] += 1
+            per_exponent[exponent][1] += -mantissa if bits < 0 else mantissa
+        groups = sql_aggregation._groups(
+            (None, exponent, count, units, False) for exponent, (count, units) in per_exponent.items()
+        )
+        self.assertEqual(groups[None].count, len(values))
+        self.assertEqual(float(groups[None].total), math.fsum(values))
+        self.assertEqual(groups[None].mean(), statistics.mean(values))
@@ -8,6 +8,7 @@ router.register(r'criteria', views.ReportCriteriaViewSet, basename='criteria')
 router.register(r'analyses', views.AnalysisViewSet, basename='analysis')
 router.register(r'visualizations', views.VisualizationViewSet, basename='visualization')
 router.register(r'comparisons', views.ReportCompareViewSet, basename='comparison')
+router.register(r'report-jobs', views.ReportJobViewSet, basename='report-job')
 
 urlpatterns = [
     path('', views.index, name='index'),
@@ -0,0 +1,440 @@
+"""
+Kolumnowe (NumPy) jądro AnalysisUtils dla odczytów liczonych w Pythonie.
+
+- ReadingFrame: odczyty raz zamienione na tablice - timestamp (int64, mikrosekundy UTC),
+  value (float64), device (int64), location / metric jako kody kategorii + etykiety;
+  pojedynczy odczyt (np. szczyt, anomalia) jest odtwarzany jako słownik tylko na wyjściu
+- Report.get_frame() buduje ramkę prosto z kolumn pliku IOCOL, bez listy słowników
+- wyniki są identyczne z dawnymi pętlami po liście słowników:
+  średnie jak statistics.mean (dokładna suma ułamkowa, jedno zaokrąglenie),
+  odchylenie jak statistics.stdev (dokładna suma kwadratów, poprawnie zaokrąglony pierwiastek),
+  sumy poprawnie zaokrąglone (jak sum() od Pythona 3.12), szczyt - pierwsze maksimum,
+  sortowanie stabilne, klucze słowników w kolejności pierwszego wystąpienia
+- NaN jak w pętlach po liście: przenosi się na sumy i średnie, a min/max/szczyt zachowują się
+  jak min()/max() - NaN na pierwszej pozycji wygrywa, dalsze są pomijane
+- dokładne sumy są liczone wektorowo: wartość = mantysa (int, 53 bity) * 2^wykładnik,
+  mantysy dzielone na połówki 26-bitowe i sumowane (np.bincount) osobno dla każdego wykładnika
+- kubełki aggregate_by_time_period są wyznaczane w UTC (odczyty raportów są zapisywane w UTC)
+- statystyki wspólne dla analiz (kolejność chronologiczna, dokładne sumy, średnia, odchylenie,
+  szczyt, kubełki okresów) są liczone raz na ramkę i zapamiętywane (utils.report_pipeline)
+"""
+
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+from fractions import Fraction
+
+import numpy as np
+from django.db.models import QuerySet
+from django.utils.dateparse import parse_datetime
+
+from .analysis_utils import AnalysisUtils, PERIOD_FORMATS
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+# Odczyt bez (poprawnego) znacznika czasu - sortuje się przed wszystkimi innymi
+MISSING_TIMESTAMP = np.iinfo(np.int64).min
+
+# Jednostka numpy, do której przycinane są znaczniki przed formatowaniem klucza okresu
+PERIOD_UNITS = {
+    'hourly': 'h',
+    'daily': 'D',
+    'weekly': 'D',
+    'monthly': 'M',
+}
+
+# Sumy mantys w jednym przebiegu np.bincount pozostają dokładne (< 2^53) do 2^25 wartości
+_CHUNK = 1 << 25
+_HALF_BITS = 26
+_SQRT_BIT_WIDTH = 2 * 53 + 3
+
+
+def _micros(timestamp):
+    if isinstance(timestamp, str):
+        try:
+            timestamp = parse_datetime(timestamp)
+        except ValueError:
+            return MISSING_TIMESTAMP
+    if not isinstance(timestamp, datetime):
+        return MISSING_TIMESTAMP
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=dt_timezone.utc)
+    return (timestamp - EPOCH) // timedelta(microseconds=1)
+
+
+def _categories(labels):
+    """Etykiety -> (kody int32, lista etykiet w kolejności pierwszego wystąpienia)."""
+    index = {}
+    codes = np.fromiter((index.setdefault(label, len(index)) for label in labels), dtype=np.int32, count=len(labels))
+    return codes, list(index)
+
+
+class ReadingFrame:
+    """
+    Odczyty w układzie kolumnowym.
+
+    record(i) zwraca i-ty odczyt jako słownik w kształcie Report.get_readings().
+    Statystyki (order, total, mean, stdev, peak_index, buckets) są liczone raz i zapamiętywane.
+    """
+
+    def __init__(self, timestamps, values, devices, location_codes, location_labels,
+                 metric_codes, metric_labels, record):
+        self.timestamps = timestamps
+        self.values = values
+        self.devices = devices
+        self.location_codes = location_codes
+        self.location_labels = location_labels
+        self.metric_codes = metric_codes
+        self.metric_labels = metric_labels
+        self.record = record
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def _cached(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def order(self):
+        """Indeksy odczytów w kolejności chronologicznej (sortowanie stabilne, jedyne na ramkę)."""
+        return self._cached('order', lambda: np.argsort(self.timestamps, kind='stable'))
+
+    def total(self):
+        """Dokładna suma wartości (Fraction)."""
+        return self._cached('total', lambda: exact_sums(self.values)[0])
+
+    def mean(self):
+        return self._cached('mean', lambda: float(self.total() / len(self)))
+
+    def stdev(self):
+        def compute():
+            n = len(self)
+            squares = exact_square_sum(self.values) - self.total() * self.total() / n
+            return _sqrt_fraction(squares / (n - 1))
+        return self._cached('stdev', compute)
+
+    def peak_index(self):
+        """Indeks pierwszego odczytu z maksymalną wartością (jak max() - NaN na początku wygrywa)."""
+        def compute():
+            if np.isnan(self.values[0]):
+                return 0
+            return int(np.nanargmax(self.values))
+        return self._cached('peak_index', compute)
+
+    def buckets(self, period):
+        """(klucze okresów, kod okresu każdego odczytu z czasem, maska odczytów z czasem)."""
+        return self._cached(('buckets', period), lambda: _period_buckets(self.timestamps, period))
+
+    @classmethod
+    def from_records(cls, records):
+        """Ramka z listy słowników odczytów (dawne data_for_analysis['readings'])."""
+        records = list(records)
+        location_codes, location_labels = _categories([r.get('location', 'Unknown') for r in records])
+        metric_codes, metric_labels = _categories([r.get('metric') for r in records])
+        return cls(
+            timestamps=np.fromiter((_micros(r.get('timestamp')) for r in records), dtype=np.int64, count=len(records)),
+            # Brakująca wartość (None) -> NaN, pomijana tylko przez compare_periods
+            values=np.array([r.get('value') for r in records], dtype=np.float64),
+            devices=np.array([r.get('device_id') or 0 for r in records], dtype=np.int64),
+            location_codes=location_codes,
+            location_labels=location_labels,
+            metric_codes=metric_codes,
+            metric_labels=metric_labels,
+            record=records.__getitem__,
+        )
+
+    @classmethod
+    def from_queryset(cls, readings):
+        """Ramka z QuerySetu DeviceReading w kolejności (timestamp, id) - jak plik raportu."""
+        rows = readings.order_by('timestamp', 'id').values(
+            'id', 'timestamp', 'device_id', 'device_type', 'location', 'metric', 'value', 'unit', 'signal_dbm', 'status'
+        )
+        return cls.from_records(
+            dict(row, timestamp=row['timestamp'].astimezone(dt_timezone.utc).isoformat()) for row in rows
+        )
+
+    @classmethod
+    def of(cls, readings):
+        if isinstance(readings, cls):
+            return readings
+        if isinstance(readings, QuerySet):
+            return cls.from_queryset(readings)
+        return cls.from_records(readings)
+
+    def metric_mask(self, metric):
+        if metric not in self.metric_labels:
+            return np.zeros(len(self), dtype=bool)
+        return self.metric_codes == self.metric_labels.index(metric)
+
+    def subset(self, mask):
+        """Ramka z wybranymi wierszami; record() dalej wskazuje oryginalne odczyty."""
+        rows = np.flatnonzero(mask)
+        return ReadingFrame(
+            timestamps=self.timestamps[rows],
+            values=self.values[rows],
+            devices=self.devices[rows],
+            location_codes=self.location_codes[rows],
+            location_labels=self.location_labels,
+            metric_codes=self.metric_codes[rows],
+            metric_labels=self.metric_labels,
+            record=lambda i: self.record(int(rows[i])),
+        )
+
+
+def _fraction(units, exponent):
+    return Fraction(units << exponent) if exponent >= 0 else Fraction(units, 1 << -exponent)
+
+
+def exact_sums(values, groups=None, size=1):
+    """
+    Dokładne sumy (Fraction) wartości w grupach 0..size-1 - jak statistics._sum, ale wektorowo.
+
+    Args:
+        values: tablica float64; grupa z NaN/inf ma sumę float (NaN przenosi się na sumę jak w sum())
+        groups: kod grupy każdej wartości (None - jedna grupa)
+    """
+    sums = [Fraction(0)] * size
+    if not len(values):
+        return sums
+    if groups is None:
+        groups = np.zeros(len(values), dtype=np.int64)
+
+    finite = np.isfinite(values)
+    if not finite.all():
+        for group in np.unique(groups[~finite]).tolist():
+            sums[group] = float(np.sum(values[~finite & (groups == group)]))
+        values, groups = values[finite], groups[finite]
+        if not len(values):
+            return sums
+
+    mantissa, exponent = np.frexp(values)
+    units = np.ldexp(mantissa, 53).astype(np.int64)
+    high = units >> _HALF_BITS
+    low = units & ((1 << _HALF_BITS) - 1)
+    lowest = int(exponent.min())
+    span = int(exponent.max()) - lowest + 1
+    keys = groups.astype(np.int64) * span + (exponent - lowest)
+
+    for start in range(0, len(values), _CHUNK):
+        part = slice(start, start + _CHUNK)
+        high_sums = np.bincount(keys[part], weights=high[part], minlength=size * span)
+        low_sums = np.bincount(keys[part], weights=low[part], minlength=size * span)
+        for key in np.flatnonzero((high_sums != 0) | (low_sums != 0)).tolist():
+            group, offset = divmod(key, span)
+            total = (int(high_sums[key]) << _HALF_BITS) + int(low_sums[key])
+            sums[group] += _fraction(total, lowest + offset - 53)
+    return sums
+
+
+def exact_square_sum(values):
+    """Dokładna suma kwadratów (Fraction) - iloczyny rozbite na składniki (podział Veltkampa)."""
+    scaled = values * 134217729.0  # 2^27 + 1
+    high = scaled - (scaled - values)
+    low = values - high
+    return exact_sums(np.concatenate([high * high, 2.0 * high * low, low * low]))[0]
+
+
+def mean(values):
+    return float(exact_sums(values)[0] / len(values))
+
+
+def _sqrt_fraction(value):
+    """Poprawnie zaokrąglony pierwiastek z ułamka (jak w statistics.stdev)."""
+    n, m = value.numerator, value.denominator
+    q = (n.bit_length() - m.bit_length() - _SQRT_BIT_WIDTH) // 2
+    if q >= 0:
+        n, m, denominator, shift = n, m << 2 * q, 1, q
+    else:
+        n, m, denominator, shift = n << -2 * q, m, 1 << -q, 0
+    root = math.isqrt(n // m)
+    # Zaokrąglenie "do nieparzystej" - bit niedokładności dla końcowej konwersji na float
+    root |= root * root * m != n
+    return (root << shift) / denominator
+
+
+def _grouped(frame_values, codes, size):
+    """(liczności, dokładne sumy, minima, maksima) wartości w grupach 0..size-1."""
+    counts = np.bincount(codes, minlength=size)
+    sums = exact_sums(frame_values, codes, size)
+    order = np.argsort(codes, kind='stable')
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    ordered = frame_values[order]
+    minima = np.fmin.reduceat(ordered, starts)
+    maxima = np.fmax.reduceat(ordered, starts)
+    # Jak min()/max(): NaN jako pierwsza wartość grupy daje NaN, dalsze NaN są pomijane
+    first_nan = np.isnan(ordered[starts])
+    minima[first_nan] = np.nan
+    maxima[first_nan] = np.nan
+    return counts, sums, minima, maxima
+
+
+def _first_appearance(codes):
+    """Kody grup przenumerowane według pierwszego wystąpienia + liczba grup."""
+    _, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+    rank = np.empty(len(first), dtype=np.int64)
+    rank[np.argsort(first, kind='stable')] = np.arange(len(first))
+    return rank[inverse], rank, len(first)
+
+
+def calculate_cost_analysis(frame):
+    energy = frame.subset(frame.metric_mask('power_kw'))
+    if not len(energy):
+        return {
+            "total_consumption_kwh": 0,
+            "average_power_kw": 0,
+            "peak_power_kw": 0,
+            "estimated_cost": 0,
+            "cost_per_location": {}
+        }
+
+    groups, rank, size = _first_appearance(energy.location_codes)
+    counts, sums, _, _ = _grouped(energy.values, groups, size)
+    # Kolejność lokalizacji jak w słowniku budowanym pętlą po odczytach
+    labels = [None] * size
+    for code, position in zip(np.unique(energy.location_codes).tolist(), rank.tolist()):
+        labels[position] = energy.location_labels[code]
+
+    return AnalysisUtils._cost_result(
+        total_kwh=float(energy.total()),
+        avg_power=energy.mean(),
+        peak_power=float(energy.values[energy.peak_index()]),
+        count=len(energy),
+        per_location={
+            labels[group]: (float(sums[group]), float(sums[group] / int(counts[group])))
+            for group in range(size)
+        },
+    )
+
+
+def calculate_peak_load(frame):
+    if not len(frame):
+        return {
+            "peak_value": 0,
+            "peak_timestamp": None,
+            "peak_location": None,
+            "peak_device": None,
+            "average_value": 0
+        }
+
+    peak_reading = frame.record(frame.peak_index())
+    threshold = AnalysisUtils.peak_threshold(peak_reading['value'])
+    peak_events = int(np.count_nonzero(frame.values >= threshold))
+    return AnalysisUtils._peak_result(peak_reading, frame.mean(), peak_events)
+
+
+def detect_anomalies(frame, threshold_std=3.0):
+    if len(frame) < 3:
+        return {
+            "anomalies_detected": False,
+            "anomalies": [],
+            "anomaly_count": 0
+        }
+
+    values = frame.values
+    mean_value = frame.mean()
+    std_dev = frame.stdev()
+    if std_dev == 0:
+        return {
+            "anomalies_detected": False,
+            "anomalies": [],
+            "anomaly_count": 0,
+            "reason": "No variation in data"
+        }
+
+    lower_bound = mean_value - (threshold_std * std_dev)
+    upper_bound = mean_value + (threshold_std * std_dev)
+    anomalies = []
+    for idx in np.flatnonzero((values < lower_bound) | (values > upper_bound)).tolist():
+        reading = frame.record(idx)
+        value = reading['value']
+        anomalies.append({
+            "index": idx,
+            "reading_id": reading.get('id'),
+            "timestamp": reading.get('timestamp'),
+            "location": reading.get('location'),
+            "device_id": reading.get('device_id'),
+            "metric": reading.get('metric'),
+            "value": value,
+            "deviation": abs(value - mean_value) / std_dev,
+            "type": "high" if value > upper_bound else "low"
+        })
+
+    return {
+        "anomalies_detected": len(anomalies) > 0,
+        "anomalies": anomalies,
+        "anomaly_count": len(anomalies),
+        "statistics": {
+            "mean": round(mean_value, 2),
+            "std_dev": round(std_dev, 2),
+            "lower_bound": round(lower_bound, 2),
+            "upper_bound": round(upper_bound, 2)
+        }
+    }
+
+
+def calculate_trends(frame):
+    if len(frame) < 2:
+        return AnalysisUtils._trend_result(None, None)
+
+    values = frame.values[frame.order()]
+    half = len(values) // 2
+    return AnalysisUtils._trend_result(mean(values[:half]), mean(values[half:]))
+
+
+def _period_buckets(timestamps, period):
+    key_format = PERIOD_FORMATS.get(period, PERIOD_FORMATS['daily'])
+    valid = timestamps != MISSING_TIMESTAMP
+    if not valid.any():
+        return [], np.empty(0, dtype=np.int64), valid
+
+    # Formatujemy tylko unikalne (przycięte) znaczniki, nie każdy odczyt
+    floors = timestamps[valid].astype('datetime64[us]').astype(f"datetime64[{PERIOD_UNITS.get(period, 'D')}]")
+    unique_floors, floor_codes = np.unique(floors, return_inverse=True)
+    key_index = {}
+    floor_keys = np.array([
+        key_index.setdefault(floor.astype('datetime64[us]').item().strftime(key_format), len(key_index))
+        for floor in unique_floors
+    ], dtype=np.int64)
+    groups, rank, size = _first_appearance(floor_keys[floor_codes])
+
+    keys = [None] * size
+    for key, code in key_index.items():
+        keys[rank[code]] = key
+    return keys, groups, valid
+
+
+def aggregate_by_time_period(frame, period='daily'):
+    keys, groups, valid = frame.buckets(period)
+    if not keys:
+        return {}
+
+    size = len(keys)
+    counts, sums, minima, maxima = _grouped(frame.values[valid], groups, size)
+    return {
+        keys[group]: AnalysisUtils._bucket_result(
+            int(counts[group]), float(sums[group]), float(sums[group] / int(counts[group])),
+            float(minima[group]), float(maxima[group])
+        )
+        for group in range(size)
+    }
+
+
+def period_summary(frame):
+    """Podsumowanie okresu dla compare_periods (count, avg, median, max, min)."""
+    values = frame.values[~np.isnan(frame.values)]
+    if not len(values):
+        return {"count": 0}
+
+    ordered = np.sort(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        median = float(ordered[middle])
+    else:
+        median = (float(ordered[middle - 1]) + float(ordered[middle])) / 2
+    return {
+        "count": len(values),
+        "avg": mean(values),
+        "median": median,
+        "max": float(ordered[-1]),
+        "min": float(ordered[0]),
+    }
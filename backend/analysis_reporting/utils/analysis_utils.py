@@ -1,12 +1,51 @@
 """
 Utilities dla obliczeń analitycznych w module analysis_reporting
 Zawiera funkcje do analizy danych z sensorów
+
+Odczyty (lista słowników) są raz zamieniane na kolumny NumPy (utils.analysis_kernel.ReadingFrame),
+Report.get_frame() zwraca taką ramkę bez budowania listy słowników.
+QuerySet DeviceReading na PostgreSQL jest agregowany w bazie (utils.sql_aggregation) - z tymi samymi
+wynikami co ramka tych odczytów w kolejności (timestamp, id).
 """
 
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Union
 from datetime import datetime, timedelta
-from django.db.models import Avg, Max, Min, Sum, Count, Q
-import statistics
+from django.db.models import Avg, Max, Min, Sum, Count, Q, QuerySet
+
+# Cena za kWh (przykładowo 0.15 EUR/kWh)
+COST_PER_KWH = 0.15
+
+# Formaty kluczy aggregate_by_time_period
+PERIOD_FORMATS = {
+    'hourly': '%Y-%m-%d %H:00',
+    'daily': '%Y-%m-%d',
+    'weekly': '%Y-W%W',
+    'monthly': '%Y-%m',
+}
+
+# Lista słowników, analysis_kernel.ReadingFrame albo QuerySet DeviceReading
+Readings = Union[List[Dict[str, Any]], QuerySet, Any]
+
+
+def _kernel(readings):
+    """(moduł analysis_kernel, ReadingFrame odczytów)"""
+    from . import analysis_kernel
+    return analysis_kernel, analysis_kernel.ReadingFrame.of(readings)
+
+
+def _compute(name, readings, *args):
+    """
+    Analiza `name` - dla QuerySetu na PostgreSQL w bazie (utils.sql_aggregation),
+    w pozostałych przypadkach i przy NaN/inf w odczytach na ramce (utils.analysis_kernel)
+    """
+    if isinstance(readings, QuerySet):
+        from . import sql_aggregation
+        if sql_aggregation.is_available(readings):
+            result = getattr(sql_aggregation, name)(readings, *args)
+            if result is not None:
+                return result
+    kernel, frame = _kernel(readings)
+    return getattr(kernel, name)(frame, *args)
 
 
 class AnalysisUtils:
@@ -15,7 +54,7 @@ class AnalysisUtils:
     """
     
     @staticmethod
-    def calculate_cost_analysis(readings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def calculate_cost_analysis(readings: Readings) -> Dict[str, Any]:
         """
         Oblicza analizę kosztów na podstawie odczytów energii
         
@@ -25,58 +64,31 @@ class AnalysisUtils:
         Returns:
             Słownik z analizą kosztów
         """
-        energy_readings = [
-            r for r in readings 
-            if r.get('metric') == 'power_kw'
-        ]
-        
-        if not energy_readings:
-            return {
-                "total_consumption_kwh": 0,
-                "average_power_kw": 0,
-                "peak_power_kw": 0,
-                "estimated_cost": 0,
-                "cost_per_location": {}
-            }
-        
-        # Obliczenia
-        values = [r['value'] for r in energy_readings]
-        total_kwh = sum(values)
-        avg_power = statistics.mean(values)
-        peak_power = max(values)
-        
-        # Zakładamy cenę za kWh (przykładowo 0.15 EUR/kWh)
-        cost_per_kwh = 0.15
-        estimated_cost = total_kwh * cost_per_kwh
-        
-        # Analiza per lokalizacja
-        locations = {}
-        for reading in energy_readings:
-            loc = reading.get('location', 'Unknown')
-            if loc not in locations:
-                locations[loc] = []
-            locations[loc].append(reading['value'])
-        
+        return _compute('calculate_cost_analysis', readings)
+    
+    @staticmethod
+    def _cost_result(total_kwh, avg_power, peak_power, count, per_location) -> Dict[str, Any]:
+        """Wynik calculate_cost_analysis; per_location: {lokalizacja: (suma kWh, średnia kW)}"""
         cost_per_location = {
             loc: {
-                "consumption_kwh": sum(vals),
-                "avg_power_kw": statistics.mean(vals),
-                "cost": sum(vals) * cost_per_kwh
+                "consumption_kwh": consumption,
+                "avg_power_kw": avg,
+                "cost": consumption * COST_PER_KWH
             }
-            for loc, vals in locations.items()
+            for loc, (consumption, avg) in per_location.items()
         }
         
         return {
             "total_consumption_kwh": round(total_kwh, 2),
             "average_power_kw": round(avg_power, 2),
             "peak_power_kw": round(peak_power, 2),
-            "estimated_cost": round(estimated_cost, 2),
+            "estimated_cost": round(total_kwh * COST_PER_KWH, 2),
             "cost_per_location": cost_per_location,
-            "readings_count": len(energy_readings)
+            "readings_count": count
         }
     
     @staticmethod
-    def calculate_peak_load(readings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def calculate_peak_load(readings: Readings) -> Dict[str, Any]:
         """
         Analizuje szczytowe obciążenia
         
@@ -86,29 +98,15 @@ class AnalysisUtils:
         Returns:
             Słownik z analizą szczytów
         """
-        if not readings:
-            return {
-                "peak_value": 0,
-                "peak_timestamp": None,
-                "peak_location": None,
-                "peak_device": None,
-                "average_value": 0
-            }
-        
-        # Znajdź szczyt
-        peak_reading = max(readings, key=lambda x: x.get('value', 0))
-        
-        # Oblicz średnią
-        values = [r['value'] for r in readings]
-        avg_value = statistics.mean(values)
-        
-        # Znajdź wszystkie szczyty (wartości > 90% max)
-        threshold = peak_reading['value'] * 0.9
-        peak_events = [
-            r for r in readings 
-            if r['value'] >= threshold
-        ]
-        
+        return _compute('calculate_peak_load', readings)
+    
+    @staticmethod
+    def peak_threshold(peak_value: float) -> float:
+        return peak_value * 0.9
+    
+    @staticmethod
+    def _peak_result(peak_reading: Dict[str, Any], avg_value: float, peak_events_count: int) -> Dict[str, Any]:
+        """Wynik calculate_peak_load; peak_reading - odczyt z maksymalną wartością"""
         return {
             "peak_value": peak_reading['value'],
             "peak_timestamp": peak_reading.get('timestamp'),
@@ -116,106 +114,49 @@ class AnalysisUtils:
             "peak_device": peak_reading.get('device_id'),
             "peak_metric": peak_reading.get('metric'),
             "average_value": round(avg_value, 2),
-            "peak_events_count": len(peak_events),
-            "peak_threshold": round(threshold, 2)
+            "peak_events_count": peak_events_count,
+            "peak_threshold": round(AnalysisUtils.peak_threshold(peak_reading['value']), 2)
         }
     
     @staticmethod
-    def detect_anomalies(readings: List[Dict[str, Any]], 
+    def detect_anomalies(readings: Readings, 
                         threshold_std: float = 3.0) -> Dict[str, Any]:
         """
         Wykrywa anomalie w danych używając metody odchylenia standardowego
         
         Args:
-            readings: Lista odczytów z sensorów
+            readings: Lista odczytów z sensorów lub ReadingFrame
             threshold_std: Próg wykrywania (ilość odchyleń standardowych)
         
         Returns:
             Słownik z wykrytymi anomaliami
         """
-        if len(readings) < 3:
-            return {
-                "anomalies_detected": False,
-                "anomalies": [],
-                "anomaly_count": 0
-            }
-        
-        values = [r['value'] for r in readings]
-        mean_value = statistics.mean(values)
-        
-        try:
-            std_dev = statistics.stdev(values)
-        except statistics.StatisticsError:
-            std_dev = 0
-        
-        if std_dev == 0:
-            return {
-                "anomalies_detected": False,
-                "anomalies": [],
-                "anomaly_count": 0,
-                "reason": "No variation in data"
-            }
-        
-        # Wykryj anomalie
-        anomalies = []
-        lower_bound = mean_value - (threshold_std * std_dev)
-        upper_bound = mean_value + (threshold_std * std_dev)
-        
-        for idx, reading in enumerate(readings):
-            value = reading['value']
-            if value < lower_bound or value > upper_bound:
-                anomalies.append({
-                    "index": idx,
-                    "reading_id": reading.get('id'),
-                    "timestamp": reading.get('timestamp'),
-                    "location": reading.get('location'),
-                    "device_id": reading.get('device_id'),
-                    "metric": reading.get('metric'),
-                    "value": value,
-                    "deviation": abs(value - mean_value) / std_dev,
-                    "type": "high" if value > upper_bound else "low"
-                })
-        
-        return {
-            "anomalies_detected": len(anomalies) > 0,
-            "anomalies": anomalies,
-            "anomaly_count": len(anomalies),
-            "statistics": {
-                "mean": round(mean_value, 2),
-                "std_dev": round(std_dev, 2),
-                "lower_bound": round(lower_bound, 2),
-                "upper_bound": round(upper_bound, 2)
-            }
-        }
+        kernel, frame = _kernel(readings)
+        return kernel.detect_anomalies(frame, threshold_std)
     
     @staticmethod
-    def calculate_trends(readings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def calculate_trends(readings: Readings) -> Dict[str, Any]:
         """
         Oblicza trendy w danych czasowych
         
         Args:
-            readings: Lista odczytów z sensorów (muszą być posortowane chronologicznie)
+            readings: Lista odczytów z sensorów
         
         Returns:
             Słownik z analizą trendów
         """
-        if len(readings) < 2:
+        return _compute('calculate_trends', readings)
+    
+    @staticmethod
+    def _trend_result(avg_first, avg_second) -> Dict[str, Any]:
+        """Wynik calculate_trends ze średnich pierwszej i drugiej połowy (None - za mało danych)"""
+        if avg_first is None or avg_second is None:
             return {
                 "trend": "insufficient_data",
                 "trend_direction": None,
                 "change_percentage": 0
             }
         
-        # Sortuj chronologicznie
-        sorted_readings = sorted(readings, key=lambda x: x.get('timestamp', ''))
-        
-        values = [r['value'] for r in sorted_readings]
-        first_half = values[:len(values)//2]
-        second_half = values[len(values)//2:]
-        
-        avg_first = statistics.mean(first_half)
-        avg_second = statistics.mean(second_half)
-        
         change = avg_second - avg_first
         change_percentage = (change / avg_first * 100) if avg_first != 0 else 0
         
@@ -237,7 +178,7 @@ class AnalysisUtils:
         }
     
     @staticmethod
-    def aggregate_by_time_period(readings: List[Dict[str, Any]], 
+    def aggregate_by_time_period(readings: Readings, 
                                  period: str = 'daily') -> Dict[str, Any]:
         """
         Agreguje dane według okresów czasowych
@@ -249,55 +190,23 @@ class AnalysisUtils:
         Returns:
             Słownik z zagregowanymi danymi
         """
-        from collections import defaultdict
-        
-        aggregated = defaultdict(list)
-        
-        for reading in readings:
-            timestamp = reading.get('timestamp')
-            if not timestamp:
-                continue
-            
-            # Parsuj timestamp jeśli to string
-            if isinstance(timestamp, str):
-                try:
-                    from django.utils.dateparse import parse_datetime
-                    timestamp = parse_datetime(timestamp)
-                except:
-                    continue
-            
-            # Określ klucz agregacji
-            if period == 'hourly':
-                key = timestamp.strftime('%Y-%m-%d %H:00')
-            elif period == 'daily':
-                key = timestamp.strftime('%Y-%m-%d')
-            elif period == 'weekly':
-                key = timestamp.strftime('%Y-W%W')
-            elif period == 'monthly':
-                key = timestamp.strftime('%Y-%m')
-            else:
-                key = timestamp.strftime('%Y-%m-%d')
-            
-            aggregated[key].append(reading['value'])
-        
-        # Oblicz statystyki dla każdego okresu
-        result = {}
-        for period_key, values in aggregated.items():
-            result[period_key] = {
-                "count": len(values),
-                "sum": round(sum(values), 2),
-                "average": round(statistics.mean(values), 2),
-                "min": round(min(values), 2),
-                "max": round(max(values), 2)
-            }
-        
-        return result
+        return _compute('aggregate_by_time_period', readings, period)
     
     @staticmethod
-    def compare_periods(period_one_readings: List[Dict[str, Any]], 
-                       period_two_readings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _bucket_result(count, total, average, minimum, maximum) -> Dict[str, Any]:
+        return {
+            "count": count,
+            "sum": round(total, 2),
+            "average": round(average, 2),
+            "min": round(minimum, 2),
+            "max": round(maximum, 2)
+        }
+    
+    @staticmethod
+    def compare_periods(period_one_readings: Readings, 
+                       period_two_readings: Readings) -> Dict[str, Any]:
         """
-        Porównuje dane z dwóch okresów (listy readings)
+        Porównuje dane z dwóch okresów (listy readings, ReadingFrame lub QuerySet)
         
         Args:
             period_one_readings: Lista odczytów z pierwszego okresu
@@ -306,26 +215,30 @@ class AnalysisUtils:
         Returns:
             Słownik z porównaniem statystyk
         """
-        # Wyciągnij wartości z obu okresów
-        values_one = [r['value'] for r in period_one_readings if 'value' in r and r['value'] is not None]
-        values_two = [r['value'] for r in period_two_readings if 'value' in r and r['value'] is not None]
-        
-        if not values_one or not values_two:
+        return AnalysisUtils._comparison_result(
+            _compute('period_summary', period_one_readings),
+            _compute('period_summary', period_two_readings),
+        )
+    
+    @staticmethod
+    def _comparison_result(period1: Dict[str, Any], period2: Dict[str, Any]) -> Dict[str, Any]:
+        """Wynik compare_periods z podsumowań okresów (count, avg, median, max, min)"""
+        if not period1['count'] or not period2['count']:
             return {
                 "error": "Insufficient data for comparison",
-                "period1_count": len(values_one),
-                "period2_count": len(values_two)
+                "period1_count": period1['count'],
+                "period2_count": period2['count']
             }
         
-        # Oblicz statystyki dla obu okresów
-        period1_avg = statistics.mean(values_one)
-        period2_avg = statistics.mean(values_two)
-        period1_median = statistics.median(values_one)
-        period2_median = statistics.median(values_two)
-        period1_max = max(values_one)
-        period2_max = max(values_two)
-        period1_min = min(values_one)
-        period2_min = min(values_two)
+        # Statystyki obu okresów
+        period1_avg = period1['avg']
+        period2_avg = period2['avg']
+        period1_median = period1['median']
+        period2_median = period2['median']
+        period1_max = period1['max']
+        period2_max = period2['max']
+        period1_min = period1['min']
+        period2_min = period2['min']
         
         # Oblicz różnice
         avg_difference = period2_avg - period1_avg
@@ -351,6 +264,6 @@ class AnalysisUtils:
             "difference": round(avg_difference, 2),
             "percentage_change": round(percentage_change, 2),
             "trend": trend,
-            "period1_count": len(values_one),
-            "period2_count": len(values_two)
+            "period1_count": period1['count'],
+            "period2_count": period2['count']
         }
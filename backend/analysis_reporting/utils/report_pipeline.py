@@ -0,0 +1,121 @@
+"""
+Jednoprzebiegowe generowanie analiz i wykresów raportu.
+
+- odczyty raportu są wczytywane raz (Report.get_frame - kolumny pliku IOCOL),
+  a nie osobno dla każdej analizy i każdego wykresu
+- wspólne statystyki (kolejność chronologiczna, dokładne sumy, średnia, odchylenie, szczyt,
+  kubełki okresów) liczy i zapamiętuje ReadingFrame - każda analiza bierze gotowe wartości
+- jedno sortowanie na raport: ReadingFrame.order() służy trendom i wszystkim wykresom;
+  wykresy dostają ChartSeries (tablice datetime64 + wartości) zamiast listy słowników
+  z ponownie parsowanymi znacznikami ISO
+- wyniki analiz są identyczne z AnalysisUtils (te same funkcje analysis_kernel)
+- analizy liczone są na zapisanej migawce odczytów raportu (plik IOCOL), nie na bieżącej
+  tabeli DeviceReading - wyniki nie zmieniają się po imporcie nowych danych
+- przy generowaniu raportu (for_snapshot) trendy i szczyt liczy PostgreSQL
+  (utils.sql_aggregation) na tej samej migawce, z której powstaje plik - kryteria raportu
+  + id odczytu <= max_reading_id w jednej transakcji REPEATABLE READ; ramka jest wtedy
+  wczytywana dopiero dla wykresów i anomalii
+"""
+
+import numpy as np
+
+from . import analysis_kernel, sql_aggregation
+
+
+class ChartSeries:
+    """
+    Punkty wykresu w kolejności chronologicznej (bez odczytów bez czasu lub wartości).
+
+    rows[i] to indeks odczytu w ramce dla i-tego punktu.
+    """
+
+    def __init__(self, timestamps, values, rows, frame_size):
+        self.timestamps = timestamps
+        self.values = values
+        self.rows = rows
+        # Odwrotność rows: indeks odczytu -> pozycja punktu (-1 - odczyt pominięty)
+        self._positions = np.full(frame_size, -1, dtype=np.int64)
+        self._positions[rows] = np.arange(len(rows))
+
+    def __len__(self):
+        return len(self.values)
+
+    def positions(self, indices):
+        """Indeksy odczytów w ramce (np. 'index' anomalii) -> pozycje punktów na wykresie."""
+        indices = np.asarray(indices, dtype=np.int64)
+        indices = indices[(indices >= 0) & (indices < len(self._positions))]
+        positions = self._positions[indices]
+        return positions[positions >= 0].tolist()
+
+
+class ReportPipeline:
+    """Analizy i wykresy raportu liczone na jednej ramce odczytów."""
+
+    def __init__(self, frame, precomputed=None):
+        # ReadingFrame albo funkcja ją zwracająca (wczytanie przy pierwszym użyciu)
+        self._frame = frame
+        # Wyniki analiz policzone już w bazie: {nazwa metody: wynik}
+        self._precomputed = precomputed or {}
+        self._series = None
+
+    @classmethod
+    def for_report(cls, report):
+        return cls(report.get_frame)
+
+    @classmethod
+    def for_snapshot(cls, report, readings):
+        """
+        Pipeline raportu, którego plik właśnie zapisano z QuerySetu `readings` - trendy i szczyt
+        są liczone od razu w PostgreSQL, więc trzeba wywołać w tej samej transakcji co zapis pliku
+        (sql_aggregation.repeatable_read). Poza PostgreSQL i przy NaN/inf liczy ramka z pliku.
+        """
+        precomputed = {}
+        if sql_aggregation.is_available(readings):
+            for name, compute in (('trends', sql_aggregation.calculate_trends),
+                                  ('peak_load', sql_aggregation.calculate_peak_load)):
+                result = compute(readings)
+                if result is not None:
+                    precomputed[name] = result
+        return cls(report.get_frame, precomputed)
+
+    @property
+    def frame(self):
+        if callable(self._frame):
+            self._frame = self._frame()
+        return self._frame
+
+    def __len__(self):
+        return len(self.frame)
+
+    def trends(self):
+        if 'trends' in self._precomputed:
+            return dict(self._precomputed['trends'])
+        return analysis_kernel.calculate_trends(self.frame)
+
+    def peak_load(self):
+        if 'peak_load' in self._precomputed:
+            return dict(self._precomputed['peak_load'])
+        return analysis_kernel.calculate_peak_load(self.frame)
+
+    def anomalies(self, threshold_std=3.0):
+        return analysis_kernel.detect_anomalies(self.frame, threshold_std)
+
+    def cost_analysis(self):
+        return analysis_kernel.calculate_cost_analysis(self.frame)
+
+    def aggregate(self, period='daily'):
+        return analysis_kernel.aggregate_by_time_period(self.frame, period)
+
+    def chart_series(self):
+        if self._series is None:
+            frame = self.frame
+            order = frame.order()
+            keep = (frame.timestamps[order] != analysis_kernel.MISSING_TIMESTAMP) & ~np.isnan(frame.values[order])
+            rows = order[keep]
+            self._series = ChartSeries(
+                timestamps=frame.timestamps[rows].astype('datetime64[us]'),
+                values=frame.values[rows],
+                rows=rows,
+                frame_size=len(frame),
+            )
+        return self._series
@@ -0,0 +1,146 @@
+"""
+Przechowywanie zbioru odczytów raportu poza wierszem Report.
+
+- odczyty raportu są zapisywane jako plik kolumnowy IOCOL (data_acquisition.utils.columnar)
+  w MEDIA_ROOT/REPORT_DATA_DIR/<report_id>.iocol - zapis strumieniowy prosto z querysetu,
+  bez budowania listy słowników i bez wielomegabajtowego JSON-a w bazie
+- Report.data_file przechowuje ścieżkę względną, Report.data_for_analysis już tylko metadane
+  (count, criteria, fetched_at)
+- odczyt (Report.get_readings) mapuje plik i zwraca listę słowników w dotychczasowym
+  kształcie: id, timestamp (ISO 8601), device_id, device_type, location, metric, value,
+  unit, signal_dbm, status
+- analizy (Report.get_frame) czytają kolumny pliku bezpośrednio do analysis_kernel.ReadingFrame
+- raporty sprzed zmiany mają odczyty w data_for_analysis['readings'] - get_readings
+  używa ich, dopóki komenda offload_report_data nie przeniesie ich do pliku
+"""
+
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+from data_acquisition.utils import columnar
+
+DEFAULT_DATA_DIR = 'report_data'
+
+
+def _data_dir():
+    return getattr(settings, 'REPORT_DATA_DIR', DEFAULT_DATA_DIR)
+
+
+def relative_path(report_id):
+    return os.path.join(_data_dir(), f'{report_id}.{columnar.FILE_EXTENSION}')
+
+
+def full_path(path):
+    return os.path.join(str(settings.MEDIA_ROOT), path)
+
+
+def write_readings(report_id, readings):
+    """
+    Zapisuje odczyty (queryset DeviceReading) do pliku raportu w kolejności (timestamp, id) -
+    tej samej, w której liczy utils.sql_aggregation (szczyt, połowy trendu, pierwsze wystąpienia).
+
+    Returns:
+        (ścieżka względna, liczba zapisanych odczytów)
+    """
+    path = relative_path(report_id)
+    os.makedirs(os.path.dirname(full_path(path)), exist_ok=True)
+    count = columnar.write_file(readings.order_by('timestamp', 'id'), full_path(path))
+    return path, count
+
+
+def write_records(report_id, records):
+    """
+    Zapisuje odczyty w dotychczasowym kształcie słowników (data_for_analysis['readings'])
+    do pliku raportu - dla przenoszenia starych raportów.
+
+    Returns:
+        (ścieżka względna, liczba zapisanych odczytów)
+    """
+    rows = []
+    for record in records:
+        timestamp = record['timestamp']
+        if isinstance(timestamp, str):
+            timestamp = parse_datetime(timestamp)
+        rows.append((
+            record.get('id') or 0, timestamp, record['device_id'], record.get('device_type') or '',
+            record.get('location') or '', record.get('metric') or '', record['value'],
+            record.get('unit') or '', record.get('signal_dbm') or 0, bool(record.get('status', True)),
+        ))
+
+    path = relative_path(report_id)
+    os.makedirs(os.path.dirname(full_path(path)), exist_ok=True)
+    encoder = columnar.ColumnarEncoder()
+    with open(full_path(path), 'wb') as f:
+        f.write(encoder.header())
+        for start in range(0, len(rows), columnar.DEFAULT_BATCH_SIZE):
+            f.write(encoder.encode_batch(rows[start:start + columnar.DEFAULT_BATCH_SIZE]))
+        f.write(encoder.footer())
+    return path, len(rows)
+
+
+def read_readings(path):
+    """Odczyty z pliku raportu jako lista słowników (kształt jak dawne data_for_analysis['readings'])."""
+    with columnar.ColumnarFile(full_path(path)) as data:
+        records = data.to_records()
+    return [
+        {
+            'id': record['id'],
+            # Jak datetime.isoformat() w dawnych raportach
+            'timestamp': record['timestamp'].replace('Z', '+00:00'),
+            'device_id': record['device'],
+            'device_type': record['device_type'],
+            'location': record['location'],
+            'metric': record['metric'],
+            'value': record['value'],
+            'unit': record['unit'],
+            'signal_dbm': record['signal_dbm'],
+            'status': record['status'],
+        }
+        for record in records
+    ]
+
+
+def read_frame(path):
+    """Odczyty z pliku raportu jako ReadingFrame (kolumny bez listy słowników)."""
+    from .analysis_kernel import EPOCH, ReadingFrame
+
+    with columnar.ColumnarFile(full_path(path)) as data:
+        # Kopie - widoki na mmap są nieważne po zamknięciu pliku
+        columns = {name: data.column(name).copy() for name in columnar.COLUMN_NAMES}
+        dictionaries = data.dictionaries
+
+    def record(i):
+        # Ten sam kształt co read_readings(path)[i]
+        return {
+            'id': int(columns['id'][i]),
+            'timestamp': (EPOCH + timedelta(microseconds=int(columns['timestamp'][i]))).isoformat(),
+            'device_id': int(columns['device'][i]),
+            'device_type': dictionaries['device_type'][columns['device_type'][i]],
+            'location': dictionaries['location'][columns['location'][i]],
+            'metric': dictionaries['metric'][columns['metric'][i]],
+            'value': float(columns['value'][i]),
+            'unit': dictionaries['unit'][columns['unit'][i]],
+            'signal_dbm': int(columns['signal_dbm'][i]),
+            'status': bool(columns['status'][i]),
+        }
+
+    return ReadingFrame(
+        timestamps=columns['timestamp'],
+        values=columns['value'],
+        devices=columns['device'].astype('int64'),
+        location_codes=columns['location'],
+        location_labels=dictionaries['location'],
+        metric_codes=columns['metric'],
+        metric_labels=dictionaries['metric'],
+        record=record,
+    )
+
+
+def delete(path):
+    try:
+        os.remove(full_path(path))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,273 @@
+"""
+Agregacje AnalysisUtils liczone w PostgreSQL na QuerySecie DeviceReading.
+
+- do Pythona trafia tylko wynik zgrupowany (kubeł czasu / lokalizacja / połowa x wykładnik),
+  a nie lista odczytów - czas zależy od liczby grup, a nie od liczby odczytów
+- wyniki są identyczne z analysis_kernel (i z dawnymi pętlami po liście słowników), jeśli
+  odczyty są w kolejności (timestamp, id) - w takiej kolejności jest zapisywany plik raportu:
+  - sumy i średnie są dokładne: value = units * 2^exponent (bity IEEE 754 z float8send),
+    sum(units) w grupie wykładnika to numeric bez zaokrągleń, a całość jest składana
+    w Fraction i zaokrąglana raz - jak exact_sums / statistics.mean; avg() i sum() na float8
+    zaokrąglają po każdym dodaniu
+  - szczyt: pierwsze maksimum w kolejności (timestamp, id); połowy trendu:
+    row_number() OVER (ORDER BY timestamp, id)
+  - lokalizacje w kolejności pierwszego wystąpienia, kubełki chronologicznie
+  - kubełki: date_trunc w UTC, tydzień przycinany do początku roku (klucz '%Y-W%W')
+  - mediana: dwa środkowe odczyty z percentile_disc i ich średnia liczona w Pythonie
+    (percentile_cont interpoluje inaczej niż statistics.median)
+- NaN/inf w odczytach: funkcje zwracają None i liczy analysis_kernel (semantyka min()/max()
+  i przenoszenia NaN z wersji listowej)
+- używane przez AnalysisUtils (QuerySet na PostgreSQL) i ReportPipeline.for_snapshot
+"""
+
+from contextlib import contextmanager
+from datetime import timezone as dt_timezone
+from fractions import Fraction
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, transaction
+
+from .analysis_utils import AnalysisUtils, PERIOD_FORMATS
+
+# Kubełki aggregate_by_time_period (nieznany okres - dzienny, jak w wersji listowej)
+PERIOD_KINDS = {
+    'hourly': 'hour',
+    'daily': 'day',
+    'weekly': 'week',
+    'monthly': 'month',
+}
+
+# Odczyty źródła z rozkładem value = units * 2^exponent (dokładnie, także dla liczb subnormalnych)
+_DECOMPOSED = """
+    SELECT *,
+           CASE WHEN bits < 0 THEN -mantissa ELSE mantissa END AS units,
+           greatest(biased, 1) - 1075 AS exponent,
+           biased = 2047 AS non_finite
+    FROM (
+        SELECT *,
+               (bits >> 52) & 2047 AS biased,
+               CASE WHEN (bits >> 52) & 2047 = 0 THEN bits & 4503599627370495
+                    ELSE (bits & 4503599627370495) | 4503599627370496 END AS mantissa
+        FROM (
+            SELECT *, ('x' || encode(float8send(value), 'hex'))::bit(64)::bigint AS bits
+            FROM ({source}) AS source
+        ) AS raw
+    ) AS decomposed
+"""
+
+
+def is_available(readings):
+    return connections[readings.db].vendor == 'postgresql'
+
+
+@contextmanager
+def repeatable_read(using='default'):
+    """
+    Transakcja, w której wszystkie zapytania widzą tę samą migawkę bazy (REPEATABLE READ
+    w PostgreSQL) - zapis pliku raportu i agregacje SQL liczą te same odczyty.
+    Wewnątrz istniejącej transakcji poziom izolacji zostaje bez zmian.
+    """
+    connection = connections[using]
+    outermost = not connection.in_atomic_block
+    with transaction.atomic(using=using):
+        if outermost and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        yield
+
+
+def _fetch(readings, fields, select, params=()):
+    """
+    Wiersze zapytania `select` na rozłożonych odczytach (None - filtr na pewno nic nie zwróci).
+
+    select: SQL z {decomposed} w miejscu podzapytania z kolumnami `fields` i units/exponent/non_finite
+    (albo {source} - same kolumny `fields`); params - parametry `select` występujące przed podzapytaniem
+    """
+    try:
+        source, source_params = readings.order_by().values(*fields).query.sql_with_params()
+    except EmptyResultSet:
+        return None
+    with connections[readings.db].cursor() as cursor:
+        cursor.execute(
+            select.format(decomposed=_DECOMPOSED.format(source=source), source=source),
+            [*params, *source_params],
+        )
+        return cursor.fetchall()
+
+
+class _Group:
+    """Liczność, dokładna suma, min, max i pierwsze wystąpienie grupy składanej z wierszy wykładników."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = Fraction(0)
+        self.minimum = None
+        self.maximum = None
+        self.first = None
+
+    def add(self, count, units, exponent, minimum=None, maximum=None, first=None):
+        self.count += count
+        self.total += Fraction(int(units)) * Fraction(2) ** exponent
+        if minimum is not None and (self.minimum is None or minimum < self.minimum):
+            self.minimum = minimum
+        if maximum is not None and (self.maximum is None or maximum > self.maximum):
+            self.maximum = maximum
+        if first is not None and (self.first is None or first < self.first):
+            self.first = first
+
+    def mean(self):
+        return float(self.total / self.count)
+
+
+def _groups(rows):
+    """Wiersze (klucz, exponent, count, sum(units), ..., non_finite) -> {klucz: _Group} (None - NaN/inf)."""
+    groups = {}
+    for key, exponent, count, units, *extra, non_finite in rows:
+        if non_finite:
+            return None
+        groups.setdefault(key, _Group()).add(count, units, exponent, *extra)
+    return groups
+
+
+def calculate_cost_analysis(readings):
+    rows = _fetch(readings.filter(metric='power_kw'), ('id', 'timestamp', 'location', 'value'), """
+        SELECT location, exponent, count(*), sum(units), min(value), max(value), min(position), bool_or(non_finite)
+        FROM (SELECT *, row_number() OVER (ORDER BY "timestamp", id) AS position FROM ({decomposed}) AS d) AS numbered
+        GROUP BY location, exponent
+    """)
+    per_location = _groups(rows or [])
+    if per_location is None:
+        return None
+    if not per_location:
+        return {
+            "total_consumption_kwh": 0,
+            "average_power_kw": 0,
+            "peak_power_kw": 0,
+            "estimated_cost": 0,
+            "cost_per_location": {}
+        }
+
+    total = _Group()
+    for group in per_location.values():
+        total.count += group.count
+        total.total += group.total
+    # Kolejność lokalizacji jak w słowniku budowanym pętlą po odczytach
+    locations = sorted(per_location, key=lambda location: per_location[location].first)
+    return AnalysisUtils._cost_result(
+        total_kwh=float(total.total),
+        avg_power=total.mean(),
+        peak_power=max(group.maximum for group in per_location.values()),
+        count=total.count,
+        per_location={
+            location: (float(per_location[location].total), per_location[location].mean())
+            for location in locations
+        },
+    )
+
+
+def calculate_peak_load(readings):
+    rows = _fetch(readings, ('value',), """
+        SELECT NULL, exponent, count(*), sum(units), bool_or(non_finite)
+        FROM ({decomposed}) AS d
+        GROUP BY exponent
+    """)
+    groups = _groups(rows or [])
+    if groups is None:
+        return None
+    if not groups:
+        return {
+            "peak_value": 0,
+            "peak_timestamp": None,
+            "peak_location": None,
+            "peak_device": None,
+            "average_value": 0
+        }
+
+    peak_reading = (
+        readings.order_by('-value', 'timestamp', 'id')
+        .values('id', 'timestamp', 'location', 'device_id', 'metric', 'value')
+        .first()
+    )
+    # Jak record() ramki z pliku raportu - isoformat w UTC
+    peak_reading['timestamp'] = peak_reading['timestamp'].astimezone(dt_timezone.utc).isoformat()
+    threshold = AnalysisUtils.peak_threshold(peak_reading['value'])
+    peak_events = readings.filter(value__gte=threshold).count()
+    return AnalysisUtils._peak_result(peak_reading, groups[None].mean(), peak_events)
+
+
+def calculate_trends(readings):
+    # Średnie pierwszej i drugiej połowy odczytów (kolejność timestamp, id) jednym zapytaniem
+    rows = _fetch(readings, ('id', 'timestamp', 'value'), """
+        SELECT position > half, exponent, count(*), sum(units), bool_or(non_finite)
+        FROM (
+            SELECT *, row_number() OVER (ORDER BY "timestamp", id) AS position, count(*) OVER () / 2 AS half
+            FROM ({decomposed}) AS d
+        ) AS numbered
+        GROUP BY 1, exponent
+    """)
+    halves = _groups(rows or [])
+    if halves is None:
+        return None
+    if sum(group.count for group in halves.values()) < 2:
+        return AnalysisUtils._trend_result(None, None)
+    return AnalysisUtils._trend_result(halves[False].mean(), halves[True].mean())
+
+
+def _bucket_sql(period):
+    kind = PERIOD_KINDS.get(period, 'day')
+    utc = """"timestamp" AT TIME ZONE 'UTC'"""
+    bucket = f"date_trunc('{kind}', {utc})"
+    if kind == 'week':
+        # '%W' liczy tygodnie w obrębie roku - tydzień na przełomie lat to dwa kubełki
+        bucket = f"greatest({bucket}, date_trunc('year', {utc}))"
+    return bucket
+
+
+def aggregate_by_time_period(readings, period='daily'):
+    key_format = PERIOD_FORMATS.get(period, PERIOD_FORMATS['daily'])
+    rows = _fetch(readings, ('timestamp', 'value'), f"""
+        SELECT {_bucket_sql(period)} AS bucket, exponent, count(*), sum(units), min(value), max(value),
+               bool_or(non_finite)
+        FROM ({{decomposed}}) AS d
+        GROUP BY bucket, exponent
+    """)
+    buckets = _groups(rows or [])
+    if buckets is None:
+        return None
+    # Kubełki rosną z czasem, więc kolejność chronologiczna = kolejność pierwszego wystąpienia
+    return {
+        bucket.strftime(key_format): AnalysisUtils._bucket_result(
+            group.count, float(group.total), group.mean(), group.minimum, group.maximum
+        )
+        for bucket, group in sorted(buckets.items(), key=lambda item: item[0])
+    }
+
+
+def period_summary(readings):
+    """Podsumowanie okresu dla compare_periods (count, avg, median, max, min)."""
+    rows = _fetch(readings, ('value',), """
+        SELECT NULL, exponent, count(*), sum(units), min(value), max(value), bool_or(non_finite)
+        FROM ({decomposed}) AS d
+        GROUP BY exponent
+    """)
+    groups = _groups(rows or [])
+    if groups is None:
+        return None
+    if not groups:
+        return {"count": 0}
+
+    summary = groups[None]
+    middle = summary.count // 2
+    # Pozycje (od 1) środkowych odczytów; percentile_disc(f) to odczyt nr ceil(f * count)
+    positions = [middle + 1] if summary.count % 2 else [middle, middle + 1]
+    (middle_values,), = _fetch(readings, ('value',), """
+        SELECT percentile_disc(%s::float8[]) WITHIN GROUP (ORDER BY value) FROM ({source}) AS source
+    """, [[(position - 0.5) / summary.count for position in positions]])
+    return {
+        "count": summary.count,
+        "avg": summary.mean(),
+        # Jak statistics.median - średnia dwóch środkowych wartości liczona na float
+        "median": (middle_values[0] + middle_values[1]) / 2 if len(middle_values) == 2 else middle_values[0],
+        "max": summary.maximum,
+        "min": summary.minimum,
+    }
@@ -6,9 +6,12 @@ Zawiera ViewSety REST API oraz ReportManager z logiką biznesową
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 import json
+import numpy as np
 
 from django.http import HttpResponse
 from django.utils import timezone
+from django.db.models import Exists, Max, OuterRef
+from django.db.models.functions import TruncDate
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -16,17 +19,22 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
 
-from .models import Report, ReportCriteria, Analysis, Visualization, ReportCompare
+from .models import Report, ReportCriteria, Analysis, Visualization, ReportCompare, ReportJob
 from .serializers import (
     ReportSerializer, 
     ReportCriteriaSerializer, 
     AnalysisSerializer, 
     VisualizationSerializer,
-    ReportCompareSerializer
+    ReportCompareSerializer,
+    ReportJobSerializer
 )
-from data_acquisition.models import DeviceReading
+from data_acquisition.models import Device, DeviceReading
 from .utils.analysis_utils import AnalysisUtils
+from .utils.report_pipeline import ChartSeries, ReportPipeline
+from . import report_jobs
+from .report_jobs import StageTimer
 from .utils.ai_generator import AIGenerator
+from .utils import report_storage, sql_aggregation
 from security.permissions import IsAdmin
 
 
@@ -34,6 +42,11 @@ def index(request):
     return HttpResponse("Analysis & Reporting Module")
 
 
+def _day_start(day):
+    """Początek dnia (00:00) w bieżącej strefie czasowej jako aware datetime"""
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
 # ============================================================================
 #                           REPORT MANAGER
 # ============================================================================
@@ -68,7 +81,7 @@ class ReportManager:
             Obiekt Report lub None
         """
         try:
-            return Report.objects.prefetch_related(
+            return Report.objects.defer('data_for_analysis').prefetch_related(
                 'analyses__visualizations',
                 'report_criteria'
             ).get(report_id=report_id)
@@ -84,7 +97,7 @@ class ReportManager:
         Returns:
             Lista raportów
         """
-        return list(Report.objects.filter(
+        return list(Report.objects.defer('data_for_analysis').filter(
             created_by_id=user_id
         ).prefetch_related(
             'analyses__visualizations',
@@ -98,7 +111,7 @@ class ReportManager:
         Returns:
             Lista wszystkich raportów
         """
-        return list(Report.objects.prefetch_related(
+        return list(Report.objects.defer('data_for_analysis').prefetch_related(
             'analyses__visualizations',
             'report_criteria'
         ).all())
@@ -128,7 +141,7 @@ class ReportManager:
         Returns:
             Lista raportów pasujących do kryteriów
         """
-        return list(Report.objects.filter(
+        return list(Report.objects.defer('data_for_analysis').filter(
             report_criteria=criteria
         ).prefetch_related(
             'analyses__visualizations'
@@ -137,7 +150,8 @@ class ReportManager:
     # ========== Report Generation ==========
     
     @staticmethod
-    def generate_report(report_criteria: ReportCriteria, generate_charts: bool = False, use_ai: bool = False) -> Report:
+    def generate_report(report_criteria: ReportCriteria, generate_charts: bool = False, use_ai: bool = False,
+                        timer: Optional[StageTimer] = None) -> Report:
         """
         Generuje raport na podstawie kryteriów
         
@@ -145,6 +159,7 @@ class ReportManager:
             report_criteria: Kryteria raportu (okres czasu, lokalizacja, typ urządzenia)
             generate_charts: Czy generować wykresy dla analiz
             use_ai: Czy używać AI do generowania opisów (wymaga klucza API Groq)
+            timer: Pomiar czasu etapów i postęp (zadanie ReportJob - report_jobs.run_job)
         
         Returns:
             Wygenerowany obiekt Report z analizami TRENDS i PEAK
@@ -160,35 +175,44 @@ class ReportManager:
             5. Opcjonalnie generuje wykresy
             6. Jeśli use_ai=True, generuje opisy AI dla raportu i analiz
         """
-        # Walidacja kryteriów
-        if not report_criteria.validate_type():
-            raise ValueError("Kryteria raportu są niepełne. Wymagane są daty rozpoczęcia i zakończenia.")
-        
-        if not report_criteria.date_created_from or not report_criteria.date_created_to:
-            raise ValueError("Daty rozpoczęcia i zakończenia są wymagane do wygenerowania raportu.")
-        
-        # Pobierz dane z modułu data_acquisition
-        sensor_data = ReportManager._fetch_sensor_data(report_criteria)
+        timer = timer or StageTimer()
         
-        # Sprawdź czy są dane
-        if sensor_data['count'] == 0:
-            raise ValueError("Brak danych dla podanych kryteriów. Nie można wygenerować raportu.")
-        
-        # Tworzenie raportu z domyślnym opisem
-        report = Report.objects.create(
-            report_criteria=report_criteria,
-            data_for_analysis=sensor_data,
-            report_description=f"Report for period {report_criteria.date_created_from} - {report_criteria.date_created_to}"
-        )
+        # Walidacja kryteriów
+        ReportManager.validate_criteria(report_criteria)
+        
+        # Pobierz dane z modułu data_acquisition - plik raportu i agregacje SQL (trendy, szczyt)
+        # widzą tę samą migawkę: kryteria + id <= max_reading_id w jednej transakcji REPEATABLE READ
+        timer.start('data', 5)
+        with sql_aggregation.repeatable_read():
+            readings_qs = ReportManager._sensor_queryset(report_criteria)
+            max_reading_id = readings_qs.aggregate(max_id=Max('id'))['max_id']
+            
+            # Sprawdź czy są dane
+            if max_reading_id is None:
+                raise ValueError("Brak danych dla podanych kryteriów. Nie można wygenerować raportu.")
+            readings_qs = readings_qs.filter(id__lte=max_reading_id)
+            
+            # Tworzenie raportu z domyślnym opisem; odczyty trafiają do pliku (utils.report_storage),
+            # w wierszu raportu zostają tylko metadane
+            report = Report(
+                report_criteria=report_criteria,
+                report_description=f"Report for period {report_criteria.date_created_from} - {report_criteria.date_created_to}"
+            )
+            report.data_file, report.readings_count = report_storage.write_readings(report.report_id, readings_qs)
+            report.data_for_analysis = ReportManager._dataset_metadata(report_criteria, report.readings_count, max_reading_id)
+            pipeline = ReportPipeline.for_snapshot(report, readings_qs)
+        report.save()
         print(f"✓ Report created: {report.report_id}")
         
-        # Automatycznie generuj analizy TRENDS i PEAK z realnymi obliczeniami
+        # Automatycznie generuj analizy TRENDS i PEAK z realnymi obliczeniami - trendy i szczyt
+        # z bazy, plik raportu wczytywany raz dla wykresów (utils.report_pipeline)
         print(f"Calling _generate_automatic_analyses...")
-        ReportManager._generate_automatic_analyses(report, sensor_data, generate_charts, use_ai)
+        ReportManager._generate_automatic_analyses(report, pipeline, generate_charts, use_ai, timer)
         print(f"✓ Analyses generated")
         
         # Generuj AI opis raportu TYLKO jeśli use_ai=True
         if use_ai:
+            timer.start('report_ai', 90)
             ai_report_desc = AIGenerator.generate_report_description(
                 criteria={
                     'location': report_criteria.location,
@@ -203,7 +227,7 @@ class ReportManager:
                     }
                     for analysis in report.analyses.all()
                 ],
-                readings_count=sensor_data['count']
+                readings_count=report.readings_count
             )
             
             # Zaktualizuj opis jeśli AI wygenerował
@@ -211,50 +235,57 @@ class ReportManager:
                 report.report_description = ai_report_desc
                 report.save()
         
+        timer.finish()
         return report
     
     @staticmethod
-    def _fetch_sensor_data(criteria: ReportCriteria) -> Dict[str, Any]:
+    def validate_criteria(report_criteria: ReportCriteria) -> None:
         """
-        Pobiera dane z sensorów z modułu data_acquisition
-        Używa Django ORM do bezpośredniego dostępu do DeviceReading
+        Sprawdza, czy z kryteriów da się wygenerować raport
+        
+        Raises:
+            ValueError: Jeśli kryteria są niepełne lub nieprawidłowe
+        """
+        if not report_criteria.validate_type():
+            raise ValueError("Kryteria raportu są niepełne. Wymagane są daty rozpoczęcia i zakończenia.")
+        
+        if not report_criteria.date_created_from or not report_criteria.date_created_to:
+            raise ValueError("Daty rozpoczęcia i zakończenia są wymagane do wygenerowania raportu.")
+    
+    @staticmethod
+    def _sensor_queryset(criteria: ReportCriteria):
+        """
+        Queryset odczytów z modułu data_acquisition spełniających kryteria
         
         Args:
             criteria: Kryteria filtrowania
         
         Returns:
-            Słownik z danymi sensorów
+            QuerySet DeviceReading
         """
         # Buduj query na podstawie kryteriów
-        queryset = DeviceReading.objects.select_related('device').all()
+        queryset = DeviceReading.objects.all()
         
         if criteria.location:
             queryset = queryset.filter(location=criteria.location)
         if criteria.device_type:
             queryset = queryset.filter(device_type=criteria.device_type)
+        # Zakresy na samym timestamp (nie timestamp__date), żeby mogły użyć indeksów i partycji
         if criteria.date_created_from:
-            queryset = queryset.filter(timestamp__date__gte=criteria.date_created_from)
+            queryset = queryset.filter(timestamp__gte=_day_start(criteria.date_created_from))
         if criteria.date_created_to:
-            queryset = queryset.filter(timestamp__date__lte=criteria.date_created_to)
-        
-        # Zbierz dane
-        readings_qs = queryset.values(
-            'id', 'timestamp', 'device_id', 'device_type', 
-            'location', 'metric', 'value', 'unit', 
-            'signal_dbm', 'status'
-        )
-        
-        # Konwertuj datetime do string dla JSON serializacji
-        readings = []
-        for reading in readings_qs:
-            reading_dict = dict(reading)
-            if 'timestamp' in reading_dict and reading_dict['timestamp']:
-                reading_dict['timestamp'] = reading_dict['timestamp'].isoformat()
-            readings.append(reading_dict)
-        
+            queryset = queryset.filter(timestamp__lt=_day_start(criteria.date_created_to + timedelta(days=1)))
+        return queryset
+    
+    @staticmethod
+    def _dataset_metadata(criteria: ReportCriteria, count: int, max_reading_id: int) -> Dict[str, Any]:
+        """
+        Metadane zbioru danych raportu (zapisywane w data_for_analysis zamiast samych odczytów);
+        max_reading_id - najwyższe id odczytu w migawce raportu
+        """
         return {
-            "readings": readings,
-            "count": len(readings),
+            "count": count,
+            "max_reading_id": max_reading_id,
             "criteria": {
                 "location": criteria.location,
                 "device_type": criteria.device_type,
@@ -265,28 +296,32 @@ class ReportManager:
         }
     
     @staticmethod
-    def _generate_automatic_analyses(report: Report, sensor_data: Dict[str, Any], generate_charts: bool = False, use_ai: bool = False) -> None:
+    def _generate_automatic_analyses(report: Report, pipeline: ReportPipeline, generate_charts: bool = False, use_ai: bool = False,
+                                     timer: Optional[StageTimer] = None) -> None:
         """
         Generuje automatyczne analizy dla raportu (tylko TRENDS i PEAK) z realnymi obliczeniami
         Analiza ANOMALY tworzona jest osobno na żądanie użytkownika
         
         Args:
             report: Raport do którego dodajemy analizy
-            sensor_data: Dane z sensorów
+            pipeline: ReportPipeline z odczytami raportu (wspólne statystyki analiz i wykresów)
             generate_charts: Czy generować wykresy
             use_ai: Czy używać AI do generowania opisów
+            timer: Pomiar czasu etapów i postęp
         """
+        timer = timer or StageTimer()
         print(f"=== STARTING _generate_automatic_analyses ===")
-        readings = sensor_data.get('readings', [])
-        print(f"Readings count: {len(readings)}")
+        readings_count = report.readings_count
+        print(f"Readings count: {readings_count}")
         
-        if not readings:
+        if not readings_count:
             print("No readings, returning")
             return
         
         # === ANALIZA TRENDÓW ===
+        timer.start('trends', 20)
         print("Calculating trends...")
-        trends_result = AnalysisUtils.calculate_trends(readings)
+        trends_result = pipeline.trends()
         print(f"Trends result: {trends_result}")
         
         # Generuj opis dla analysis_summary - AI lub statyczny
@@ -294,14 +329,14 @@ class ReportManager:
             ai_description = AIGenerator.generate_analysis_description(
                 'TRENDS',
                 trends_result,
-                len(readings)
+                readings_count
             )
             if ai_description:
                 print(f"✓ TRENDS AI: {len(ai_description)} chars: {ai_description[:100]}")
                 trends_result['summary'] = ai_description
             else:
                 print("✗ TRENDS AI: brak opisu - używam statycznego")
-                trends_result['summary'] = f"Analiza trendu na podstawie {len(readings)} pomiarów. Kierunek trendu: {trends_result.get('trend_direction', 'N/A')}, zmiana: {trends_result.get('change_percentage', 0):.2f}%."
+                trends_result['summary'] = f"Analiza trendu na podstawie {readings_count} pomiarów. Kierunek trendu: {trends_result.get('trend_direction', 'N/A')}, zmiana: {trends_result.get('change_percentage', 0):.2f}%."
         else:
             print("ℹ TRENDS: używam statycznego podsumowania")
             # Stwórz bardziej szczegółowy opis
@@ -318,7 +353,7 @@ class ReportManager:
             }.get(trend, 'nieznany trend')
             
             trends_result['summary'] = (
-                f"Analiza trendu na podstawie {len(readings)} pomiarów wykazała {trend_desc}. "
+                f"Analiza trendu na podstawie {readings_count} pomiarów wykazała {trend_desc}. "
                 f"Zmiana między pierwszym a drugim okresem wynosi {change_pct:.2f}% "
                 f"(średnia z pierwszego okresu: {first_avg:.2f}, drugiego: {second_avg:.2f}). "
                 f"Kierunek trendu: {direction}."
@@ -340,17 +375,19 @@ class ReportManager:
         
         # Generuj wykres dla trendów jeśli zaznaczone
         if generate_charts:
-            ReportManager._create_trend_chart(trends_analysis, readings)
+            timer.start('trends_chart', 40)
+            ReportManager._create_trend_chart(trends_analysis, pipeline.chart_series())
         
         # === ANALIZA SZCZYTÓW ===
-        peak_result = AnalysisUtils.calculate_peak_load(readings)
+        timer.start('peak', 55)
+        peak_result = pipeline.peak_load()
         
         # Generuj opis dla analysis_summary - AI lub statyczny
         if use_ai:
             ai_description_peak = AIGenerator.generate_analysis_description(
                 'PEAK',
                 peak_result,
-                len(readings)
+                readings_count
             )
             if ai_description_peak:
                 print(f"✓ PEAK AI: {len(ai_description_peak)} chars: {ai_description_peak[:100]}")
@@ -387,7 +424,8 @@ class ReportManager:
         
         # Generuj wykres dla szczytów jeśli zaznaczone
         if generate_charts:
-            ReportManager._create_peak_chart(peak_analysis, readings)
+            timer.start('peak_chart', 75)
+            ReportManager._create_peak_chart(peak_analysis, pipeline.chart_series())
     
     @staticmethod
     def generate_anomaly_analysis(
@@ -420,10 +458,11 @@ class ReportManager:
         if existing:
             return existing
         
-        # Pobierz dane z raportu
-        readings = report.data_for_analysis.get('readings', [])
+        # Pobierz dane z raportu (jedno wczytanie dla analizy i wykresu)
+        pipeline = ReportPipeline.for_report(report)
+        readings = pipeline.frame
         
-        if not readings:
+        if not len(readings):
             # Jeśli brak danych, zwróć pustą analizę
             anomaly_analysis = Analysis.objects.create(
                 analysis_type=Analysis.AnalysisType.ANOMALY,
@@ -435,7 +474,7 @@ class ReportManager:
             return anomaly_analysis
         
         # Wykonaj prawdziwą detekcję anomalii
-        anomaly_result = AnalysisUtils.detect_anomalies(readings)
+        anomaly_result = pipeline.anomalies()
         
         # Generuj opis dla analysis_summary - AI lub statyczny
         if use_ai:
@@ -487,18 +526,18 @@ class ReportManager:
         
         # Generuj wykres jeśli zaznaczone
         if generate_chart:
-            ReportManager._create_anomaly_chart(anomaly_analysis, readings, anomaly_result)
+            ReportManager._create_anomaly_chart(anomaly_analysis, pipeline.chart_series(), anomaly_result)
         
         return anomaly_analysis
     
     @staticmethod
-    def _create_trend_chart(analysis: Analysis, readings: List[Dict[str, Any]]) -> Visualization:
+    def _create_trend_chart(analysis: Analysis, series: ChartSeries) -> Visualization:
         """
         Tworzy wykres dla analizy trendów
         
         Args:
             analysis: Obiekt Analysis
-            readings: Lista odczytów
+            series: Odczyty w kolejności chronologicznej (ReportPipeline.chart_series)
             
         Returns:
             Utworzona wizualizacja
@@ -517,19 +556,11 @@ class ReportManager:
             sns.set_style("whitegrid")
             sns.set_palette("husl")
             
-            # Przygotuj dane
-            timestamps = []
-            values = []
-            for r in sorted(readings, key=lambda x: x.get('timestamp', '')):
-                if r.get('timestamp') and r.get('value') is not None:
-                    try:
-                        ts = datetime.fromisoformat(r['timestamp'].replace('Z', '+00:00'))
-                        timestamps.append(ts)
-                        values.append(r['value'])
-                    except:
-                        continue
-            
-            if not timestamps:
+            # Dane posortowane raz dla wszystkich wykresów raportu
+            timestamps = series.timestamps
+            values = series.values
+            
+            if not len(series):
                 return None
             
             # Twórz wykres
@@ -593,13 +624,13 @@ class ReportManager:
             return None
     
     @staticmethod
-    def _create_peak_chart(analysis: Analysis, readings: List[Dict[str, Any]]) -> Visualization:
+    def _create_peak_chart(analysis: Analysis, series: ChartSeries) -> Visualization:
         """
         Tworzy wykres dla analizy szczytów
         
         Args:
             analysis: Obiekt Analysis
-            readings: Lista odczytów
+            series: Odczyty w kolejności chronologicznej (ReportPipeline.chart_series)
             
         Returns:
             Utworzona wizualizacja
@@ -617,26 +648,18 @@ class ReportManager:
             # Ustaw styl seaborn
             sns.set_style("whitegrid")
             
-            # Przygotuj dane
-            timestamps = []
-            values = []
-            for r in sorted(readings, key=lambda x: x.get('timestamp', '')):
-                if r.get('timestamp') and r.get('value') is not None:
-                    try:
-                        ts = datetime.fromisoformat(r['timestamp'].replace('Z', '+00:00'))
-                        timestamps.append(ts)
-                        values.append(r['value'])
-                    except:
-                        continue
-            
-            if not timestamps or not values:
+            # Dane posortowane raz dla wszystkich wykresów raportu
+            timestamps = series.timestamps
+            values = series.values
+            
+            if not len(series):
                 return None
             
             # Znajdź szczyt
-            max_value = max(values)
-            max_idx = values.index(max_value)
+            max_idx = int(np.argmax(values))
+            max_value = float(values[max_idx])
             threshold = max_value * 0.9
-            avg_value = sum(values) / len(values)
+            avg_value = float(values.mean())
             
             # Twórz wykres
             fig, ax = plt.subplots(figsize=(14, 7))
@@ -660,7 +683,7 @@ class ReportManager:
             
             # Fill area
             ax.fill_between(timestamps, values, avg_value, 
-                           where=[v >= threshold for v in values],
+                           where=values >= threshold,
                            alpha=0.3, color='#E63946', label='Strefa szczytowa')
             
             # Tytuł i etykiety
@@ -715,13 +738,13 @@ class ReportManager:
             return None
     
     @staticmethod
-    def _create_anomaly_chart(analysis: Analysis, readings: List[Dict[str, Any]], anomaly_result: Dict[str, Any]) -> Visualization:
+    def _create_anomaly_chart(analysis: Analysis, series: ChartSeries, anomaly_result: Dict[str, Any]) -> Visualization:
         """
         Tworzy wykres dla analizy anomalii
         
         Args:
             analysis: Obiekt Analysis
-            readings: Lista odczytów
+            series: Odczyty w kolejności chronologicznej (ReportPipeline.chart_series)
             anomaly_result: Wyniki detekcji anomalii
             
         Returns:
@@ -740,28 +763,20 @@ class ReportManager:
             # Ustaw styl seaborn
             sns.set_style("whitegrid")
             
-            # Przygotuj dane
-            timestamps = []
-            values = []
-            for r in sorted(readings, key=lambda x: x.get('timestamp', '')):
-                if r.get('timestamp') and r.get('value') is not None:
-                    try:
-                        ts = datetime.fromisoformat(r['timestamp'].replace('Z', '+00:00'))
-                        timestamps.append(ts)
-                        values.append(r['value'])
-                    except:
-                        continue
-            
-            if not timestamps or not values:
+            # Dane posortowane raz dla wszystkich wykresów raportu
+            timestamps = series.timestamps
+            values = series.values
+            
+            if not len(series):
                 return None
             
-            # Wyciągnij anomalie z wyniku
+            # Wyciągnij anomalie z wyniku ('index' to pozycja odczytu w raporcie, nie na wykresie)
             anomalies = anomaly_result.get('anomalies', [])
-            anomaly_indices = [a.get('index') for a in anomalies if 'index' in a]
+            anomaly_indices = series.positions([a.get('index') for a in anomalies if 'index' in a])
             
             # Wartości średnie i granice
             stats = anomaly_result.get('statistics', {})
-            mean = stats.get('mean', sum(values)/len(values)) if stats else sum(values)/len(values)
+            mean = stats.get('mean', float(values.mean())) if stats else float(values.mean())
             std_dev = stats.get('std', 0) if stats else 0
             upper_bound = mean + 2.5 * std_dev if std_dev > 0 else mean * 1.2
             lower_bound = mean - 2.5 * std_dev if std_dev > 0 else mean * 0.8
@@ -777,8 +792,8 @@ class ReportManager:
             
             # Zaznacz anomalie
             if anomaly_indices:
-                anomaly_times = [timestamps[i] for i in anomaly_indices if i < len(timestamps)]
-                anomaly_values = [values[i] for i in anomaly_indices if i < len(values)]
+                anomaly_times = timestamps[anomaly_indices]
+                anomaly_values = values[anomaly_indices]
                 ax.scatter(anomaly_times, anomaly_values, color='#D62828', s=200,
                           marker='X', label=f'Anomalie ({len(anomaly_indices)})',
                           zorder=5, edgecolors='white', linewidths=2)
@@ -860,12 +875,8 @@ class ReportManager:
         Returns:
             Obiekt ReportCompare z wynikami porównania i opcjonalnym wykresem
         """
-        # Pobierz dane z obu raportów
-        data_one = report_one.data_for_analysis.get('readings', [])
-        data_two = report_two.data_for_analysis.get('readings', [])
-        
-        # Oblicz statystyki porównawcze
-        comparison_stats = AnalysisUtils.compare_periods(data_one, data_two)
+        # Oblicz statystyki porównawcze (kolumny NumPy z plików raportów)
+        comparison_stats = AnalysisUtils.compare_periods(report_one.get_frame(), report_two.get_frame())
         
         # Generuj opis porównania z statystykami
         compare_description = ReportManager._generate_comparison_description(
@@ -883,7 +894,9 @@ class ReportManager:
         
         # Generuj wykres porównawczy jeśli zaznaczone
         if generate_chart:
-            chart_path = ReportManager._create_comparison_chart(report_compare, data_one, data_two, comparison_stats)
+            chart_path = ReportManager._create_comparison_chart(
+                report_compare, report_one.get_readings(), report_two.get_readings(), comparison_stats
+            )
             if chart_path:
                 report_compare.visualization_file = chart_path
                 report_compare.save()
@@ -899,12 +912,12 @@ class ReportManager:
             "report_one": {
                 "id": str(report_one.report_id),
                 "period": f"{report_one.report_criteria.date_created_from if report_one.report_criteria else 'N/A'} - {report_one.report_criteria.date_created_to if report_one.report_criteria else 'N/A'}",
-                "data_points": len(report_one.data_for_analysis.get('readings', []))
+                "data_points": len(report_one.get_frame())
             },
             "report_two": {
                 "id": str(report_two.report_id),
                 "period": f"{report_two.report_criteria.date_created_from if report_two.report_criteria else 'N/A'} - {report_two.report_criteria.date_created_to if report_two.report_criteria else 'N/A'}",
-                "data_points": len(report_two.data_for_analysis.get('readings', []))
+                "data_points": len(report_two.get_frame())
             },
             "comparison": stats
         })
@@ -1062,7 +1075,7 @@ Trend: {stats.get('trend', 'N/A')}
                 "date_to": str(report.report_criteria.date_created_to) if report.report_criteria else None,
                 "device_type": report.report_criteria.device_type if report.report_criteria else None
             },
-            "data_for_analysis": report.data_for_analysis,
+            "data_for_analysis": report.export_analysis_data(),
             "analyses": [
                 {
                     "analysis_id": str(analysis.analysis_id),
@@ -1122,7 +1135,7 @@ Trend: {stats.get('trend', 'N/A')}
         
         return {
             "report_id": str(report.report_id),
-            "analysis_data": report.data_for_analysis,
+            "analysis_data": report.export_analysis_data(),
             "analyses_summary": [
                 {
                     "type": analysis.analysis_type,
@@ -1365,7 +1378,7 @@ Trend: {stats.get('trend', 'N/A')}
             story.append(Paragraph("Podsumowanie Danych", heading_style))
             
             # Pobierz dane z raportu
-            readings = report.data_for_analysis.get('readings', [])
+            readings = report.get_readings()
             if readings:
                 values = [r['value'] for r in readings if 'value' in r]
                 
@@ -1817,7 +1830,8 @@ class ReportCriteriaViewSet(viewsets.ModelViewSet):
 
 class ReportViewSet(viewsets.ModelViewSet):
     """ViewSet dla raportów z dodatkowymi akcjami"""
-    queryset = Report.objects.prefetch_related(
+    # data_for_analysis starych raportów zawiera wszystkie odczyty - nie jest potrzebne w odpowiedziach
+    queryset = Report.objects.defer('data_for_analysis').prefetch_related(
         'analyses__visualizations',
         'report_criteria'
     ).all()
@@ -1837,6 +1851,9 @@ class ReportViewSet(viewsets.ModelViewSet):
             "generate_charts": true/false  (opcjonalne, domyślnie false),
             "use_ai": true/false  (opcjonalne, domyślnie false)
         }
+        
+        Raport generuje worker w tle (process_report_jobs) - odpowiedź 202 zawiera zadanie,
+        którego stan i postęp zwraca GET /analysis-reporting/report-jobs/{job_id}/
         """
         criteria_id = request.data.get('criteria_id')
         generate_charts = request.data.get('generate_charts', False)
@@ -1850,9 +1867,9 @@ class ReportViewSet(viewsets.ModelViewSet):
         
         try:
             criteria = ReportCriteria.objects.get(report_criteria_id=criteria_id)
-            report = ReportManager.generate_report(criteria, generate_charts, use_ai)
-            serializer = self.get_serializer(report)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            ReportManager.validate_criteria(criteria)
+            job = report_jobs.enqueue(criteria, generate_charts, use_ai, user_id=request.user.id)
+            return Response(ReportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
         except ReportCriteria.DoesNotExist:
             return Response(
                 {"error": "Kryteria nie znalezione"},
@@ -1933,8 +1950,8 @@ class ReportViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Zwróć tylko data_for_analysis (czyste dane pomiarowe)
-        return Response(report.data_for_analysis)
+        # Zwróć tylko dane pomiarowe (metadane i odczyty z pliku raportu)
+        return Response(report.export_analysis_data())
     
     @action(detail=True, methods=['get'])
     def export_pdf(self, request, pk=None):
@@ -1999,15 +2016,21 @@ class DeviceMetadataView(APIView):
             "device_types": ["energy_meter", "sensor", ...]
         }
         """
+        # Lokalizacje i typy są atrybutami Device - wystarczy lista urządzeń,
+        # które mają jakiekolwiek odczyty (EXISTS po indeksie (device, timestamp))
+        devices_with_readings = Device.objects.filter(
+            Exists(DeviceReading.objects.filter(device=OuterRef('pk')))
+        )
+
         # Pobierz unikalne lokalizacje (nie puste)
-        locations = DeviceReading.objects.exclude(
+        locations = devices_with_readings.exclude(
             location__isnull=True
         ).exclude(
             location=''
         ).values_list('location', flat=True).distinct().order_by('location')
         
         # Pobierz unikalne typy urządzeń (nie puste)
-        device_types = DeviceReading.objects.exclude(
+        device_types = devices_with_readings.exclude(
             device_type__isnull=True
         ).exclude(
             device_type=''
@@ -2046,9 +2069,9 @@ class AvailableDatesView(APIView):
         if device_type:
             queryset = queryset.filter(device_type=device_type)
         
-        # Pobierz unikalne daty (bez godzin)
-        timestamps = queryset.values_list('timestamp', flat=True).distinct()
-        unique_dates = sorted(set(ts.date().isoformat() for ts in timestamps if ts))
+        # Pobierz unikalne daty (bez godzin) - DISTINCT liczony w bazie
+        days = queryset.annotate(day=TruncDate('timestamp')).values_list('day', flat=True).distinct().order_by('day')
+        unique_dates = [day.isoformat() for day in days if day]
         
         return Response({
             'dates': unique_dates
@@ -2072,6 +2095,19 @@ class AvailableDatesView(APIView):
         return Response(serializer.data)
 
 
+class ReportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet dla zadań generowania raportów (tylko odczyt)
+    
+    GET /analysis-reporting/report-jobs/{job_id}/ - stan, postęp (stage, progress),
+    czasy etapów (timings) i id gotowego raportu (report)
+    """
+    queryset = ReportJob.objects.all()
+    serializer_class = ReportJobSerializer
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAdmin]
+
+
 class AnalysisViewSet(viewsets.ModelViewSet):
     """ViewSet dla analiz"""
     queryset = Analysis.objects.prefetch_related('visualizations').all()
@@ -2131,7 +2167,7 @@ class ReportCompareViewSet(viewsets.ModelViewSet):
     """ViewSet dla porównań raportów"""
     queryset = ReportCompare.objects.select_related(
         'report_one', 'report_two'
-    ).all()
+    ).defer('report_one__data_for_analysis', 'report_two__data_for_analysis').all()
     serializer_class = ReportCompareSerializer
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAdmin]
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import DeviceReading, Device 
+from .models import DeviceReading, Device, Metric
 
 @admin.register(Device)
 class DeviceAdmin(admin.ModelAdmin):
@@ -25,15 +25,21 @@ class MyModelAdmin(admin.ModelAdmin):
     )
     list_filter = (
         "device__device_type", 
-        "location", 
-        "metric", 
+        "device__location", 
+        "metric_ref", 
         "status",
         ("timestamp", admin.DateFieldListFilter)
         )
     search_fields = (
         "device__device_id", 
-        "metric", 
-        "location"
+        "metric_ref__name", 
+        "device__location"
     )
     
-    list_select_related = ('device',)
\ No newline at end of file
+    list_select_related = ('device', 'metric_ref')
+
+
+@admin.register(Metric)
+class MetricAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "unit")
+    search_fields = ("name",)
\ No newline at end of file
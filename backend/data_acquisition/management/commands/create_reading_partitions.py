@@ -0,0 +1,47 @@
+"""
+Management command: create_reading_partitions
+
+Tworzy miesięczne partycje tabeli odczytów (DeviceReading) z wyprzedzeniem.
+
+LOGIKA:
+- Partycje od bieżącego miesiąca do --months-ahead miesięcy naprzód
+- Istniejące partycje są pomijane
+- Odczyty z partycji domyślnej należące do nowego miesiąca są do niej przenoszone
+
+URUCHOMIENIE:
+- python manage.py create_reading_partitions
+- python manage.py create_reading_partitions --months-ahead 12
+- entrypoint.sh przy starcie kontenera
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from data_acquisition import partitions
+
+
+class Command(BaseCommand):
+    help = 'Tworzy miesięczne partycje tabeli odczytów na kolejne miesiące'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=3,
+            help='Na ile miesięcy naprzód utworzyć partycje (domyślnie 3)',
+        )
+
+    def handle(self, *args, **options):
+        if options['months_ahead'] < 0:
+            raise CommandError('--months-ahead nie może być ujemne')
+
+        if not partitions.is_partitioned(connection):
+            self.stdout.write(self.style.WARNING('Tabela odczytów nie jest partycjonowana - pomijam'))
+            return
+
+        with transaction.atomic():
+            created = partitions.ensure_monthly_partitions(months_ahead=options['months_ahead'])
+
+        if created:
+            self.stdout.write(self.style.SUCCESS(f"Utworzono partycje: {', '.join(created)}"))
+        else:
+            self.stdout.write('Wszystkie partycje już istnieją')
@@ -0,0 +1,59 @@
+"""
+Management command: export_readings
+
+Eksport odczytów do pliku w kolumnowym formacie binarnym IOCOL
+(data_acquisition.utils.columnar).
+
+LOGIKA:
+- Filtry jak w endpointcie readings/filter/ (device_id, location, metric, start, end)
+- Odczyty pobierane kursorem serwerowym i kodowane partiami (--batch-size)
+- Plik można czytać bez kopiowania przez mmap: ColumnarFile(ścieżka).column("value")
+
+URUCHOMIENIE:
+- python manage.py export_readings --output /data/readings.iocol
+- python manage.py export_readings --output /data/r.iocol --device-id 3 --start 2025-01-01T00:00:00Z
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from data_acquisition.utils import columnar
+from data_acquisition.views import filter_readings
+
+
+class Command(BaseCommand):
+    help = 'Eksportuje odczyty do pliku w kolumnowym formacie binarnym (IOCOL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            required=True,
+            help='Ścieżka pliku wynikowego',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=columnar.DEFAULT_BATCH_SIZE,
+            help='Liczba wierszy w jednej partii pliku',
+        )
+        for name in ('device-id', 'location', 'metric', 'start', 'end'):
+            parser.add_argument(f'--{name}', help=f'Filtr {name.replace("-", "_")} (jak w readings/filter/)')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size musi być większe od 0')
+
+        params = {
+            key: options[key]
+            for key in ('device_id', 'location', 'metric', 'start', 'end')
+            if options[key]
+        }
+        readings = filter_readings(params).order_by('timestamp', 'id')
+
+        started = time.perf_counter()
+        rows = columnar.write_file(readings, options['output'], batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Wyeksportowano {rows} odczytów do {options["output"]} w {elapsed:.2f}s'
+        ))
@@ -0,0 +1,57 @@
+"""
+Management command: import_readings
+
+Strumieniowy import odczytów z pliku CSV (format statics/sensors_data.csv).
+
+LOGIKA:
+- Urządzenia rozwiązywane z mapy w pamięci (jedno zapytanie)
+- Odczyty zapisywane partiami przez bulk_create (--batch-size)
+- Alerty oceniane raz na partię, a nie raz na wiersz
+- Istniejące odczyty NIE są usuwane, duplikaty pomija ON CONFLICT
+- --incremental: pomija wiersze starsze niż znacznik urządzenia (ReadingWatermark)
+
+URUCHOMIENIE:
+- python manage.py import_readings
+- python manage.py import_readings --path /data/backfill.csv --batch-size 10000
+- python manage.py import_readings --incremental
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from data_acquisition.utils import import_csv
+
+
+class Command(BaseCommand):
+    help = 'Importuje odczyty z pliku CSV partiami (bulk_create), bez usuwania istniejących danych'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            help='Ścieżka do pliku CSV (domyślnie statics/sensors_data.csv)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=import_csv.DEFAULT_BATCH_SIZE,
+            help='Liczba wierszy w jednej partii bulk_create',
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Importuj tylko odczyty nowsze niż znacznik urządzenia',
+        )
+        parser.add_argument(
+            '--skip-devices',
+            action='store_true',
+            help='Nie importuj statics/devices.csv przed odczytami',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size musi być większe od 0')
+
+        import_csv.run_bulk(
+            readings_path=options['path'],
+            batch_size=options['batch_size'],
+            import_device_list=not options['skip_devices'],
+            incremental=options['incremental'],
+        )
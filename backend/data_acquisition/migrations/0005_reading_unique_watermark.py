@@ -0,0 +1,53 @@
+# Generated by Django 4.2.25 on 2026-10-17 06:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def remove_duplicate_readings(apps, schema_editor):
+    DeviceReading = apps.get_model('data_acquisition', 'DeviceReading')
+
+    duplicates = (
+        DeviceReading.objects.values('device', 'metric', 'timestamp')
+        .annotate(rows=models.Count('id'), keep_id=models.Min('id'))
+        .filter(rows__gt=1)
+    )
+    for dup in duplicates.iterator():
+        DeviceReading.objects.filter(
+            device=dup['device'], metric=dup['metric'], timestamp=dup['timestamp']
+        ).exclude(id=dup['keep_id']).delete()
+
+
+def seed_watermarks(apps, schema_editor):
+    DeviceReading = apps.get_model('data_acquisition', 'DeviceReading')
+    ReadingWatermark = apps.get_model('data_acquisition', 'ReadingWatermark')
+
+    latest = DeviceReading.objects.values('device').annotate(last=models.Max('timestamp'))
+    ReadingWatermark.objects.bulk_create(
+        [ReadingWatermark(device_id=row['device'], last_timestamp=row['last']) for row in latest],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_acquisition', '0004_remove_devicereading_priority_device_priority'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadingWatermark',
+            fields=[
+                ('device', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='watermark', serialize=False, to='data_acquisition.device')),
+                ('last_timestamp', models.DateTimeField(help_text='Najnowszy zaimportowany timestamp odczytu')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(remove_duplicate_readings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='devicereading',
+            constraint=models.UniqueConstraint(fields=('device', 'metric', 'timestamp'), name='uniq_reading_device_metric_ts'),
+        ),
+        migrations.RunPython(seed_watermarks, migrations.RunPython.noop),
+    ]
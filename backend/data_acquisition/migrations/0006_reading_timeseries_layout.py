@@ -0,0 +1,29 @@
+# Generated by Django 4.2.25 on 2026-10-17 06:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+from data_acquisition.partitions import partition_table, unpartition_table
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_acquisition', '0005_reading_unique_watermark'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='devicereading',
+            name='device',
+            field=models.ForeignKey(db_index=False, help_text='Urządzenie, z którego pochodzi ten odczyt', on_delete=django.db.models.deletion.CASCADE, related_name='readings', to='data_acquisition.device'),
+        ),
+        migrations.AddIndex(
+            model_name='devicereading',
+            index=models.Index(fields=['device', '-timestamp'], name='reading_dev_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='devicereading',
+            index=models.Index(fields=['location', 'device_type', 'timestamp'], name='reading_loc_type_ts_idx'),
+        ),
+        migrations.RunPython(partition_table, unpartition_table),
+    ]
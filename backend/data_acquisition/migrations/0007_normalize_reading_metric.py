@@ -0,0 +1,122 @@
+# Generated by Django 4.2.25 on 2026-10-17 09:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def _check_deferred_constraints(schema_editor):
+    # Kolejne ALTER TABLE w tej samej transakcji nie mogą mieć oczekujących triggerów FK
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+def fill_metric_codes(apps, schema_editor):
+    DeviceReading = apps.get_model('data_acquisition', 'DeviceReading')
+    Metric = apps.get_model('data_acquisition', 'Metric')
+
+    pairs = DeviceReading.objects.values_list('metric', 'unit').distinct()
+    for name, unit in pairs:
+        metric, _ = Metric.objects.get_or_create(name=name, unit=unit)
+        # Jedno UPDATE na metrykę zamiast zapisu każdego wiersza
+        DeviceReading.objects.filter(metric=name, unit=unit).update(metric_ref=metric)
+    _check_deferred_constraints(schema_editor)
+
+
+def restore_text_columns(apps, schema_editor):
+    DeviceReading = apps.get_model('data_acquisition', 'DeviceReading')
+    Metric = apps.get_model('data_acquisition', 'Metric')
+    Device = apps.get_model('data_acquisition', 'Device')
+
+    for metric in Metric.objects.all():
+        DeviceReading.objects.filter(metric_ref=metric).update(metric=metric.name, unit=metric.unit)
+    for device in Device.objects.all():
+        DeviceReading.objects.filter(device=device).update(
+            device_type=device.device_type, location=device.location
+        )
+    _check_deferred_constraints(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_acquisition', '0006_reading_timeseries_layout'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Metric',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(help_text='Nazwa metryki, np. power_kw', max_length=50)),
+                ('unit', models.CharField(blank=True, help_text='Jednostka, np. kW', max_length=20)),
+            ],
+            options={
+                'ordering': ['name', 'unit'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='metric',
+            constraint=models.UniqueConstraint(fields=('name', 'unit'), name='uniq_metric_name_unit'),
+        ),
+        migrations.AddField(
+            model_name='devicereading',
+            name='metric_ref',
+            field=models.ForeignKey(db_index=False, help_text='Kod metryki i jednostki (słownik Metric)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='readings', to='data_acquisition.metric'),
+        ),
+        migrations.RunPython(fill_metric_codes, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='devicereading',
+            name='uniq_reading_device_metric_ts',
+        ),
+        migrations.RemoveIndex(
+            model_name='devicereading',
+            name='reading_loc_type_ts_idx',
+        ),
+        migrations.AlterField(
+            model_name='devicereading',
+            name='metric_ref',
+            field=models.ForeignKey(db_index=False, help_text='Kod metryki i jednostki (słownik Metric)', on_delete=django.db.models.deletion.PROTECT, related_name='readings', to='data_acquisition.metric'),
+        ),
+        migrations.AlterField(
+            model_name='devicereading',
+            name='device_type',
+            field=models.CharField(max_length=50, null=True),
+        ),
+        migrations.AlterField(
+            model_name='devicereading',
+            name='location',
+            field=models.CharField(max_length=200, null=True),
+        ),
+        migrations.AlterField(
+            model_name='devicereading',
+            name='metric',
+            field=models.CharField(max_length=50, null=True),
+        ),
+        migrations.AlterField(
+            model_name='devicereading',
+            name='unit',
+            field=models.CharField(max_length=20, null=True),
+        ),
+        # Przy cofaniu migracji kolumny tekstowe są odtwarzane tutaj, zanim wrócą do NOT NULL
+        migrations.RunPython(migrations.RunPython.noop, restore_text_columns),
+        migrations.RemoveField(
+            model_name='devicereading',
+            name='device_type',
+        ),
+        migrations.RemoveField(
+            model_name='devicereading',
+            name='location',
+        ),
+        migrations.RemoveField(
+            model_name='devicereading',
+            name='metric',
+        ),
+        migrations.RemoveField(
+            model_name='devicereading',
+            name='unit',
+        ),
+        migrations.AddConstraint(
+            model_name='devicereading',
+            constraint=models.UniqueConstraint(fields=('device', 'metric_ref', 'timestamp'), name='uniq_reading_device_metric_ts'),
+        ),
+    ]
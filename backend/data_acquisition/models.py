@@ -1,7 +1,12 @@
-from django.db import models
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models import F, Q
+from django.db.models.constants import LOOKUP_SEP
 from django.core.validators import MinValueValidator, MaxValueValidator
 
-class Device(models.Model):
+from data_acquisition.utils.tracking import TrackedFieldsMixin
+
+
+class Device(TrackedFieldsMixin, models.Model):
     device_id = models.IntegerField(primary_key=True, db_index=True, help_text="Unikalny identyfikator urządzenia")
     name = models.CharField(max_length=100, blank=True, help_text="Przyjazna dla użytkownika nazwa")
     device_type = models.CharField(max_length=50, db_index=True)
@@ -9,28 +14,324 @@ class Device(models.Model):
     is_active = models.BooleanField(default=True, help_text="Czy urządzenie jest aktywne")
     priority = models.IntegerField(default=0, validators=[MinValueValidator(0), MaxValueValidator(2)], help_text="Priorytet urządzenia (0-2)")
 
+    # Zmiana is_active wykrywana w alarm_alert.monitoring bez pobierania starego wiersza
+    tracked_fields = ('is_active',)
+
     class Meta:
         ordering = ['name', 'device_id']
 
     def __str__(self):
         return f"{self.name} ({self.device_id})"
 
+class MetricManager(models.Manager):
+    """
+    Słownik metryk jest mały i praktycznie niezmienny, więc trzymamy go w pamięci procesu:
+    zamiana nazwy na kod (zapis odczytów) i kodu na nazwę (odczyt) nie odpytuje bazy.
+    """
+    _by_key = {}
+    _by_id = {}
+
+    def _remember(self, metric):
+        self._by_key[(metric.name, metric.unit)] = metric
+        self._by_id[metric.pk] = metric
+        return metric
+
+    def resolve(self, name, unit=None):
+        """Zwraca metrykę (name, unit), tworząc ją przy pierwszym użyciu. unit=None - dowolna jednostka."""
+        if unit is None:
+            for (cached_name, _), metric in self._by_key.items():
+                if cached_name == name:
+                    return metric
+            metric = self.filter(name=name).order_by('id').first()
+            if metric is None:
+                metric = self.create(name=name, unit='')
+            return self._remember(metric)
+
+        metric = self._by_key.get((name, unit))
+        if metric is None:
+            metric = self.filter(name=name, unit=unit).first()
+            if metric is None and unit:
+                metric = self._fill_unit(name, unit)
+            if metric is None:
+                metric, _ = self.get_or_create(name=name, unit=unit)
+            self._remember(metric)
+        return metric
+
+    def _fill_unit(self, name, unit):
+        """Metryka utworzona bez jednostki (resolve(name, None)) dostaje pierwszą podaną jednostkę."""
+        placeholder = self.filter(name=name, unit='').order_by('id').first()
+        if placeholder is None:
+            return None
+        try:
+            with transaction.atomic():
+                updated = self.filter(pk=placeholder.pk, unit='').update(unit=unit)
+        except IntegrityError:
+            # (name, unit) utworzona równolegle - użyje jej get_or_create
+            return None
+        if not updated:
+            return None
+        self._by_key.pop((name, ''), None)
+        placeholder.unit = unit
+        return placeholder
+
+    def get_cached(self, pk):
+        metric = self._by_id.get(pk)
+        if metric is None:
+            metric = self._remember(self.get(pk=pk))
+        return metric
+
+    def clear_cache(self):
+        self._by_key.clear()
+        self._by_id.clear()
+
+
+class Metric(models.Model):
+    """
+    Słownik metryk odczytów (nazwa + jednostka). Odczyt przechowuje tylko kod (smallint).
+    """
+    id = models.SmallAutoField(primary_key=True)
+    name = models.CharField(max_length=50, help_text="Nazwa metryki, np. power_kw")
+    unit = models.CharField(max_length=20, blank=True, help_text="Jednostka, np. kW")
+
+    objects = MetricManager()
+
+    class Meta:
+        ordering = ['name', 'unit']
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'unit'], name='uniq_metric_name_unit'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} [{self.unit}]"
+
+
+# Dawne kolumny tekstowe odczytu -> ścieżki do tabel, w których są teraz przechowywane
+LEGACY_READING_FIELDS = {
+    'device_type': 'device__device_type',
+    'location': 'device__location',
+    'metric': 'metric_ref__name',
+    'unit': 'metric_ref__unit',
+}
+
+
+def _legacy_path(lookup):
+    field, sep, rest = lookup.partition(LOOKUP_SEP)
+    if field in LEGACY_READING_FIELDS:
+        return LEGACY_READING_FIELDS[field] + sep + rest
+    return lookup
+
+
+def _translate_q(node):
+    q = Q()
+    q.connector, q.negated = node.connector, node.negated
+    q.children = [
+        (_legacy_path(child[0]), child[1]) if isinstance(child, tuple) else _translate_q(child)
+        for child in node.children
+    ]
+    return q
+
+
+class DeviceReadingQuerySet(models.QuerySet):
+    """
+    Warstwa zgodności po normalizacji odczytu: filtry, values() i order_by()
+    przyjmują dawne nazwy kolumn (device_type, location, metric, unit).
+    """
+
+    def with_legacy_fields(self, *names):
+        """Dołącza dawne kolumny jako adnotacje (domyślnie wszystkie)."""
+        names = [name for name in (names or LEGACY_READING_FIELDS) if name not in self.query.annotations]
+        if not names:
+            return self
+        return self.annotate(**{name: F(LEGACY_READING_FIELDS[name]) for name in names})
+
+    def _filter_or_exclude(self, negate, args, kwargs):
+        args = tuple(_translate_q(arg) if isinstance(arg, Q) else arg for arg in args)
+        kwargs = {_legacy_path(key): value for key, value in kwargs.items()}
+        return super()._filter_or_exclude(negate, args, kwargs)
+
+    def values(self, *fields, **expressions):
+        return super(DeviceReadingQuerySet, self._with_referenced(fields)).values(*fields, **expressions)
+
+    def values_list(self, *fields, **kwargs):
+        return super(DeviceReadingQuerySet, self._with_referenced(fields)).values_list(*fields, **kwargs)
+
+    def order_by(self, *field_names):
+        return super(DeviceReadingQuerySet, self._with_referenced(
+            name.lstrip('-') for name in field_names if isinstance(name, str)
+        )).order_by(*field_names)
+
+    def _with_referenced(self, fields):
+        names = [name for name in fields if name in LEGACY_READING_FIELDS]
+        return self.with_legacy_fields(*names) if names else self
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.resolve_metric()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def insert_new(self, objs, batch_size=5000):
+        """
+        Zapisuje odczyty z pominięciem duplikatów (device, metric_ref, timestamp) i zwraca
+        tylko te, które faktycznie trafiły do bazy (z ustawionym id).
+
+        bulk_create(ignore_conflicts=True) nie mówi, które wiersze pominął ON CONFLICT -
+        w PostgreSQL jest to INSERT ... ON CONFLICT DO NOTHING RETURNING.
+        """
+        objs = list(objs)
+        if not objs:
+            return []
+        connection = connections[self.db]
+        if connection.vendor != 'postgresql':
+            self.bulk_create(objs, batch_size=batch_size, ignore_conflicts=True)
+            return objs
+
+        for obj in objs:
+            obj.resolve_metric()
+
+        opts = self.model._meta
+        fields = [field for field in opts.concrete_fields if field is not opts.pk]
+        qn = connection.ops.quote_name
+        row_sql = '(' + ', '.join(['%s'] * len(fields)) + ')'
+        returning = ', '.join(qn(opts.get_field(name).column) for name in ('id', 'device', 'metric_ref', 'timestamp'))
+
+        inserted = []
+        with connection.cursor() as cursor:
+            for start in range(0, len(objs), batch_size):
+                chunk = objs[start:start + batch_size]
+                # Duplikat w obrębie jednego INSERT też jest pomijany - wynik dostaje pierwszy obiekt
+                pending = {}
+                for obj in chunk:
+                    pending.setdefault((obj.device_id, obj.metric_ref_id, obj.timestamp), obj)
+                cursor.execute(
+                    f"INSERT INTO {qn(opts.db_table)} ({', '.join(qn(field.column) for field in fields)}) "
+                    f"VALUES {', '.join([row_sql] * len(chunk))} "
+                    f"ON CONFLICT DO NOTHING RETURNING {returning}",
+                    [field.get_db_prep_save(getattr(obj, field.attname), connection) for obj in chunk for field in fields],
+                )
+                for pk, device_id, metric_ref_id, timestamp in cursor.fetchall():
+                    obj = pending.pop((device_id, metric_ref_id, timestamp), None)
+                    if obj is not None:
+                        obj.pk = pk
+                        obj._state.adding = False
+                        obj._state.db = self.db
+                        inserted.append(obj)
+        return inserted
+
+
 class DeviceReading(models.Model):
 
     device = models.ForeignKey(
         Device, 
         on_delete=models.CASCADE,  
         related_name="readings",   
+        db_index=False,  # pokrywa go indeks (device, -timestamp)
         help_text="Urządzenie, z którego pochodzi ten odczyt"
     )
     timestamp = models.DateTimeField()
-    device_type = models.CharField(max_length=50)
-    location = models.CharField(max_length=200)
-    metric = models.CharField(max_length=50)
+    metric_ref = models.ForeignKey(
+        Metric,
+        on_delete=models.PROTECT,
+        related_name="readings",
+        db_index=False,  # słownik jest mały, filtr po metryce zawsze idzie z device/timestamp
+        help_text="Kod metryki i jednostki (słownik Metric)"
+    )
     value = models.FloatField()
-    unit = models.CharField(max_length=20)
     signal_dbm = models.IntegerField(default=0)
     status = models.BooleanField(default=True, help_text="Status urządzenia (True/False")
 
+    objects = DeviceReadingQuerySet.as_manager()
+
+    class Meta:
+        # Tabela jest partycjonowana po miesiącach (timestamp) - zob. data_acquisition/partitions.py.
+        # Unikalny indeks (device, metric_ref, timestamp) obsługuje też sortowanie po timestamp DESC.
+        # device_type i location są brane z Device - filtr po nich to lista urządzeń + reading_dev_ts_idx.
+        indexes = [
+            models.Index(fields=['device', '-timestamp'], name='reading_dev_ts_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['device', 'metric_ref', 'timestamp'],
+                name='uniq_reading_device_metric_ts',
+            ),
+        ]
+
+    # Dawne kolumny tekstowe jako właściwości. Wartości podane przy tworzeniu
+    # (DeviceReading(metric=..., unit=...)) są zamieniane na kod w resolve_metric().
+    # device_type i location zawsze pochodzą z Device - przekazane wartości są tylko buforowane.
+    _metric = None
+    _unit = None
+    _device_type = None
+    _location = None
+
+    @property
+    def metric(self):
+        if self._metric is None and self.metric_ref_id is not None:
+            return Metric.objects.get_cached(self.metric_ref_id).name
+        return self._metric
+
+    @metric.setter
+    def metric(self, value):
+        self._metric = value
+
+    @property
+    def unit(self):
+        if self._unit is None and self.metric_ref_id is not None:
+            return Metric.objects.get_cached(self.metric_ref_id).unit
+        return self._unit
+
+    @unit.setter
+    def unit(self, value):
+        self._unit = value
+
+    @property
+    def device_type(self):
+        if self._device_type is None and self.device_id is not None:
+            return self.device.device_type
+        return self._device_type
+
+    @device_type.setter
+    def device_type(self, value):
+        self._device_type = value
+
+    @property
+    def location(self):
+        if self._location is None and self.device_id is not None:
+            return self.device.location
+        return self._location
+
+    @location.setter
+    def location(self, value):
+        self._location = value
+
+    def resolve_metric(self):
+        """Zamienia metric/unit ustawione jako tekst na kod ze słownika Metric."""
+        if self._metric is not None:
+            metric = Metric.objects.resolve(self._metric, self._unit)
+            if self.metric_ref_id != metric.pk:
+                self.metric_ref = metric
+
+    def save(self, *args, **kwargs):
+        self.resolve_metric()
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.device.device_id} - {self.metric} @ {self.timestamp}"
+
+
+class ReadingWatermark(models.Model):
+    """
+    Znacznik ostatnio zaimportowanego odczytu dla urządzenia (import plikowy).
+    Import przyrostowy pomija wiersze starsze niż last_timestamp.
+    """
+    device = models.OneToOneField(
+        Device,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="watermark",
+    )
+    last_timestamp = models.DateTimeField(help_text="Najnowszy zaimportowany timestamp odczytu")
+    updated_at = models.DateTimeField(auto_now=True)
+
     def __str__(self):
-        return f"{self.device.device_id} - {self.metric} @ {self.timestamp}"
\ No newline at end of file
+        return f"{self.device_id} @ {self.last_timestamp}"
\ No newline at end of file
@@ -0,0 +1,211 @@
+"""
+Partycjonowanie tabeli odczytów (DeviceReading) po miesiącach - tylko PostgreSQL.
+
+Tabela data_acquisition_devicereading jest partycjonowana zakresowo po timestamp:
+- jedna partycja na miesiąc: data_acquisition_devicereading_pYYYY_MM
+- partycja domyślna (_default) łapie odczyty spoza utworzonych zakresów,
+  dzięki czemu INSERT nigdy nie kończy się błędem
+
+Klucz główny na tabeli partycjonowanej musi zawierać klucz partycjonowania,
+więc w bazie jest to (id, timestamp). Django dalej traktuje id jako pk.
+
+Przyszłe partycje tworzy management command: create_reading_partitions
+"""
+
+from datetime import date
+
+from django.db import connection as default_connection
+from django.utils import timezone
+
+TABLE = 'data_acquisition_devicereading'
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+
+def _month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def _next_month(day):
+    if day.month == 12:
+        return date(day.year + 1, 1, 1)
+    return date(day.year, day.month + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month.year}_{month.month:02d}'
+
+
+def is_partitioned(connection=None):
+    connection = connection or default_connection
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def existing_partitions(connection=None):
+    connection = connection or default_connection
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s)
+            """,
+            [TABLE],
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def create_month_partition(month, connection=None):
+    """
+    Tworzy partycję dla miesiąca (jeśli nie istnieje).
+    Odczyty z tego zakresu leżące w partycji domyślnej są do niej przenoszone,
+    bo PostgreSQL nie pozwala dołączyć partycji nakładającej się na wiersze w _default.
+
+    Returns:
+        True jeśli partycja została utworzona
+    """
+    connection = connection or default_connection
+    month = _month_start(month)
+    name = partition_name(month)
+    if name in existing_partitions(connection):
+        return False
+
+    start = f'{month.isoformat()} 00:00:00+00'
+    end = f'{_next_month(month).isoformat()} 00:00:00+00'
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE "{name}" (LIKE "{TABLE}" INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" '
+            f'WHERE "timestamp" >= %s AND "timestamp" < %s RETURNING *) '
+            f'INSERT INTO "{name}" SELECT * FROM moved',
+            [start, end],
+        )
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" '
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+    return True
+
+
+def ensure_monthly_partitions(months_ahead=3, start=None, connection=None):
+    """
+    Zapewnia partycje od miesiąca start (domyślnie bieżący) do months_ahead miesięcy naprzód.
+
+    Returns:
+        Lista nazw utworzonych partycji
+    """
+    connection = connection or default_connection
+    month = _month_start(start or timezone.now().date())
+    created = []
+    for _ in range(months_ahead + 1):
+        if create_month_partition(month, connection):
+            created.append(partition_name(month))
+        month = _next_month(month)
+    return created
+
+
+def _constraints(cursor, table):
+    """Ograniczenia poza kluczem głównym (unique, check, foreign key) jako (nazwa, definicja)."""
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype IN ('u', 'c', 'f') "
+        "ORDER BY contype DESC, conname",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def _indexes(cursor, table):
+    """Indeksy nie związane z ograniczeniami jako (nazwa, CREATE INDEX ...)."""
+    cursor.execute(
+        """
+        SELECT indexname, indexdef FROM pg_indexes
+        WHERE tablename = %s
+          AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s))
+        ORDER BY indexname
+        """,
+        [table, table],
+    )
+    # Indeksy tabeli partycjonowanej mają postać "ON ONLY tabela" - nowa definicja obejmuje partycje
+    return [(name, definition.replace(' ON ONLY ', ' ON ')) for name, definition in cursor.fetchall()]
+
+
+def rebuild_table(schema_editor, partitioned):
+    """
+    Przebudowuje tabelę odczytów na partycjonowaną (partitioned=True) lub zwykłą.
+    Dane, sekwencja id oraz wszystkie indeksy i ograniczenia (z ich nazwami,
+    na których opierają się migracje Django) są przenoszone na nową tabelę.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql' or is_partitioned(connection) == partitioned:
+        return
+
+    old = f'{TABLE}_old'
+    with connection.cursor() as cursor:
+        constraints = _constraints(cursor, TABLE)
+        indexes = _indexes(cursor, TABLE)
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{old}"')
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'p'",
+            [old],
+        )
+        cursor.execute(f'ALTER TABLE "{old}" RENAME CONSTRAINT "{cursor.fetchone()[0]}" TO "{old}_pkey"')
+        cursor.execute(f"SELECT pg_get_serial_sequence('\"{old}\"', 'id')")
+        cursor.execute(f'ALTER SEQUENCE {cursor.fetchone()[0]} RENAME TO "{old}_id_seq"')
+        # Nazwy indeksów są globalne w schemacie - zwolnij je przed utworzeniem nowej tabeli
+        for name, _ in constraints:
+            cursor.execute(f'ALTER TABLE "{old}" DROP CONSTRAINT "{name}"')
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX "{name}"')
+
+        if partitioned:
+            cursor.execute(
+                f'CREATE TABLE "{TABLE}" (LIKE "{old}" INCLUDING DEFAULTS INCLUDING IDENTITY, '
+                f'PRIMARY KEY (id, "timestamp")) PARTITION BY RANGE ("timestamp")'
+            )
+            cursor.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT')
+        else:
+            cursor.execute(
+                f'CREATE TABLE "{TABLE}" (LIKE "{old}" INCLUDING DEFAULTS INCLUDING IDENTITY, '
+                f'PRIMARY KEY (id))'
+            )
+
+        for name, definition in constraints:
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+        for _, definition in indexes:
+            cursor.execute(definition)
+
+        if partitioned:
+            cursor.execute(f'SELECT min("timestamp"), max("timestamp") FROM "{old}"')
+            first, last = cursor.fetchone()
+            if first is not None:
+                month = _month_start(first.date())
+                while month <= last.date():
+                    create_month_partition(month, connection)
+                    month = _next_month(month)
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{old}"')
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('\"{TABLE}\"', 'id'), "
+            f'COALESCE((SELECT max(id) FROM "{TABLE}"), 0) + 1, false)'
+        )
+        cursor.execute(f'DROP TABLE "{old}"')
+
+    if partitioned:
+        ensure_monthly_partitions(connection=connection)
+
+
+def partition_table(apps, schema_editor):
+    rebuild_table(schema_editor, partitioned=True)
+
+
+def unpartition_table(apps, schema_editor):
+    rebuild_table(schema_editor, partitioned=False)
@@ -0,0 +1,12 @@
+"""
+Sygnały modułu data_acquisition.
+
+bulk_create() nie wysyła post_save, dlatego ścieżki masowego zapisu odczytów
+wysyłają po każdej partii sygnał readings_bulk_created. Moduły nasłuchujące
+(np. alarm_alert.monitoring) dostają całą partię naraz zamiast pojedynczych wierszy.
+"""
+
+from django.dispatch import Signal
+
+# Argumenty: readings - lista zapisanych obiektów DeviceReading
+readings_bulk_created = Signal()
@@ -8,6 +8,8 @@ urlpatterns = [
     path('devices/<int:pk>/', views.DeviceDetail.as_view(), name='device-detail'),
     
     path('readings/', views.DeviceReadingListCreate.as_view(), name='readings-list-create'),
+    path('readings/batch/', views.DeviceReadingBatchCreate.as_view(), name='readings-batch-create'),
     path('readings/<int:pk>/', views.DeviceReadingDetail.as_view(), name='readings-detail'),
     path('readings/filter/', views.DeviceReadingFilter.as_view(), name='readings-filter'),
+    path('readings/export/columnar/', views.DeviceReadingColumnarExport.as_view(), name='readings-export-columnar'),
 ]
\ No newline at end of file
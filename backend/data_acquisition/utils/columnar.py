@@ -0,0 +1,220 @@
+"""
+Kolumnowy format binarny odczytów (IOCOL) - zwarta alternatywa dla JSON przy masowym eksporcie.
+
+Układ pliku (little-endian):
+    MAGIC (8 B)
+    partia 1: bufory kolumn jedna po drugiej, każdy wyrównany do 8 B
+    partia 2: ...
+    stopka: JSON (schemat, słowniki, offsety partii)
+    długość stopki (uint64)
+    MAGIC (8 B)
+
+- Łańcuchy (device_type, location, metric, unit) są kodowane słownikowo:
+  w partiach leżą kody int32, słowniki są w stopce (wspólne dla całego pliku).
+- timestamp to int64 - mikrosekundy od epoki UTC.
+- Partie mają stałe offsety zapisane w stopce, więc plik można otworzyć przez mmap
+  i czytać kolumny bez kopiowania (np.frombuffer na zmapowanym buforze).
+- Stopka jest zapisywana na końcu, więc plik da się generować strumieniowo (HTTP).
+"""
+
+import json
+import mmap
+import struct
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+
+MAGIC = b"IOCOL1\x00\x00"
+CONTENT_TYPE = "application/vnd.io.columnar"
+FILE_EXTENSION = "iocol"
+DEFAULT_BATCH_SIZE = 65536
+# Górna granica batch_size z zapytania - rozmiar partii wyznacza zużycie pamięci eksportu
+MAX_BATCH_SIZE = 262144
+
+# (nazwa, typ numpy); typ None = kolumna kodowana słownikowo (kody int32)
+SCHEMA = [
+    ("id", "<i8"),
+    ("timestamp", "<i8"),
+    ("device", "<i4"),
+    ("device_type", None),
+    ("location", None),
+    ("metric", None),
+    ("value", "<f8"),
+    ("unit", None),
+    ("signal_dbm", "<i4"),
+    ("status", "u1"),
+]
+COLUMN_NAMES = [name for name, _ in SCHEMA]
+DICTIONARY_COLUMNS = [name for name, dtype in SCHEMA if dtype is None]
+CODE_DTYPE = "<i4"
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _dtype(column):
+    return np.dtype(dict(SCHEMA)[column] or CODE_DTYPE)
+
+
+def _padding(size):
+    return (-size) % 8
+
+
+def _to_micros(value):
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+class ColumnarEncoder:
+    """
+    Koduje partie odczytów do formatu IOCOL.
+    Wiersze to krotki w kolejności COLUMN_NAMES (timestamp jako aware datetime).
+    """
+
+    def __init__(self):
+        self.dictionaries = {name: {} for name in DICTIONARY_COLUMNS}
+        self.batches = []
+        self.offset = len(MAGIC)
+
+    def header(self):
+        return MAGIC
+
+    def encode_batch(self, rows):
+        columns = list(zip(*rows)) if rows else [() for _ in SCHEMA]
+        chunks = []
+        column_offsets = {}
+        position = self.offset
+
+        for (name, _), values in zip(SCHEMA, columns):
+            if name in self.dictionaries:
+                dictionary = self.dictionaries[name]
+                values = [dictionary.setdefault(v, len(dictionary)) for v in values]
+            elif name == "timestamp":
+                values = [_to_micros(v) for v in values]
+
+            data = np.asarray(values, dtype=_dtype(name)).tobytes()
+            column_offsets[name] = position
+            chunks.append(data)
+            chunks.append(b"\x00" * _padding(len(data)))
+            position += len(data) + _padding(len(data))
+
+        self.batches.append({"rows": len(rows), "offsets": column_offsets})
+        self.offset = position
+        return b"".join(chunks)
+
+    def footer(self):
+        footer = json.dumps({
+            "version": 1,
+            "schema": [{"name": name, "dtype": _dtype(name).str, "dictionary": name in self.dictionaries} for name, _ in SCHEMA],
+            "timestamp_unit": "us",
+            "dictionaries": {name: list(values) for name, values in self.dictionaries.items()},
+            "batches": self.batches,
+        }).encode()
+        return footer + struct.pack("<Q", len(footer)) + MAGIC
+
+
+def _batched(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_encoded(readings, batch_size=DEFAULT_BATCH_SIZE, encoder=None):
+    """
+    Generator bajtów pliku IOCOL dla querysetu odczytów (stała pamięć - jedna partia naraz).
+    """
+    encoder = encoder or ColumnarEncoder()
+    yield encoder.header()
+    rows = readings.values_list(*COLUMN_NAMES).iterator(chunk_size=min(batch_size, 10000))
+    for batch in _batched(rows, batch_size):
+        yield encoder.encode_batch(batch)
+    yield encoder.footer()
+
+
+def write_file(readings, path, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Zapisuje odczyty do pliku IOCOL.
+
+    Returns:
+        Liczba zapisanych wierszy
+    """
+    encoder = ColumnarEncoder()
+    with open(path, "wb") as f:
+        for chunk in iter_encoded(readings, batch_size, encoder):
+            f.write(chunk)
+    return sum(batch["rows"] for batch in encoder.batches)
+
+
+class ColumnarFile:
+    """
+    Czytnik plików IOCOL. Plik jest mapowany do pamięci (mmap),
+    kolumny są widokami numpy na zmapowany bufor - bez kopiowania i parsowania.
+    """
+
+    def __init__(self, source):
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self._file = None
+            self._buffer = memoryview(source)
+        else:
+            self._file = open(source, "rb")
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if bytes(self._buffer[:len(MAGIC)]) != MAGIC or bytes(self._buffer[-len(MAGIC):]) != MAGIC:
+            raise ValueError("Not an IOCOL file")
+
+        footer_end = len(self._buffer) - len(MAGIC) - 8
+        (footer_length,) = struct.unpack("<Q", self._buffer[footer_end:footer_end + 8])
+        self.meta = json.loads(bytes(self._buffer[footer_end - footer_length:footer_end]))
+        self.dictionaries = self.meta["dictionaries"]
+        self.num_rows = sum(batch["rows"] for batch in self.meta["batches"])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._buffer.close()
+            self._file.close()
+            self._file = None
+
+    def batch_column(self, batch_index, name):
+        batch = self.meta["batches"][batch_index]
+        return np.frombuffer(self._buffer, dtype=_dtype(name), count=batch["rows"], offset=batch["offsets"][name])
+
+    def column(self, name):
+        """Cała kolumna (kody int32 dla kolumn słownikowych)."""
+        parts = [self.batch_column(i, name) for i in range(len(self.meta["batches"]))]
+        if not parts:
+            return np.empty(0, dtype=_dtype(name))
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def decoded_column(self, name):
+        """Kolumna słownikowa zdekodowana do listy łańcuchów."""
+        dictionary = self.dictionaries[name]
+        return [dictionary[code] for code in self.column(name).tolist()]
+
+    def to_records(self):
+        """
+        Odczyty jako lista słowników w kształcie zgodnym z API JSON
+        (timestamp jako ISO 8601 UTC z 'Z', jak w DRF).
+        """
+        columns = {}
+        for name in COLUMN_NAMES:
+            if name in self.dictionaries:
+                columns[name] = self.decoded_column(name)
+            else:
+                columns[name] = self.column(name).tolist()
+
+        columns["timestamp"] = [
+            (_EPOCH + timedelta(microseconds=us)).isoformat().replace("+00:00", "Z")
+            for us in columns["timestamp"]
+        ]
+        columns["status"] = [bool(v) for v in columns["status"]]
+        return [dict(zip(COLUMN_NAMES, values)) for values in zip(*(columns[name] for name in COLUMN_NAMES))]
@@ -1,18 +1,27 @@
 import csv
 import os
+import time
 from datetime import datetime, timezone as dt_timezone
-from data_acquisition.models import Device, DeviceReading
+from data_acquisition.models import Device, DeviceReading, ReadingWatermark
+from data_acquisition.signals import readings_bulk_created
 from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Max
 
-def run():
+DEFAULT_BATCH_SIZE = 5000
+
+
+def _statics_path(filename):
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    devices_path = os.path.join(base_dir, "statics", "devices.csv")
-    readings_path = os.path.join(base_dir, "statics", "sensors_data.csv")
-    
+    return os.path.join(base_dir, "statics", filename)
+
+
+def import_devices(devices_path=None):
+    devices_path = devices_path or _statics_path("devices.csv")
+
     print("Importing devices...")
     devices_imported = 0
     devices_updated = 0
-    
+
     with open(devices_path, newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
@@ -38,16 +47,39 @@ def run():
                 devices_updated += 1 if updated else 0
             else:
                 devices_imported += 1
-    
+
     print(f" Devices imported: {devices_imported}, updated: {devices_updated}")
 
+
+def _reading_from_row(row, device):
+    naive_dt = datetime.fromisoformat(row["timestamp"])
+    aware_dt = naive_dt.replace(tzinfo=dt_timezone.utc)
+
+    return DeviceReading(
+        device=device,
+        timestamp=aware_dt,
+        device_type=row["device_type"],
+        location=row["location"],
+        metric=row["metric"],
+        value=float(row["value"]),
+        unit=row["unit"],
+        signal_dbm=int(row["signal_dbm"]),
+        status=row["status"].lower() == "true",
+    )
+
+
+def run():
+    import_devices()
+
+    readings_path = _statics_path("sensors_data.csv")
+
     print("Importing device readings...")
-    
+
     old_count = DeviceReading.objects.count()
     if old_count > 0:
         print(f" Usuwanie {old_count} starych rekordów...")
         DeviceReading.objects.all().delete()
-    
+
     imported_count = 0
     skipped_count = 0
 
@@ -57,38 +89,155 @@ def run():
         for row in reader:
             try:
                 device = Device.objects.get(device_id=row["device_id"])
-
-                naive_dt = datetime.fromisoformat(row["timestamp"])
-                aware_dt = naive_dt.replace(tzinfo=dt_timezone.utc)
-                
-                reading_value = float(row["value"])
-                reading_signal_dbm = int(row["signal_dbm"])
-                reading_status = row["status"].lower() == "true"
-
-                DeviceReading.objects.create(
-                    device=device,
-                    timestamp=aware_dt,
-                    device_type=row["device_type"],
-                    location=row["location"],
-                    metric=row["metric"],
-                    value=reading_value,
-                    unit=row["unit"],
-                    signal_dbm=reading_signal_dbm,
-                    status=reading_status,
-                )
+                _reading_from_row(row, device).save(force_insert=True)
                 imported_count += 1
-            
+
             except ObjectDoesNotExist:
                 print(f" Pomięto odczyt: Brak urządzenia o ID: {row['device_id']}. Wiersz: {reader.line_num}.")
                 skipped_count += 1
-                
+
             except ValueError as e:
                 print(f" Pomięto odczyt: Błąd konwersji danych w wierszu {reader.line_num}. {e}")
                 skipped_count += 1
-            
+
             except Exception as e:
                 print(f" Pomięto odczyt: Nieznany błąd w wierszu {reader.line_num}. {e}")
                 skipped_count += 1
-                
+
+    rebuild_watermarks()
     print(f" DeviceReadings imported. Utworzono: {imported_count}. Pominięto: {skipped_count}.")
-    print("=== IMPORT COMPLETED ===")
\ No newline at end of file
+    print("=== IMPORT COMPLETED ===")
+
+
+def rebuild_watermarks():
+    """
+    Przelicza znaczniki importu na podstawie danych w tabeli odczytów.
+    """
+    ReadingWatermark.objects.all().delete()
+    latest = DeviceReading.objects.values('device').annotate(last=Max('timestamp'))
+    ReadingWatermark.objects.bulk_create(
+        [ReadingWatermark(device_id=row['device'], last_timestamp=row['last']) for row in latest]
+    )
+
+
+def _flush_batch(batch, latest):
+    """
+    Zapisuje partię i zwraca liczbę nowych odczytów.
+    latest (device_id -> najnowszy timestamp w pliku) jest aktualizowane, znaczniki w bazie
+    zapisuje dopiero _save_watermarks po całym imporcie.
+    """
+    # ON CONFLICT DO NOTHING - duplikaty (device, metric, timestamp) są pomijane przez bazę
+    inserted = DeviceReading.objects.insert_new(batch)
+
+    for reading in batch:
+        last = latest.get(reading.device_id)
+        if last is None or reading.timestamp > last:
+            latest[reading.device_id] = reading.timestamp
+
+    # Alerty oceniane raz na partię (bulk_create nie wysyła post_save) - tylko dla nowych odczytów
+    if inserted:
+        readings_bulk_created.send(sender=DeviceReading, readings=inserted)
+    return len(inserted)
+
+
+def _save_watermarks(latest, watermarks):
+    changed = {
+        device_id: ts for device_id, ts in latest.items()
+        if watermarks.get(device_id) is None or ts > watermarks[device_id]
+    }
+    if changed:
+        ReadingWatermark.objects.bulk_create(
+            [ReadingWatermark(device_id=device_id, last_timestamp=ts) for device_id, ts in changed.items()],
+            update_conflicts=True,
+            unique_fields=['device'],
+            update_fields=['last_timestamp', 'updated_at'],
+        )
+
+
+def run_bulk(readings_path=None, batch_size=DEFAULT_BATCH_SIZE, import_device_list=True, incremental=False):
+    """
+    Strumieniowy import odczytów: urządzenia z mapy w pamięci, zapis partiami
+    przez bulk_create, bez usuwania istniejących danych.
+    Duplikaty (device, metric, timestamp) są pomijane przez ON CONFLICT.
+    
+    incremental=True: pomija wiersze starsze niż znacznik urządzenia (ReadingWatermark),
+    więc ponowny import tego samego pliku nie wysyła nic do bazy. Porównanie jest ze
+    znacznikami sprzed importu - plik nie musi być posortowany po czasie.
+    """
+    if import_device_list:
+        import_devices()
+
+    readings_path = readings_path or _statics_path("sensors_data.csv")
+
+    mode = "incremental" if incremental else "bulk"
+    print(f"Importing device readings ({mode}, batch_size={batch_size})...")
+
+    devices = Device.objects.in_bulk()
+    # Znaczniki z początku importu - przesuwane w bazie dopiero po imporcie
+    watermarks = dict(ReadingWatermark.objects.values_list('device_id', 'last_timestamp'))
+    latest = {}
+    imported_count = 0
+    inserted_count = 0
+    skipped_count = 0
+    older_count = 0
+    batch = []
+    started = time.perf_counter()
+
+    with open(readings_path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+
+        for row in reader:
+            try:
+                device = devices.get(int(row["device_id"]))
+                if device is None:
+                    print(f" Pomięto odczyt: Brak urządzenia o ID: {row['device_id']}. Wiersz: {reader.line_num}.")
+                    skipped_count += 1
+                    continue
+
+                reading = _reading_from_row(row, device)
+
+            except (ValueError, KeyError) as e:
+                print(f" Pomięto odczyt: Błąd konwersji danych w wierszu {reader.line_num}. {e}")
+                skipped_count += 1
+                continue
+
+            if incremental:
+                # Ten sam timestamp może mieć inną metrykę - przepuszczamy go, ON CONFLICT odfiltruje duplikaty
+                last = watermarks.get(device.device_id)
+                if last is not None and reading.timestamp < last:
+                    older_count += 1
+                    continue
+
+            batch.append(reading)
+
+            if len(batch) >= batch_size:
+                inserted_count += _flush_batch(batch, latest)
+                imported_count += len(batch)
+                batch = []
+
+        if batch:
+            inserted_count += _flush_batch(batch, latest)
+            imported_count += len(batch)
+
+    _save_watermarks(latest, watermarks)
+
+    elapsed = time.perf_counter() - started
+    rate = imported_count / elapsed if elapsed > 0 else 0
+    print(f" DeviceReadings imported. Wysłano do bazy: {imported_count}, nowe: {inserted_count} (duplikaty pominięte przez ON CONFLICT). Pominięto: {skipped_count}.")
+    if incremental:
+        print(f" Pominięto {older_count} odczytów starszych niż znacznik urządzenia.")
+    print(f" Czas: {elapsed:.2f}s ({rate:.0f} wierszy/s)")
+    print("=== IMPORT COMPLETED ===")
+    return imported_count
+
+
+def run_incremental(readings_path=None, batch_size=DEFAULT_BATCH_SIZE, import_device_list=True):
+    """
+    Import przyrostowy - dopisuje tylko odczyty nowsze niż znacznik urządzenia.
+    """
+    return run_bulk(
+        readings_path=readings_path,
+        batch_size=batch_size,
+        import_device_list=import_device_list,
+        incremental=True,
+    )
@@ -0,0 +1,268 @@
+"""
+Wsadowe przyjmowanie odczytów z bramek (endpoint readings/batch/).
+
+Ścieżka jest celowo lżejsza niż DRF serializer:
+- payload parsowany raz (tablica JSON albo NDJSON, opcjonalnie gzip); treść po dekompresji
+  jest czytana najwyżej do MAX_BODY_BYTES (zamiast limitu DATA_UPLOAD_MAX_MEMORY_SIZE parserów DRF)
+- walidacja to zwykłe funkcje na słownikach, urządzenia i metryki z map w pamięci
+- zapis w jednej transakcji (DeviceReading.objects.insert_new), duplikaty pomija ON CONFLICT
+- alerty oceniane raz na żądanie (sygnał readings_bulk_created), a nie raz na wiersz -
+  tylko dla odczytów faktycznie zapisanych
+"""
+
+import gzip
+import json
+import math
+import zlib
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from data_acquisition.models import Device, DeviceReading, Metric
+from data_acquisition.signals import readings_bulk_created
+
+MAX_BATCH_ROWS = 50000
+MAX_BODY_BYTES = 32 * 1024 * 1024
+INSERT_BATCH_SIZE = 5000
+
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+
+class PayloadError(ValueError):
+    """Payload nie daje się odczytać jako lista odczytów."""
+
+
+class PayloadTooLarge(PayloadError):
+    """Treść (po dekompresji) przekracza MAX_BODY_BYTES."""
+
+
+class _LimitedReader:
+    """
+    Czyta strumień najwyżej do limit bajtów - po przekroczeniu zgłasza PayloadTooLarge,
+    więc ani duże żądanie, ani 'bomba' gzip nie trafia w całości do pamięci.
+    """
+
+    def __init__(self, stream, limit):
+        self._stream = stream
+        self._limit = limit
+        self._count = 0
+
+    def _size(self, size):
+        # Jeden bajt ponad limit wystarczy, żeby wykryć przekroczenie
+        remaining = self._limit - self._count + 1
+        return remaining if size is None or size < 0 else min(size, remaining)
+
+    def _counted(self, data):
+        self._count += len(data)
+        if self._count > self._limit:
+            raise PayloadTooLarge(f"Request body too large (max {self._limit} bytes)")
+        return data
+
+    def read(self, size=-1):
+        return self._counted(self._stream.read(self._size(size)))
+
+    def readline(self, size=-1):
+        return self._counted(self._stream.readline(self._size(size)))
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+
+def _decompress(stream, encoding):
+    if encoding == 'gzip':
+        return gzip.GzipFile(fileobj=stream)
+    if encoding and encoding != 'identity':
+        raise PayloadError(f"Unsupported Content-Encoding: {encoding}")
+    return stream
+
+
+def parse_payload(stream, content_type='', encoding=''):
+    """
+    Czyta odczyty z strumienia żądania.
+
+    Args:
+        stream: obiekt plikowy z treścią żądania
+        content_type: application/json (tablica lub {"readings": [...]}) albo NDJSON
+        encoding: wartość Content-Encoding ('' albo 'gzip')
+
+    Returns:
+        Lista słowników (po jednym na odczyt)
+    """
+    try:
+        body = _LimitedReader(_decompress(stream, (encoding or '').strip().lower()), MAX_BODY_BYTES)
+
+        if content_type.split(';')[0].strip().lower() in NDJSON_CONTENT_TYPES:
+            rows = []
+            for line_number, line in enumerate(body, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except ValueError as e:
+                    raise PayloadError(f"Invalid JSON in line {line_number}: {e}")
+                if len(rows) > MAX_BATCH_ROWS:
+                    break
+        else:
+            rows = json.loads(body.read())
+            if isinstance(rows, dict):
+                rows = rows.get('readings')
+    except (OSError, EOFError, zlib.error) as e:
+        raise PayloadError(f"Cannot decompress request body: {e}")
+    except ValueError as e:
+        if isinstance(e, PayloadError):
+            raise
+        raise PayloadError(f"Invalid JSON: {e}")
+
+    if not isinstance(rows, list):
+        raise PayloadError("Expected a JSON array of readings, {\"readings\": [...]} or NDJSON")
+    if len(rows) > MAX_BATCH_ROWS:
+        raise PayloadError(f"Too many readings in one request (max {MAX_BATCH_ROWS})")
+    return rows
+
+
+def _parse_timestamp(value):
+    if not isinstance(value, str):
+        raise ValueError
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        dt = parse_datetime(value)
+        if dt is None:
+            raise
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=dt_timezone.utc)
+    return dt
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in ('true', 'false', '1', '0'):
+        return value.lower() in ('true', '1')
+    if value in (0, 1):
+        return bool(value)
+    raise ValueError
+
+
+def validate_row(row, devices):
+    """
+    Waliduje jeden odczyt.
+
+    Args:
+        row: słownik z polami jak w DeviceReadingSerializer (device, timestamp, metric, value, ...)
+        devices: mapa device_id -> Device
+
+    Returns:
+        (DeviceReading, None) albo (None, {pole: komunikat})
+    """
+    if not isinstance(row, dict):
+        return None, {"non_field_errors": "Expected an object"}
+
+    errors = {}
+    device = None
+    device_id = row.get('device', row.get('device_id'))
+    try:
+        device = devices.get(int(device_id))
+        if device is None:
+            errors['device'] = f"Device {device_id} does not exist"
+    except (TypeError, ValueError):
+        errors['device'] = "This field is required and must be an integer"
+
+    timestamp = None
+    try:
+        timestamp = _parse_timestamp(row.get('timestamp'))
+    except ValueError:
+        errors['timestamp'] = "This field is required and must be an ISO 8601 datetime"
+
+    metric = row.get('metric')
+    unit = row.get('unit')
+    if not isinstance(metric, str) or not metric or len(metric) > 50:
+        errors['metric'] = "This field is required (max 50 characters)"
+    if unit is not None and (not isinstance(unit, str) or len(unit) > 20):
+        errors['unit'] = "Must be a string (max 20 characters)"
+
+    value = row.get('value')
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        errors['value'] = "This field is required and must be a number"
+    else:
+        try:
+            value = float(value)
+        except OverflowError:
+            value = math.inf
+        # 1e400 w JSON to inf, a inf/NaN psułyby bazowe statystyki anomalii i agregaty raportów
+        if not math.isfinite(value):
+            errors['value'] = "Must be a finite number"
+
+    signal_dbm = row.get('signal_dbm', 0)
+    if isinstance(signal_dbm, bool) or not isinstance(signal_dbm, int) or not -2**31 <= signal_dbm < 2**31:
+        errors['signal_dbm'] = "Must be an integer"
+
+    status = True
+    try:
+        status = _parse_bool(row.get('status', True))
+    except ValueError:
+        errors['status'] = "Must be a boolean"
+
+    if errors:
+        return None, errors
+
+    return DeviceReading(
+        device=device,
+        timestamp=timestamp,
+        metric_ref=Metric.objects.resolve(metric, unit),
+        value=value,
+        signal_dbm=signal_dbm,
+        status=status,
+    ), None
+
+
+def ingest(rows):
+    """
+    Waliduje i zapisuje odczyty. Poprawne wiersze trafiają do bazy w jednej transakcji,
+    błędne są zwracane z indeksem wiersza w payloadzie. accepted to odczyty zapisane,
+    duplicates - poprawne odczyty już obecne w bazie (device, metric, timestamp).
+
+    Returns:
+        Słownik {"received", "accepted", "duplicates", "rejected", "errors": [{"index", "errors"}]}
+    """
+    device_ids = set()
+    for row in rows:
+        if isinstance(row, dict):
+            try:
+                device_ids.add(int(row.get('device', row.get('device_id'))))
+            except (TypeError, ValueError):
+                pass
+    devices = Device.objects.in_bulk(device_ids)
+
+    readings = []
+    errors = []
+    for index, row in enumerate(rows):
+        reading, row_errors = validate_row(row, devices)
+        if row_errors:
+            errors.append({"index": index, "errors": row_errors})
+        else:
+            readings.append(reading)
+
+    inserted = []
+    if readings:
+        with transaction.atomic():
+            # ON CONFLICT DO NOTHING - ponownie wysłane odczyty (device, metric, timestamp) są pomijane
+            inserted = DeviceReading.objects.insert_new(readings, batch_size=INSERT_BATCH_SIZE)
+            if inserted:
+                transaction.on_commit(
+                    lambda: readings_bulk_created.send(sender=DeviceReading, readings=inserted)
+                )
+
+    return {
+        "received": len(rows),
+        "accepted": len(inserted),
+        "duplicates": len(readings) - len(inserted),
+        "rejected": len(errors),
+        "errors": errors,
+    }
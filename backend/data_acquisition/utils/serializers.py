@@ -9,6 +9,14 @@ class DeviceSerializer(serializers.ModelSerializer):
 
 
 class DeviceReadingSerializer(serializers.ModelSerializer):
+    # Dawne kolumny odczytu - kształt odpowiedzi bez zmian po normalizacji.
+    # metric/unit są zamieniane na kod słownika Metric, device_type/location pochodzą z Device
+    # (tylko do odczytu - wartości przesłane przy zapisie są ignorowane).
+    device_type = serializers.CharField(max_length=50, read_only=True)
+    location = serializers.CharField(max_length=200, read_only=True)
+    metric = serializers.CharField(max_length=50)
+    unit = serializers.CharField(max_length=20, required=False)
+
     class Meta:
         model = DeviceReading
-        fields = '__all__'
\ No newline at end of file
+        fields = ['id', 'timestamp', 'device_type', 'location', 'metric', 'value', 'unit', 'signal_dbm', 'status', 'device']
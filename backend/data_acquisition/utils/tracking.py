@@ -0,0 +1,55 @@
+"""
+Śledzenie zmian pól modelu bez dodatkowego SELECT w pre_save.
+
+- TrackedFieldsMixin zapamiętuje wartości pól z tracked_fields w chwili wczytania
+  obiektu z bazy (Model.from_db) i po każdym save() / refresh_from_db()
+- sygnały porównują instance.previous_values() z bieżącymi wartościami zamiast
+  pobierać stary wiersz (Device, Alert - wcześniej po jednym zapytaniu na zapis)
+- nazwy w tracked_fields to attname (dla ForeignKey: 'user_id', nie 'user')
+- obiekt nowy (_state.adding) nie ma poprzednich wartości - previous_values() zwraca None
+- obiekt, którego nie wczytano z bazy (np. po bulk_create, albo bez pól z .only()),
+  jest doczytywany jednym zapytaniem - tak jak przed wprowadzeniem mechanizmu
+"""
+
+
+class TrackedFieldsMixin:
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked()
+        return instance
+
+    def _snapshot_tracked(self):
+        # Pola odroczone (.only()/.defer()) nie są w __dict__ - nie wymuszamy ich doczytania
+        self._tracked_values = {
+            name: self.__dict__[name] for name in self.tracked_fields if name in self.__dict__
+        }
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Po post_save - odbiorcy sygnałów widzą jeszcze wartości sprzed zapisu
+        self._snapshot_tracked()
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._snapshot_tracked()
+
+    def previous_values(self):
+        """
+        Wartości tracked_fields zapisane w bazie przed bieżącymi zmianami.
+
+        Returns:
+            Słownik {attname: wartość} albo None dla obiektu jeszcze niezapisanego
+        """
+        if self._state.adding or self.pk is None:
+            return None
+        values = self.__dict__.get('_tracked_values', {})
+        if len(values) < len(self.tracked_fields):
+            values = type(self)._base_manager.using(self._state.db).filter(pk=self.pk).values(*self.tracked_fields).first()
+        return values
+
+    def has_changed(self, name):
+        previous = self.previous_values()
+        return previous is not None and previous[name] != getattr(self, name)
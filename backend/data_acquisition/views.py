@@ -1,17 +1,102 @@
-from rest_framework import generics
+import base64
+import csv
+import io
+import json
+
+from rest_framework import generics, status
 from data_acquisition.models import DeviceReading, Device
 from .utils.serializers import DeviceReadingSerializer, DeviceSerializer
+from .utils import columnar, ingest
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from django.db.models import Q
 from django.utils.dateparse import parse_datetime
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework.permissions import AllowAny
 
+# Pola odczytu w kolejności DeviceReadingSerializer
+READING_FIELDS = ['id', 'timestamp', 'device_type', 'location', 'metric', 'value', 'unit', 'signal_dbm', 'status', 'device']
+STREAM_CHUNK_SIZE = 2000
+MAX_PAGE_SIZE = 10000
+
 
 def index(request):
     return HttpResponse("Data acquisition module!")
 
 
+def filter_readings(params):
+    """
+    Buduje queryset odczytów na podstawie parametrów zapytania
+    (device_id, location, metric, timestamp, start, end).
+    """
+    device_id = params.get("device_id")
+    location = params.get("location")
+    metric = params.get("metric")
+    timestamp = params.get("timestamp")
+    start = params.get("start")
+    end = params.get("end")
+    readings = DeviceReading.objects.all()
+
+    # location i metric są tłumaczone na Device / słownik Metric przez DeviceReadingQuerySet
+    if device_id:
+        readings = readings.filter(device__device_id=device_id)
+
+    if location:
+        readings = readings.filter(location=location)
+    if metric:
+        readings = readings.filter(metric=metric)
+    if timestamp:
+        dt = parse_datetime(timestamp)
+        if dt:
+            readings = readings.filter(timestamp=dt)
+    if start:
+        dt_start = parse_datetime(start)
+        if dt_start:
+            readings = readings.filter(timestamp__gte=dt_start)
+    if end:
+        dt_end = parse_datetime(end)
+        if dt_end:
+            readings = readings.filter(timestamp__lte=dt_end)
+
+    return readings
+
+
+def _format_timestamp(value):
+    # Ten sam format co DRF DateTimeField (UTC jako 'Z')
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _reading_rows(readings):
+    """Strumień słowników odczytów pobieranych porcjami z kursora serwerowego."""
+    for row in readings.values(*READING_FIELDS).iterator(chunk_size=STREAM_CHUNK_SIZE):
+        row['timestamp'] = _format_timestamp(row['timestamp'])
+        # Dawne kolumny są adnotacjami (na końcu wiersza) - przywróć kolejność serializera
+        yield {field: row[field] for field in READING_FIELDS}
+
+
+class _Echo:
+    """Bufor dla csv.writer, który zwraca zapisany wiersz zamiast go przechowywać."""
+    def write(self, value):
+        return value
+
+
+def encode_cursor(timestamp, reading_id):
+    raw = f"{timestamp.isoformat()}|{reading_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    timestamp, reading_id = raw.rsplit("|", 1)
+    dt = parse_datetime(timestamp)
+    if dt is None:
+        raise ValueError("Invalid cursor timestamp")
+    return dt, int(reading_id)
+
+
 class DeviceListCreate(generics.ListCreateAPIView):
 
     queryset = Device.objects.all()
@@ -23,43 +108,145 @@ class DeviceDetail(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = DeviceSerializer
 
 class DeviceReadingListCreate(generics.ListCreateAPIView):
-    queryset = DeviceReading.objects.all()
+    queryset = DeviceReading.objects.with_legacy_fields()
     serializer_class = DeviceReadingSerializer
 
 class DeviceReadingDetail(generics.RetrieveUpdateDestroyAPIView):
-    queryset = DeviceReading.objects.all()
+    queryset = DeviceReading.objects.with_legacy_fields()
     serializer_class = DeviceReadingSerializer
 
+class DeviceReadingBatchCreate(APIView):
+    """
+    POST /data-acquisition/readings/batch/
+
+    Wsadowe przyjmowanie odczytów (data_acquisition.utils.ingest):
+    - Content-Type: application/json - tablica odczytów lub {"readings": [...]}
+    - Content-Type: application/x-ndjson - jeden odczyt na linię
+    - Content-Encoding: gzip - opcjonalnie skompresowana treść
+
+    Poprawne wiersze są zapisywane w jednej transakcji, błędne zwracane z indeksem,
+    odczyty już zapisane wcześniej liczone osobno (duplicates):
+    {"received": n, "accepted": n, "duplicates": n, "rejected": n, "errors": [{"index": i, "errors": {...}}]}
+    """
+    # Treść czytana bezpośrednio ze strumienia - bez parserów DRF; zamiast DATA_UPLOAD_MAX_MEMORY_SIZE
+    # obowiązuje ingest.MAX_BODY_BYTES (liczony po dekompresji)
+    parser_classes = []
+
+    def post(self, request):
+        try:
+            rows = ingest.parse_payload(
+                # Bez treści (Content-Length: 0) DRF nie tworzy strumienia - pusty payload daje 400
+                request.stream or io.BytesIO(),
+                content_type=request.content_type or '',
+                encoding=request.META.get('HTTP_CONTENT_ENCODING', ''),
+            )
+        except ingest.PayloadTooLarge as e:
+            return Response({"error": str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        except ingest.PayloadError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = ingest.ingest(rows)
+        if rows and result["rejected"] == len(rows):
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_201_CREATED if result["accepted"] else status.HTTP_200_OK)
+
+
 class DeviceReadingFilter(APIView):
-    permission_classes = [AllowAny] 
+    """
+    GET /data-acquisition/readings/filter/
+
+    Filtry: device_id, location, metric, timestamp, start, end
+
+    Tryby odpowiedzi:
+    - bez dodatkowych parametrów: pełna lista (jak dotychczas)
+    - page_size / cursor: stronicowanie po kluczu (timestamp, id);
+      odpowiedź {"results": [...], "next_cursor": "..." | null}
+    - stream=ndjson | stream=csv: strumień wszystkich pasujących odczytów
+      w stałej pamięci (kursor serwerowy, porcje po STREAM_CHUNK_SIZE)
+    """
+    permission_classes = [AllowAny]
     def get(self, request):
-        device_id = request.GET.get("device_id")
-        location = request.GET.get("location")
-        metric = request.GET.get("metric")
-        timestamp = request.GET.get("timestamp") 
-        start = request.GET.get("start")
-        end = request.GET.get("end")
-        readings = DeviceReading.objects.all().select_related('device') 
-        
-        if device_id:
-            readings = readings.filter(device__device_id=device_id)
-        
-        if location:
-            readings = readings.filter(location=location)
-        if metric:
-            readings = readings.filter(metric=metric)
-        if timestamp:
-            dt = parse_datetime(timestamp)
-            if dt:
-                readings = readings.filter(timestamp=dt)
-        if start:
-            dt_start = parse_datetime(start)
-            if dt_start:
-                readings = readings.filter(timestamp__gte=dt_start)
-        if end:
-            dt_end = parse_datetime(end)
-            if dt_end:
-                readings = readings.filter(timestamp__lte=dt_end)
-
-        serializer = DeviceReadingSerializer(readings, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        readings = filter_readings(request.GET)
+
+        stream = request.GET.get("stream")
+        if stream:
+            return self._stream(readings.order_by("timestamp", "id"), stream)
+
+        if "page_size" in request.GET or "cursor" in request.GET:
+            return self._page(readings, request.GET)
+
+        serializer = DeviceReadingSerializer(readings.with_legacy_fields(), many=True)
+        return Response(serializer.data)
+
+    def _page(self, readings, params):
+        try:
+            page_size = min(int(params.get("page_size", 1000)), MAX_PAGE_SIZE)
+            if page_size <= 0:
+                raise ValueError
+        except ValueError:
+            return Response({"error": "page_size must be a positive integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        cursor = params.get("cursor")
+        if cursor:
+            try:
+                last_ts, last_id = decode_cursor(cursor)
+            except (ValueError, UnicodeDecodeError):
+                return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+            readings = readings.filter(Q(timestamp__gt=last_ts) | Q(timestamp=last_ts, id__gt=last_id))
+
+        page = list(readings.with_legacy_fields().order_by("timestamp", "id")[:page_size + 1])
+        has_next = len(page) > page_size
+        page = page[:page_size]
+
+        next_cursor = encode_cursor(page[-1].timestamp, page[-1].id) if has_next else None
+        serializer = DeviceReadingSerializer(page, many=True)
+        return Response({
+            "results": serializer.data,
+            "next_cursor": next_cursor,
+            "page_size": page_size,
+        })
+
+    def _stream(self, readings, stream):
+        if stream == "ndjson":
+            lines = (json.dumps(row) + "\n" for row in _reading_rows(readings))
+            return StreamingHttpResponse(lines, content_type="application/x-ndjson")
+
+        if stream == "csv":
+            writer = csv.writer(_Echo())
+
+            def rows():
+                yield writer.writerow(READING_FIELDS)
+                for row in _reading_rows(readings):
+                    yield writer.writerow([row[field] for field in READING_FIELDS])
+
+            response = StreamingHttpResponse(rows(), content_type="text/csv")
+            response["Content-Disposition"] = 'attachment; filename="readings.csv"'
+            return response
+
+        return Response({"error": "stream must be 'ndjson' or 'csv'"}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class DeviceReadingColumnarExport(APIView):
+    """
+    GET /data-acquisition/readings/export/columnar/
+
+    Filtry jak w readings/filter/. Zwraca wszystkie pasujące odczyty w kolumnowym
+    formacie binarnym IOCOL (data_acquisition.utils.columnar), generowanym strumieniowo
+    partiami po batch_size wierszy (maks. columnar.MAX_BATCH_SIZE).
+    """
+    permission_classes = [AllowAny]
+    def get(self, request):
+        try:
+            batch_size = min(int(request.GET.get("batch_size", columnar.DEFAULT_BATCH_SIZE)), columnar.MAX_BATCH_SIZE)
+            if batch_size <= 0:
+                raise ValueError
+        except ValueError:
+            return Response({"error": "batch_size must be a positive integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        readings = filter_readings(request.GET).order_by("timestamp", "id")
+        response = StreamingHttpResponse(
+            columnar.iter_encoded(readings, batch_size),
+            content_type=columnar.CONTENT_TYPE,
+        )
+        response["Content-Disposition"] = f'attachment; filename="readings.{columnar.FILE_EXTENSION}"'
+        return response
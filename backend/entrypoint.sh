@@ -10,6 +10,7 @@ echo "Running migrations..."
 
 python manage.py makemigrations
 python manage.py migrate
+python manage.py create_reading_partitions --months-ahead 6
 
 echo "Creating superuser..."
 python manage.py shell << EOF
@@ -80,7 +81,7 @@ EOF
 echo "Regular user setup completed"
 
 echo "Importing csv data..."
-python manage.py shell -c "import data_acquisition.utils.import_csv as ic; ic.run()"
+python manage.py shell -c "import data_acquisition.utils.import_csv as ic; ic.run_incremental()"
 echo "Importing csv finished"
 
 echo "Importing CSV data for Schedule..."
@@ -1,5 +1,8 @@
 import api from './axios';
 
+// Strumień SSE obsługuje osobny proces ASGI (backend: IO.asgi_stream), reszta API zostaje na porcie 6543
+const NOTIFICATION_STREAM_BASE_URL = 'http://localhost:6544/';
+
 // ==================== ALERTS ====================
 
 /**
@@ -124,6 +127,36 @@ export const getUnreadNotificationsCount = async () => {
     return response.data;
 };
 
+/**
+ * Subskrypcja powiadomień push (Server-Sent Events) zamiast odpytywania
+ * @param {Object} handlers - { onNotification, onAlert, onResync, onError }
+ * @returns {Function} funkcja zamykająca połączenie
+ */
+export const subscribeToNotificationStream = (handlers = {}) => {
+    const token = localStorage.getItem('token');
+    if (!token || typeof EventSource === 'undefined') {
+        return null;
+    }
+
+    const url = `${NOTIFICATION_STREAM_BASE_URL}alarm-alert/notifications/stream/?token=${encodeURIComponent(token)}`;
+    const source = new EventSource(url);
+
+    source.addEventListener('notification', (event) => {
+        handlers.onNotification && handlers.onNotification(JSON.parse(event.data));
+    });
+    source.addEventListener('alert', (event) => {
+        handlers.onAlert && handlers.onAlert(JSON.parse(event.data));
+    });
+    source.addEventListener('resync', () => {
+        handlers.onResync && handlers.onResync();
+    });
+    source.onerror = (event) => {
+        handlers.onError && handlers.onError(event);
+    };
+
+    return () => source.close();
+};
+
 // ==================== PREFERENCES ====================
 
 /**
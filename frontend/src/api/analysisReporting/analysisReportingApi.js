@@ -54,8 +54,9 @@ const analysisReportingApi = {
   // ============== REPORTS ==============
 
   /**
-   * Generate new report
+   * Queue report generation (202) - the report is generated by a background worker
    * @param {Object} reportData - { criteria_id, generate_charts, use_ai }
+   * @returns {Object} report job - { job_id, status, progress, stage, ... }
    */
   generateReport: async (reportData) => {
     const response = await api.post(
@@ -65,6 +66,40 @@ const analysisReportingApi = {
     return response.data;
   },
 
+  /**
+   * Get report generation job (status, progress, stage timings, report id)
+   * @param {string} jobId
+   */
+  getReportJob: async (jobId) => {
+    const response = await api.get(`${BASE_URL}/report-jobs/${jobId}/`);
+    return response.data;
+  },
+
+  /**
+   * Poll report job until it finishes
+   * @param {string} jobId
+   * @param {Function} onProgress - called with the job after every poll
+   * @param {number} interval - polling interval in ms
+   * @returns {Object} generated report
+   */
+  waitForReportJob: async (jobId, onProgress, interval = 1000) => {
+    for (;;) {
+      const job = await analysisReportingApi.getReportJob(jobId);
+      if (onProgress) {
+        onProgress(job);
+      }
+      if (job.status === "SUCCEEDED") {
+        return analysisReportingApi.getReportById(job.report);
+      }
+      if (job.status === "FAILED") {
+        const error = new Error(job.error || "Report generation failed");
+        error.response = { data: { error: job.error } };
+        throw error;
+      }
+      await new Promise((resolve) => setTimeout(resolve, interval));
+    }
+  },
+
   /**
    * Get all reports
    */
@@ -17,7 +17,8 @@ import {
     getNotifications,
     getUnreadNotificationsCount,
     markNotificationAsRead,
-    markAllNotificationsAsRead
+    markAllNotificationsAsRead,
+    subscribeToNotificationStream
 } from '../api/alarmAlertService';
 
 function NotificationBell() {
@@ -27,9 +28,16 @@ function NotificationBell() {
 
     useEffect(() => {
         fetchUnreadCount();
-        // Opcjonalnie: odświeżaj co 30 sekund
-        const interval = setInterval(fetchUnreadCount, 30000);
-        return () => clearInterval(interval);
+        // Nowe powiadomienia przychodzą przez SSE; odpytywanie tylko jako rzadki fallback
+        const unsubscribe = subscribeToNotificationStream({
+            onNotification: () => setUnreadCount((count) => count + 1),
+            onResync: fetchUnreadCount,
+        });
+        const interval = setInterval(fetchUnreadCount, unsubscribe ? 300000 : 30000);
+        return () => {
+            clearInterval(interval);
+            unsubscribe && unsubscribe();
+        };
     }, []);
 
     const fetchUnreadCount = async () => {
@@ -10,6 +10,8 @@ import {
   Box,
   Alert,
   CircularProgress,
+  LinearProgress,
+  Typography,
   FormControl,
   InputLabel,
   Select,
@@ -24,6 +26,7 @@ import { pl } from "date-fns/locale";
  */
 function GenerateReportDialog({ open, onClose, onReportGenerated }) {
   const [loading, setLoading] = useState(false);
+  const [job, setJob] = useState(null);
   const [error, setError] = useState(null);
   const [metadata, setMetadata] = useState({ locations: [], device_types: [] });
   const [loadingMetadata, setLoadingMetadata] = useState(false);
@@ -135,7 +138,13 @@ function GenerateReportDialog({ open, onClose, onReportGenerated }) {
         use_ai: formData.use_ai,
       };
 
-      const report = await analysisReportingApi.generateReport(reportData);
+      // Report is generated in the background - poll the job for progress
+      const queuedJob = await analysisReportingApi.generateReport(reportData);
+      setJob(queuedJob);
+      const report = await analysisReportingApi.waitForReportJob(
+        queuedJob.job_id,
+        setJob
+      );
 
       // Call parent callback
       if (onReportGenerated) {
@@ -162,6 +171,7 @@ function GenerateReportDialog({ open, onClose, onReportGenerated }) {
       );
     } finally {
       setLoading(false);
+      setJob(null);
     }
   };
 
@@ -311,6 +321,22 @@ function GenerateReportDialog({ open, onClose, onReportGenerated }) {
             }
             label="Use AI for analysis summaries (takes longer)"
           />
+
+          {loading && job && (
+            <Box>
+              <Typography variant="body2" color="text.secondary">
+                {job.status === "QUEUED"
+                  ? "Waiting in queue..."
+                  : `Generating${job.stage ? ` (${job.stage})` : ""}: ${
+                      job.progress
+                    }%`}
+              </Typography>
+              <LinearProgress
+                variant={job.status === "QUEUED" ? "indeterminate" : "determinate"}
+                value={job.progress}
+              />
+            </Box>
+          )}
         </Box>
       </DialogContent>
       <DialogActions>